@@ -0,0 +1,110 @@
+"""
+Cold versus warm first-request latency of an assistant worker.
+
+Every sample is a fresh Python process, like a worker after a deploy or scale-out. Each one imports the graphs
+(the server does this before it serves anything), optionally runs the startup warm-up, then times the first
+greeting and the first chat turn, and finally the same requests again on a new thread once everything is warm.
+The provider integration and its clients are created for real; only the model calls are answered by the scripted
+model, so the provider's network and TLS handshake are not part of the numbers.
+
+Usage (from the assistant directory):
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --samples 10 --conversation beach_trip
+"""
+import os
+
+# The scripted model answers every call, so any values satisfy Config
+os.environ.setdefault("ASSISTANT_MODEL_PROVIDER", "openai")
+os.environ.setdefault("ASSISTANT_MODEL_NAME", "scripted")
+os.environ.setdefault("ASSISTANT_MODEL_API_KEY", "offline")
+os.environ["ASSISTANT_LIST_CACHE_REDIS_URI"] = ""
+os.environ["ASSISTANT_WARMUP_REQUEST"] = "false"
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+def child(mode: str, conversation_name: str) -> dict:
+    """Runs one sample in this process and returns its timings in milliseconds"""
+    timings = {}
+    started_at = time.perf_counter()
+    from langchain_core.messages import HumanMessage
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    import src.utils.llm as llm
+    from src.graphs.assistant.graph import workflow
+    from src.utils.warmup import warm_up
+    from benchmarks.fake_llm import Script, ScriptedChatModel
+    from benchmarks.run import load_conversations
+    timings["startup_ms"] = (time.perf_counter() - started_at) * 1000
+
+    # Models are still created lazily by get_llm, for real, and then answered by the scripted model
+    script = Script()
+    fake = ScriptedChatModel(script=script)
+    create_llm = llm.create_llm
+    def create_scripted_llm(model_name: str):
+        create_llm(model_name)
+        return fake
+    llm.create_llm = create_scripted_llm
+
+    graph = workflow.compile(checkpointer=InMemorySaver())
+    conversation = load_conversations([conversation_name])[0]
+
+    async def first_requests(thread_id: str, prefix: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        script.load([])
+        start = time.perf_counter()
+        await graph.ainvoke(conversation.get("state", {}), config)
+        timings[f"{prefix}_greeting_ms"] = (time.perf_counter() - start) * 1000
+
+        turn = conversation["turns"][0]
+        script.load(turn.get("model", []))
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content=turn["user"])]}, config)
+        timings[f"{prefix}_turn_ms"] = (time.perf_counter() - start) * 1000
+
+    async def sample():
+        if mode == "warm":
+            start = time.perf_counter()
+            await warm_up()
+            timings["warmup_ms"] = (time.perf_counter() - start) * 1000
+        await first_requests("first", "first")
+        await first_requests("steady", "steady")
+
+    asyncio.run(sample())
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold versus warm first-request latency of a fresh assistant worker")
+    parser.add_argument("--samples", type=int, default=5, help="Fresh processes per mode")
+    parser.add_argument("--conversation", default="beach_trip", help="Recording whose first turn is replayed")
+    parser.add_argument("--child", choices=["cold", "warm"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.conversation)))
+        return
+
+    results = {}
+    for mode in ["cold", "warm"]:
+        samples = []
+        for _ in range(args.samples):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.cold_start", "--child", mode, "--conversation", args.conversation],
+                capture_output=True, text=True, check=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        results[mode] = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+    print(f"median of {args.samples} fresh processes per mode (ms)")
+    for mode, timings in results.items():
+        print(f"\n{mode}")
+        for key, value in timings.items():
+            print(f"  {key:<24} {value:10.1f}")
+
+if __name__ == "__main__":
+    main()
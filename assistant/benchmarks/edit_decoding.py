@@ -0,0 +1,88 @@
+"""
+Decoding cost of the editor's edits and size of the schema sent with every editor call.
+
+Validates a batch of edits (50 by default, one of every operation in turn) with the discriminated union the editor
+uses and with a plain Union of the same models, both as one batch and one edit at a time, and prints the
+structured-output schema of EditorResponse as the OpenAI and Anthropic integrations send it.
+
+Usage (from the assistant directory):
+    python -m benchmarks.edit_decoding
+    python -m benchmarks.edit_decoding --edits 200 --repeat 500
+"""
+import os
+
+# Only the schemas are built, so any values satisfy Config
+os.environ.setdefault("ASSISTANT_MODEL_PROVIDER", "openai")
+os.environ.setdefault("ASSISTANT_MODEL_NAME", "scripted")
+os.environ.setdefault("ASSISTANT_MODEL_API_KEY", "offline")
+
+import json
+import time
+import argparse
+import statistics
+from typing import List, Union, get_args
+
+from pydantic import TypeAdapter
+from langchain_core.utils.function_calling import convert_to_openai_function
+from langchain_anthropic.chat_models import convert_to_anthropic_tool
+
+from src.models.edits import edits_union, validate_edits
+from src.graphs.editor.nodes.editor import EditorResponse
+
+SAMPLE_EDITS = [
+    {"operation": "add_category", "category_name": "Snorkeling"},
+    {"operation": "remove_category", "category_name": "Toiletries"},
+    {"operation": "update_category_name", "category_name": "Clothes", "new_category_name": "Clothing"},
+    {"operation": "add_item", "category_name": "Snorkeling", "item_name": "Mask", "quantity": 1, "notes": None},
+    {"operation": "remove_item", "category_name": None, "item_name": "Umbrella"},
+    {"operation": "update_item_name", "category_name": "Clothing", "item_name": "Tee", "new_item_name": "T-shirt"},
+    {"operation": "update_item_quantity", "category_name": "Clothing", "item_name": "Socks", "new_quantity": 7},
+    {"operation": "update_item_notes", "category_name": "Snorkeling", "item_name": "Mask", "new_notes": "Anti-fog"},
+    {"operation": "move_item", "category_name": None, "item_name": "Sunscreen", "new_category_name": "Beach"},
+    {"operation": "update_trip_name", "new_trip_name": "Bali Getaway"},
+    {"operation": "update_trip_description", "new_trip_description": "Ten days of beaches and temples"},
+    {"operation": "update_trip_start_date", "new_trip_start_date": "2026-07-01"},
+    {"operation": "update_trip_end_date", "new_trip_end_date": "2026-07-10"},
+]
+
+def timed(function, repeat: int) -> float:
+    """Median wall time of function in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Decoding cost of editor edits and size of the editor schema")
+    parser.add_argument("--edits", type=int, default=50, help="Edits per batch")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed batches per variant")
+    args = parser.parse_args()
+
+    edits = [SAMPLE_EDITS[i % len(SAMPLE_EDITS)] for i in range(args.edits)]
+    edits_json = json.dumps(edits)
+
+    # The same models as a plain Union, which pydantic decodes by trying the members in turn
+    members = get_args(get_args(edits_union)[0])
+    plain = TypeAdapter(List[Union[members]])
+    plain_edit = TypeAdapter(Union[members])
+    discriminated_edit = TypeAdapter(edits_union)
+
+    variants = [
+        ("plain union, batch", lambda: plain.validate_python(edits)),
+        ("plain union, one by one", lambda: [plain_edit.validate_python(edit) for edit in edits]),
+        ("discriminated, batch", lambda: validate_edits(edits)),
+        ("discriminated, one by one", lambda: [discriminated_edit.validate_python(edit) for edit in edits]),
+        ("discriminated, batch from JSON", lambda: validate_edits(edits_json)),
+    ]
+    print(f"validating {args.edits} edits (median of {args.repeat})")
+    for name, function in variants:
+        print(f"  {name:<32} {timed(function, args.repeat):8.3f}ms")
+
+    print("\nEditorResponse schema")
+    print(f"  {'openai (strict)':<32} {len(json.dumps(convert_to_openai_function(EditorResponse, strict=True))):8}B")
+    print(f"  {'anthropic':<32} {len(json.dumps(convert_to_anthropic_tool(EditorResponse))):8}B")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import time
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+DEFAULT_TEXT = "The traveler is planning a trip and has been refining the packing list."
+
+def prompt_text(messages: List[BaseMessage]) -> str:
+    parts = []
+    for message in messages:
+        if isinstance(message.content, str):
+            parts.append(message.content)
+        else:
+            parts.extend(block.get("text", "") for block in message.content if isinstance(block, dict))
+    return "\n".join(parts)
+
+class Script:
+    """
+    The scripted model responses for one conversation turn, queued per schema name.
+    Entries may carry a "match" string; they are only used for prompts that contain it.
+    Fan-out responses (ListPlanResponse, CategoryItemsResponse) and the template personalisation
+    (ListPersonalizationResponse, with no edits) are derived from a scripted ListGeneratorResponse when the turn
+    does not script them, so one recording covers every generator mode.
+    """
+    def __init__(self):
+        self.queues: Dict[str, List[dict]] = defaultdict(list)
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def load(self, entries: List[dict]):
+        self.queues.clear()
+        for entry in entries:
+            self.queues[entry["schema"]].append(entry)
+
+    def next(self, schema_name: str, prompt: str) -> dict:
+        self.calls[schema_name] += 1
+        queue = self.queues[schema_name]
+        for index, entry in enumerate(queue):
+            if entry.get("match") is None or entry["match"] in prompt:
+                return queue.pop(index)["output"]
+
+        derived = self.derive(schema_name, prompt)
+        if derived is None:
+            raise LookupError(f"No scripted {schema_name} response left for this turn")
+        return derived
+
+    def derive(self, schema_name: str, prompt: str) -> Optional[dict]:
+        generated = self.queues["ListGeneratorResponse"]
+        if not generated:
+            return None
+        output = generated[0]["output"]
+        if schema_name == "ListPlanResponse":
+            return {
+                "categories": [c["name"] for c in output["categories"]],
+                "uncategorized_items": output["uncategorized_items"],
+                "chat_response": output["chat_response"]
+            }
+        if schema_name == "ListPersonalizationResponse":
+            return {"edits": [], "chat_response": output["chat_response"]}
+        if schema_name == "CategoryItemsResponse":
+            for category in output["categories"]:
+                if f"CATEGORY TO FILL: {category['name']}" in prompt:
+                    return {"items": category["items"]}
+        return None
+
+    def next_text(self) -> str:
+        self.calls["text"] += 1
+        queue = self.queues["text"]
+        return queue.pop(0)["output"] if queue else DEFAULT_TEXT
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A deterministic chat model that replays a Script instead of calling a provider.
+    Every call waits for the configured latency, so concurrency and streaming paths behave as they would live.
+    """
+    script: Any
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.script.next_text()))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.script.next_text()))])
+
+    def with_structured_output(self, schema, **kwargs):
+        async def respond(messages: List[BaseMessage]):
+            await asyncio.sleep(self.latency)
+            return schema.model_validate(self.script.next(schema.__name__, prompt_text(messages)))
+
+        return RunnableLambda(respond, name=schema.__name__)
@@ -0,0 +1,131 @@
+import time
+import statistics
+from collections import defaultdict
+from functools import wraps
+from typing import Any, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.channels.binop import BinaryOperatorAggregate
+from langgraph.checkpoint.memory import InMemorySaver
+
+class Stats:
+    """Collects durations (in seconds) and sizes (in bytes) per section and label."""
+    def __init__(self):
+        self.durations: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self.sizes: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+
+    def add(self, section: str, label: str, duration: float):
+        self.durations[section][label].append(duration)
+
+    def add_size(self, section: str, label: str, size: int):
+        self.sizes[section][label].append(size)
+
+    def timed(self, section: str, label: str, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(section, label, time.perf_counter() - start)
+        return wrapper
+
+    def summary(self) -> Dict[str, Any]:
+        result = {}
+        for section, labels in self.durations.items():
+            result[section] = {
+                label: {
+                    "count": len(values),
+                    "total_ms": sum(values) * 1000,
+                    "mean_ms": statistics.fmean(values) * 1000,
+                    "p50_ms": statistics.median(values) * 1000,
+                    "max_ms": max(values) * 1000,
+                }
+                for label, values in sorted(labels.items())
+            }
+        for section, labels in self.sizes.items():
+            result[section] = {
+                label: {"count": len(values), "total_bytes": sum(values), "max_bytes": max(values)}
+                for label, values in sorted(labels.items())
+            }
+        return result
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Times every graph node run, including nodes of subgraphs.
+    Nodes are labelled by their path in the graph (e.g. "creator/list_generator").
+    """
+    run_inline = True
+
+    def __init__(self, stats: Stats):
+        self.stats = stats
+        self.started: Dict[Any, tuple] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if node is None or node.startswith("__") or kwargs.get("name") != node:
+            return
+        # The node's namespace ends with the node itself, e.g. "creator:<task id>|chat:<task id>"
+        namespace = metadata.get("langgraph_checkpoint_ns", node)
+        label = "/".join(segment.split(":")[0] for segment in namespace.split("|"))
+        self.started[run_id] = (label, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.finish(run_id)
+
+    def finish(self, run_id):
+        if run_id in self.started:
+            label, start = self.started.pop(run_id)
+            self.stats.add("nodes", label, time.perf_counter() - start)
+
+class TimedSerializer:
+    """Wraps a checkpoint serializer to record how long writes take and how many bytes they produce."""
+    def __init__(self, serde, stats: Stats):
+        self.serde = serde
+        self.stats = stats
+
+    def dumps_typed(self, obj):
+        start = time.perf_counter()
+        type_, data = self.serde.dumps_typed(obj)
+        self.stats.add("checkpoint", "dumps_typed", time.perf_counter() - start)
+        self.stats.add_size("checkpoint_bytes", "dumps_typed", len(data))
+        return type_, data
+
+    def loads_typed(self, data):
+        start = time.perf_counter()
+        try:
+            return self.serde.loads_typed(data)
+        finally:
+            self.stats.add("checkpoint", "loads_typed", time.perf_counter() - start)
+
+class RecordingSaver(InMemorySaver):
+    """
+    In-memory checkpointer that records the bytes of every channel value it stores, labelled graph/channel.
+    Only channels whose version changed are stored, as with the Postgres checkpointer, so this is the write volume.
+    """
+    def __init__(self, stats: Stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.written = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        namespace = config["configurable"]["checkpoint_ns"]
+        graph = namespace.split(":")[0] if namespace else "assistant"
+        for channel, version in new_versions.items():
+            size = len(self.blobs[(thread_id, namespace, channel, version)][1])
+            self.stats.add_size("checkpoint_writes", f"{graph}/{channel}", size)
+            self.written += size
+        return result
+
+def instrument_reducers(graphs: Dict[str, Any], stats: Stats):
+    """Wraps the reducer of every aggregated channel so each application is timed, labelled graph/channel."""
+    for graph_name, graph in graphs.items():
+        for channel_name, channel in graph.channels.items():
+            if isinstance(channel, BinaryOperatorAggregate):
+                channel.operator = stats.timed("reducers", f"{graph_name}/{channel_name}", channel.operator)
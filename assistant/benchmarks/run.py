@@ -0,0 +1,153 @@
+"""
+Offline benchmark for the assistant graph.
+
+Replays recorded conversations through graphs/assistant/graph.py with a scripted chat model in place of the
+provider, so it needs no network or API key, and reports where the time goes outside the model calls:
+per-node wall time, reducer time, apply_edits time, state size, checkpoint serialisation cost and the bytes
+checkpointed per channel and per turn.
+
+Usage (from the assistant directory):
+    python -m benchmarks.run
+    python -m benchmarks.run --iterations 20 --latency 0.05 --mode fan_out
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.25
+"""
+import os
+
+# The scripted model replaces every provider call, so any values satisfy Config
+os.environ.setdefault("ASSISTANT_MODEL_PROVIDER", "openai")
+os.environ.setdefault("ASSISTANT_MODEL_NAME", "scripted")
+os.environ.setdefault("ASSISTANT_MODEL_API_KEY", "offline")
+os.environ["ASSISTANT_LIST_CACHE_REDIS_URI"] = ""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+import src.utils.llm as llm
+import src.graphs.editor.nodes.editor as editor_module
+import src.graphs.editor.nodes.quick_edit as quick_edit_module
+from src.utils.config import Config
+from src.utils.list_cache import list_cache
+from src.graphs.assistant.graph import workflow
+from src.graphs.creator.graph import creator_graph
+from benchmarks.fake_llm import Script, ScriptedChatModel
+from benchmarks.profiler import Stats, NodeTimer, TimedSerializer, RecordingSaver, instrument_reducers
+
+CONVERSATIONS_DIR = Path(__file__).parent / "conversations"
+
+def load_conversations(names):
+    paths = sorted(CONVERSATIONS_DIR.glob("*.json"))
+    if names:
+        paths = [p for p in paths if p.stem in names]
+    return [json.loads(p.read_text()) for p in paths]
+
+def setup(stats: Stats, latency: float):
+    """Installs the scripted model for every role and wraps the measured functions. Returns the script and graph."""
+    script = Script()
+    fake = ScriptedChatModel(script=script, latency=latency)
+    llm.structured_models.clear()
+    for model_name in set(Config.MODEL_NAMES.values()):
+        llm.models[model_name] = fake
+
+    apply_edits = editor_module.apply_edits
+    editor_module.apply_edits = stats.timed("apply_edits", "editor", apply_edits)
+    quick_edit_module.apply_edits = stats.timed("apply_edits", "quick_edit", apply_edits)
+
+    saver = RecordingSaver(stats, serde=TimedSerializer(JsonPlusSerializer(), stats))
+    graph = workflow.compile(checkpointer=saver)
+    instrument_reducers({"assistant": graph, "creator": creator_graph}, stats)
+    return script, graph
+
+async def run_conversation(graph, script: Script, conversation: dict, iteration: int, stats: Stats):
+    name = conversation["name"]
+    config = {"configurable": {"thread_id": f"{name}-{iteration}"}, "callbacks": [NodeTimer(stats)]}
+    state_serde = JsonPlusSerializer()
+
+    # The opening call with no messages only produces the greeting, as it does when the client starts a thread
+    script.load([])
+    await graph.ainvoke(conversation.get("state", {}), config)
+
+    for turn in conversation["turns"]:
+        script.load(turn.get("model", []))
+        written = graph.checkpointer.written
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [HumanMessage(content=turn["user"])]}, config)
+        stats.add("turns", name, time.perf_counter() - start)
+        stats.add_size("checkpoint_writes_per_turn", name, graph.checkpointer.written - written)
+
+        values = (await graph.aget_state(config)).values
+        stats.add_size("state_bytes", name, len(state_serde.dumps_typed(values)[1]))
+
+async def run(conversations, iterations: int, latency: float):
+    """Replays every conversation iterations times. Returns the collected stats and the model calls per schema."""
+    stats = Stats()
+    script, graph = setup(stats, latency)
+    for iteration in range(iterations):
+        for conversation in conversations:
+            # Every iteration should generate its list rather than hit the cache filled by the previous one
+            list_cache.local.clear()
+            await run_conversation(graph, script, conversation, iteration, stats)
+    return stats, dict(script.calls)
+
+def print_report(summary: dict):
+    for section, labels in summary.items():
+        print(f"\n{section}")
+        for label, row in labels.items():
+            if "mean_ms" in row:
+                print(
+                    f"  {label:<40} n={row['count']:<5} total={row['total_ms']:9.2f}ms "
+                    f"mean={row['mean_ms']:8.3f}ms p50={row['p50_ms']:8.3f}ms max={row['max_ms']:8.3f}ms"
+                )
+            else:
+                print(f"  {label:<40} n={row['count']:<5} total={row['total_bytes']:>10}B max={row['max_bytes']:>9}B")
+
+def find_regressions(summary: dict, baseline: dict, tolerance: float, floor_ms: float = 0.05) -> list:
+    """Returns the timed labels whose mean grew by more than tolerance (and by more than floor_ms) over the baseline."""
+    regressions = []
+    for section, labels in summary.items():
+        for label, row in labels.items():
+            previous = baseline.get(section, {}).get(label)
+            if not previous or "mean_ms" not in row:
+                continue
+            if row["mean_ms"] > previous["mean_ms"] * (1 + tolerance) and row["mean_ms"] - previous["mean_ms"] > floor_ms:
+                regressions.append(f"{section}/{label}: {previous['mean_ms']:.3f}ms -> {row['mean_ms']:.3f}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the assistant graph with a scripted model")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per model call")
+    parser.add_argument("--mode", choices=["single", "fan_out"], default=Config.LIST_GENERATOR_MODE)
+    parser.add_argument("--conversation", action="append", help="Only replay these recordings (file stems)")
+    parser.add_argument("--output", help="Write the summary as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a summary written by --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+
+    Config.LIST_GENERATOR_MODE = args.mode
+    # The recorded edits refer to the scripted generated list, which a catalogue draft would replace
+    Config.LIST_TEMPLATES = False
+    conversations = load_conversations(args.conversation)
+    stats, model_calls = asyncio.run(run(conversations, args.iterations, args.latency))
+    summary = stats.summary()
+    print_report(summary)
+    print("\nmodel calls\n  " + "\n  ".join(f"{name:<40} n={count}" for name, count in sorted(model_calls.items())))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2))
+
+    if args.baseline:
+        regressions = find_regressions(summary, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
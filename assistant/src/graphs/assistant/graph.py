@@ -1,54 +1,49 @@
 from langgraph.graph import StateGraph, START, END
 
 from src.graphs.creator.graph import creator_graph
-from src.graphs.editor.graph import editor_graph
+from src.graphs.editor.graph import add_editor
 from src.graphs.assistant.nodes.greeting import greeting_node
 from src.graphs.assistant.nodes.handoff import handoff_to_editor_node
+from src.graphs.assistant.nodes.report import report_node
+from src.graphs.assistant.nodes.load_list import load_list_node
+from src.graphs.assistant.nodes.save_list import save_list_node
 from src.graphs.assistant.routing.route_entry_point import route_entry_point
 from src.graphs.assistant.routing.route_after_creator import route_after_creator
 from src.models.state import MainState
-
-async def call_editor_node(state: MainState):
-    res = await editor_graph.ainvoke({
-        "messages": state.messages,
-        "trip": state.trip,
-        "categories": state.categories,
-        "uncategorized_items": state.uncategorized_items,
-        "retry_count": 0
-    })
-    return {
-        "messages": res["messages"],
-        "trip": res["trip"],
-        "categories": res["categories"],
-        "uncategorized_items": res["uncategorized_items"]
-    }
+from src.utils.metrics import run_metrics
 
 workflow = StateGraph(MainState)
 workflow.add_node("creator", creator_graph)
-workflow.add_node("editor", call_editor_node)
 workflow.add_node("greeting", greeting_node)
 workflow.add_node("handoff", handoff_to_editor_node)
+workflow.add_node("load_list", load_list_node)
+workflow.add_node("save_list", save_list_node)
+workflow.add_node("report", report_node)
+add_editor(workflow, end="save_list")
 
 
+workflow.add_edge(START, "load_list")
 workflow.add_conditional_edges(
-    START,
+    "load_list",
     route_entry_point,
     {
         "greeting": "greeting",
         "creator": "creator",
-        "editor": "editor",
+        "editor": "quick_edit",
     }
 )
-workflow.add_edge("greeting", END)
-workflow.add_edge("editor", END)
+workflow.add_edge("greeting", "save_list")
 workflow.add_conditional_edges(
     "creator",
     route_after_creator,
     {
         "handoff": "handoff",
-        END: END
+        END: "save_list"
     }
 )
-workflow.add_edge("handoff", END)
+workflow.add_edge("handoff", "save_list")
+workflow.add_edge("save_list", "report")
+workflow.add_edge("report", END)
 
-graph = workflow.compile()
\ No newline at end of file
+# Every run reports its node timings, model latency and token usage
+graph = workflow.compile().with_config(callbacks=[run_metrics])
\ No newline at end of file
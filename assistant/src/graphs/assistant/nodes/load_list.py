@@ -0,0 +1,26 @@
+from src.models.state import MainState
+from src.models.packing_list import PackingList
+from src.utils.edit_log import materialize_or_snapshot
+
+async def load_list_node(state: MainState):
+    """
+    Rebuilds the trip and list from the last snapshot and the edits since, unless the request sent them.
+    A list sent with the request becomes the snapshot right away, before any node of the run edits it,
+    so the checkpointed log always replays onto the list its edits were made against, even if the run
+    stops before the save node.
+    """
+    missing = [key for key in ("trip", "categories", "uncategorized_items") if getattr(state, key) is None]
+    if len(missing) == 3:
+        current = materialize_or_snapshot(state.list_snapshot, state.list_edits)
+        return {key: getattr(current, key) for key in missing}
+
+    current = materialize_or_snapshot(state.list_snapshot, state.list_edits) if missing else PackingList()
+    sent = PackingList(**{
+        key: getattr(current, key) if key in missing else getattr(state, key)
+        for key in ("trip", "categories", "uncategorized_items")
+    })
+    return {
+        **{key: getattr(sent, key) for key in missing},
+        "list_snapshot": sent.model_dump(mode="json"),
+        "list_edits": []
+    }
\ No newline at end of file
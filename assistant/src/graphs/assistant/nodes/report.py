@@ -0,0 +1,14 @@
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+
+from src.utils.metrics import run_metrics
+from src.models.state import MainState
+
+async def report_node(state: MainState, config: RunnableConfig):
+    """Writes the metrics summary of the current run to the custom stream, so the backend can forward it."""
+    callbacks = config.get("callbacks")
+    parent_run_id = getattr(callbacks, "parent_run_id", None)
+    summary = run_metrics.summary(run_metrics.roots.get(parent_run_id, parent_run_id))
+    if summary is not None:
+        get_stream_writer()({"run_metrics": summary})
+    return {}
\ No newline at end of file
@@ -0,0 +1,21 @@
+from src.models.state import MainState
+from src.models.packing_list import PackingList
+from src.utils.config import Config
+from src.utils.edit_log import materialize
+
+async def save_list_node(state: MainState):
+    """
+    Makes the checkpointed snapshot and edit log describe the list as it is at the end of the run.
+    The edit and quick edit nodes log their edits, so after an edit turn replaying the log already gives the current list
+    and nothing but the new edits is written. Anything else that changed the list (generating it, the creator filling in
+    the trip, changes the user made in the app) is saved as a new snapshot, as is the list once the log is long enough.
+    """
+    current = PackingList(trip=state.trip, categories=state.categories, uncategorized_items=state.uncategorized_items)
+    try:
+        logged = materialize(state.list_snapshot, state.list_edits)
+    except ValueError:
+        logged = None
+
+    if logged == current and len(state.list_edits) < Config.LIST_SNAPSHOT_EVERY:
+        return {}
+    return {"list_snapshot": current.model_dump(mode="json"), "list_edits": []}
\ No newline at end of file
@@ -1,21 +1,36 @@
 from langgraph.graph import StateGraph, START, END
 from src.graphs.creator.nodes.chat import chat_node
 from src.graphs.creator.nodes.list_generator import list_generator_node
+from src.graphs.creator.nodes.list_planner import list_planner_node
+from src.graphs.creator.nodes.category_generator import category_generator_node
+from src.graphs.creator.nodes.list_merger import list_merger_node
 from src.graphs.creator.routing.route_after_chat import route_after_chat
+from src.graphs.creator.routing.route_after_planner import route_after_planner
+from src.graphs.shared.nodes.history import create_history_node
+from src.utils.config import Config
 from src.models.state import MainState
 
 workflow = StateGraph(MainState)
+workflow.add_node("history", create_history_node(Config.CREATOR_HISTORY_TURNS))
 workflow.add_node("chat", chat_node)
 workflow.add_node("list_generator", list_generator_node)
-workflow.add_edge(START, "chat")
+workflow.add_node("list_planner", list_planner_node)
+workflow.add_node("category_generator", category_generator_node)
+workflow.add_node("list_merger", list_merger_node)
+workflow.add_edge(START, "history")
+workflow.add_edge("history", "chat")
 workflow.add_conditional_edges(
     "chat",
     route_after_chat,
     {
         "list_generator": "list_generator",
+        "list_planner": "list_planner",
         END: END
     }
 )
 workflow.add_edge("list_generator", END)
+workflow.add_conditional_edges("list_planner", route_after_planner, ["category_generator", END])
+workflow.add_edge("category_generator", "list_merger")
+workflow.add_edge("list_merger", END)
 
 creator_graph = workflow.compile()
\ No newline at end of file
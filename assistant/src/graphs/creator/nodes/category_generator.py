@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from pydantic import BaseModel, Field
+from typing import List
+from langchain_core.messages import BaseMessage
+from langgraph.config import get_stream_writer
+
+from src.utils.llm import get_structured_llm, build_system_message
+from src.utils.config import Config
+from src.models.category import Category
+from src.models.item import Item
+
+logger = logging.getLogger(__name__)
+
+# Attempts per category before it is left out of the list
+CATEGORY_ATTEMPTS = 2
+
+class CategoryTask(BaseModel):
+    category_name: str
+    planned_categories: List[str]
+    trip_prompt: str
+    messages: List[BaseMessage] = []
+
+class CategoryItemsResponse(BaseModel):
+    items: List[Item] = Field(description="The items to pack in this category")
+
+# Caps the number of category calls in flight at once, across all runs on this worker
+semaphore = asyncio.Semaphore(Config.LIST_GENERATOR_MAX_CONCURRENCY)
+
+# Kept byte-for-byte identical across categories so the provider can cache it as a prompt prefix
+SYSTEM_PROMPT = """
+    You are the "PackPal" Master Organizer. 
+    Fill ONE category of a highly personalized packing list for the trip described at the end of these instructions.
+    The other categories are filled separately, so never include items that belong in them.
+    
+    GUIDELINES:
+    1. **Personalization**: If the description mentions hiking, include gear like boots or poles. If it's a city trip, focus on versatile layers.
+    2. **Quantities**: Base quantities on the trip's duration in days.
+    3. **Notes**: Add helpful tips in the 'notes' field (e.g., "Pack a universal adapter for UK outlets").
+    """
+
+async def category_generator_node(task: CategoryTask):
+    """
+    Fills one planned category. A category whose call keeps failing is left out rather than failing the
+    whole fan-out, so the categories generated next to it still make up the list.
+    """
+    category_prompt = f"""{task.trip_prompt}
+    CATEGORY TO FILL: {task.category_name}
+    OTHER CATEGORIES: {', '.join(name for name in task.planned_categories if name != task.category_name)}
+    """
+
+    response = None
+    for attempt in range(CATEGORY_ATTEMPTS):
+        try:
+            async with semaphore:
+                response = await get_structured_llm("strong", CategoryItemsResponse).ainvoke([build_system_message(SYSTEM_PROMPT, category_prompt), *task.messages])
+            break
+        except Exception:
+            logger.warning("Generating category %r failed (attempt %d of %d)", task.category_name, attempt + 1, CATEGORY_ATTEMPTS, exc_info=True)
+    if response is None:
+        return {}
+
+    category = Category(name=task.category_name, items=response.items)
+    for item in category.items:
+        item.id = None
+
+    get_stream_writer()({"category": category.model_dump()})
+
+    return {
+        "generated_categories": {"type": "add", "category": category}
+    }
@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, Any
 from datetime import date, datetime
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage
 
-from src.utils.llm import get_llm
+from src.utils.llm import get_structured_llm, build_system_message
+from src.utils.history import recent_messages, summary_prompt
 from src.models.state import MainState
 
 class ChatResponse(BaseModel):
@@ -15,20 +16,10 @@ class ChatResponse(BaseModel):
     start_date: Optional[str] = Field(None, description="The start date of the trip as an ISO date string YYYY-MM-DD")
     end_date: Optional[str] = Field(None, description="The end date of the trip as an ISO date string YYYY-MM-DD")
 
-llm = get_llm().with_structured_output(ChatResponse, strict=True)
-
-async def chat_node(state: MainState):
-    current_trip = state.trip
-    missing = [field for field, value in current_trip.dict().items() 
-               if value is None and field != "id"]
-    today = date.today().strftime("%A, %B %d, %Y")
-    
-    system_prompt = f"""
+# Kept byte-for-byte identical across turns so the provider can cache it as a prompt prefix
+SYSTEM_PROMPT = """
 You are "PackPal," a creative and helpful Travel Consultant. Your goal is to help the user plan a trip so you can eventually create a perfect packing list for them.
 
-TODAY'S DATE: {today}
-CURRENT TRIP DATA: {current_trip.json()}
-
 YOUR PHILOSOPHY:
 - Be warm, conversational, and helpful. Do not sound like a form-filler.
 - If the user provides information, acknowledge it enthusiastically.
@@ -48,13 +39,23 @@ INSTRUCTIONS:
 CRITICAL FORMATTING RULE:
 You must provide dates in the string format "YYYY-MM-DD".
 NEVER use a list like [2026, 2, 22] for dates. This will cause a system crash.
+"""
 
+async def chat_node(state: MainState):
+    current_trip = state.trip
+    missing = [field for field, value in current_trip.dict().items() 
+               if value is None and field != "id"]
+    today = date.today().strftime("%A, %B %d, %Y")
+    
+    context_prompt = f"""
+TODAY'S DATE: {today}
+CURRENT TRIP DATA: {current_trip.json()}
 MISSING FIELDS TO FOCUS ON: {', '.join(missing)}
 """
     
-    response = await llm.ainvoke([
-        SystemMessage(content=system_prompt),
-        *state.messages
+    response = await get_structured_llm("fast", ChatResponse).ainvoke([
+        build_system_message(SYSTEM_PROMPT, context_prompt + summary_prompt(state)),
+        *recent_messages(state)
     ])
     
     updated_trip = current_trip.model_copy(update=response.model_dump(exclude_none=True))
@@ -1,56 +1,250 @@
+import logging
 from pydantic import BaseModel, Field
 from typing import Optional, Any, List
 from datetime import date, datetime
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.config import get_stream_writer
 
-from src.utils.llm import get_llm
+from src.utils.llm import get_structured_llm, build_system_message, parse_partial_output
+from src.utils.history import recent_messages, summary_prompt
+from src.utils.list_cache import list_cache, trip_profile, is_personal, rescale_quantity
+from src.utils.catalogue import catalogue, draft_list
+from src.utils.apply_edits import apply_edits
+from src.utils.config import Config
 from src.models.state import MainState
 from src.models.category import Category
 from src.models.item import Item
+from src.models.trip import Trip
+from src.models.edits import edits_union
+from src.models.packing_list import PackingList
+
+logger = logging.getLogger(__name__)
 
 class ListGeneratorResponse(BaseModel):
     categories: List[Category]
     uncategorized_items: List[Item]
     chat_response: str = Field(description="A warm, excited message explaining why these items were chosen.")
 
-llm = get_llm().with_structured_output(ListGeneratorResponse, strict=True)
+class ListPersonalizationResponse(BaseModel):
+    edits: List[edits_union] = Field(default_factory=list, description="List of sequential edits that tailor the draft list to this trip")
+    chat_response: str = Field(description="A warm, excited message explaining why these items were chosen.")
 
-async def list_generator_node(state: MainState):
-    trip = state.trip
-    if isinstance(trip.start_date, str):
-        trip.start_date = datetime.strptime(trip.start_date, "%Y-%m-%d")
-    if isinstance(trip.end_date, str):
-        trip.end_date = datetime.strptime(trip.end_date, "%Y-%m-%d")
-    duration = (trip.end_date - trip.start_date).days
-    
-    system_prompt = f"""
+# Kept byte-for-byte identical across trips so the provider can cache it as a prompt prefix
+SYSTEM_PROMPT = """
     You are the "PackPal" Master Organizer. 
-    Create a highly personalized packing list for the following trip:
-    
-    TRIP: {trip.name}
-    DESCRIPTION: {trip.description}
-    DATES: {trip.start_date} to {trip.end_date} ({duration} days)
+    Create a highly personalized packing list for the trip described at the end of these instructions.
     
     GUIDELINES:
     1. **Personalization**: If the description mentions hiking, include gear like boots or poles. If it's a city trip, focus on versatile layers.
-    2. **Quantities**: Base quantities on the {duration} day duration.
+    2. **Quantities**: Base quantities on the trip's duration in days.
     3. **Categorization**: Group items logically (e.g., "Clothing", "Electronics", "Toiletries", "Activity Specific").
     4. **Notes**: Add helpful tips in the 'notes' field (e.g., "Pack a universal adapter for UK outlets").
     5. **Tone**: Be enthusiastic in the 'chat_response'.
     """
+
+# Kept byte-for-byte identical across trips so the provider can cache it as a prompt prefix
+PERSONALIZE_PROMPT = """
+    You are the "PackPal" Master Organizer. 
+    A draft packing list for the trip described at the end of these instructions was built from a standard template.
+    Tailor it to this trip with as few edits as needed; never rebuild it.
     
-    response = await llm.ainvoke([SystemMessage(content=system_prompt), *state.messages])
+    GUIDELINES:
+    1. **Personalization**: Add what the destination, season and activities call for, and remove what this trip will not need.
+    2. **Quantities**: Only change quantities that do not fit the trip's duration in days.
+    3. **Notes**: Add helpful tips for this destination in the 'notes' field (e.g., "Pack a universal adapter for UK outlets").
+    4. **Scope**: Only edit categories and items, never the trip itself. Use the exact category and item names of the draft.
+    5. **Tone**: Be enthusiastic in the 'chat_response'.
+    """
+
+def clear_ids(category: Category) -> Category:
+    category.id = None
+    for item in category.items:
+        item.id = None
+    return category
+
+async def stream_list(messages, writer) -> ListGeneratorResponse:
+    """
+    Runs the generator call while streaming, writing each category to the custom stream as soon as it is complete.
+    A category is complete once the model has started the next category or the next field.
+    If the run ends without reporting its output, the list is generated again in a single call, and the streamed
+    categories it no longer has are taken back.
+    """
+    root_run_id = None
+    streamed = None
+    response = None
+    emitted = []
+
+    async for event in get_structured_llm("strong", ListGeneratorResponse).astream_events(messages, version="v2"):
+        if root_run_id is None:
+            root_run_id = event["run_id"]
+
+        if event["event"] == "on_chat_model_stream":
+            streamed = event["data"]["chunk"] if streamed is None else streamed + event["data"]["chunk"]
+            partial = parse_partial_output(streamed)
+            categories = partial.get("categories") or []
+            complete = len(categories) if list(partial)[-1:] != ["categories"] else len(categories) - 1
+            for category in categories[len(emitted):complete]:
+                category = clear_ids(Category.model_validate(category))
+                writer({"category": category.model_dump()})
+                emitted.append(category.name)
+        elif event["event"] == "on_chain_end" and event["run_id"] == root_run_id:
+            response = event["data"]["output"]
+
+    if response is None:
+        logger.warning("The list generator stream ended without an output, generating the list in one call")
+        response = await get_structured_llm("strong", ListGeneratorResponse).ainvoke(messages)
+        kept = {category.name for category in response.categories}
+        for name in emitted:
+            if name not in kept:
+                writer({"removed_category": name})
+        emitted = []
+
+    # Providers that do not stream structured output only produce the final response
+    for category in response.categories[len(emitted):]:
+        writer({"category": clear_ids(category.model_copy(deep=True)).model_dump()})
+    return response
+
+def trip_duration(trip: Trip) -> int:
+    if isinstance(trip.start_date, str):
+        trip.start_date = datetime.strptime(trip.start_date, "%Y-%m-%d")
+    if isinstance(trip.end_date, str):
+        trip.end_date = datetime.strptime(trip.end_date, "%Y-%m-%d")
+    return (trip.end_date - trip.start_date).days
+
+def describe_trip(trip: Trip, duration: int) -> str:
+    return f"""
+    TRIP: {trip.name}
+    DESCRIPTION: {trip.description}
+    DATES: {trip.start_date} to {trip.end_date} ({duration} days)
+    """
 
+def list_profile(state: MainState, trip: Trip, duration: int) -> Optional[tuple]:
+    """
+    Returns the list cache profile of the trip, or None if its list must not be shared with other users:
+    when the conversation has context the profile does not capture, the list is written for this user alone.
+    """
+    if state.history_summary:
+        return None
+    texts = [trip.description, *(m.content for m in recent_messages(state) if isinstance(m, HumanMessage))]
+    if is_personal(texts):
+        return None
+    return trip_profile(trip.name, trip.description, duration)
+
+async def cache_list(profile: Optional[tuple], duration: int, categories: List[Category], uncategorized_items: List[Item]):
+    """Caches the categories and items of a generated list; notes and the chat response are written for the conversation, so they are left out."""
+    await list_cache.set(profile, {
+        "duration": duration,
+        "categories": [c.model_dump(exclude={"id": True, "items": {"__all__": {"id", "notes"}}}) for c in categories],
+        "uncategorized_items": [i.model_dump(exclude={"id", "notes"}) for i in uncategorized_items]
+    })
+
+def ready_chat_response(trip: Trip, duration: int) -> str:
+    return (
+        f"Your packing list for {trip.name} is ready! I've sized everything for {duration} days. "
+        "Take a look, and let me know if you'd like to add, remove or change anything."
+    )
+
+async def get_cached_list(profile: Optional[tuple], trip: Trip, duration: int, writer) -> Optional[ListGeneratorResponse]:
+    """Returns a cached list for a similar trip with quantities rescaled to this trip, emitting its categories."""
+    cached = await list_cache.get(profile)
+    if not cached:
+        return None
+
+    response = ListGeneratorResponse(
+        categories=cached["categories"],
+        uncategorized_items=cached["uncategorized_items"],
+        chat_response=ready_chat_response(trip, duration)
+    )
+    for item in [*response.uncategorized_items, *(i for c in response.categories for i in c.items)]:
+        item.quantity = rescale_quantity(item.quantity, cached["duration"], duration)
     for category in response.categories:
-        category.id = None
-        for item in category.items:
-            item.id = None
+        writer({"category": category.model_dump()})
+    return response
+
+def describe_draft(draft: PackingList) -> str:
+    lines = [f"    {c.name}: " + ", ".join(f"{i.name} ({i.quantity})" for i in c.items) for c in draft.categories]
+    lines.append("    Uncategorized: " + ", ".join(f"{i.name} ({i.quantity})" for i in draft.uncategorized_items))
+    return "\n    DRAFT LIST:\n" + "\n".join(lines) + "\n"
+
+def apply_valid_edits(draft: PackingList, edits: List[edits_union]) -> PackingList:
+    """Applies the personalising edits one by one, dropping trip edits and any edit that does not fit the draft."""
+    for edit in edits:
+        if edit.operation.startswith("update_trip"):
+            continue
+        try:
+            trip, categories, uncategorized_items = apply_edits(draft, [edit])
+        except ValueError:
+            continue
+        draft = PackingList(trip=trip, categories=categories, uncategorized_items=uncategorized_items)
+    return draft
+
+async def get_template_list(state: MainState, profile: Optional[tuple], trip: Trip, duration: int, writer) -> Optional[ListGeneratorResponse]:
+    """
+    Builds the list from the packing catalogue when a template matches the trip, and caches it like a generated list.
+    The draft's categories are emitted right away; a much smaller call than generating the list then tailors the
+    draft with a few edits, and the categories it changed are emitted again, and those it removed or renamed taken back.
+    If that call fails, the draft is the list.
+    """
+    if not Config.LIST_TEMPLATES:
+        return None
+    draft = draft_list(catalogue, trip, duration)
+    if draft is None:
+        return None
+
+    for category in draft.categories:
+        writer({"category": category.model_dump()})
+
+    try:
+        response = await get_structured_llm("fast", ListPersonalizationResponse).ainvoke([build_system_message(PERSONALIZE_PROMPT, describe_trip(trip, duration) + describe_draft(draft) + summary_prompt(state)), *recent_messages(state)])
+    except Exception:
+        # The draft is already a complete list for the trip, and already on the client
+        logger.warning("Personalizing the template list failed, keeping the draft", exc_info=True)
+        return ListGeneratorResponse(
+            categories=draft.categories,
+            uncategorized_items=draft.uncategorized_items,
+            chat_response=ready_chat_response(trip, duration)
+        )
+    personalized = apply_valid_edits(draft, response.edits)
+
+    drafted = {category.name: category for category in draft.categories}
+    for category in personalized.categories:
+        if drafted.get(category.name) != category:
+            writer({"category": category.model_dump()})
+    kept = {category.name for category in personalized.categories}
+    for category in draft.categories:
+        if category.name not in kept:
+            writer({"removed_category": category.name})
+
+    result = ListGeneratorResponse(
+        categories=personalized.categories,
+        uncategorized_items=personalized.uncategorized_items,
+        chat_response=response.chat_response
+    )
+    await cache_list(profile, duration, result.categories, result.uncategorized_items)
+    return result
+
+async def list_generator_node(state: MainState):
+    writer = get_stream_writer()
+    trip = state.trip
+    duration = trip_duration(trip)
+    profile = list_profile(state, trip, duration)
     
-    for item in response.uncategorized_items:
-        item.id = None
+    response = await get_cached_list(profile, trip, duration, writer)
+    if response is None:
+        response = await get_template_list(state, profile, trip, duration, writer)
+    if response is None:
+        response = await stream_list([build_system_message(SYSTEM_PROMPT, describe_trip(trip, duration) + summary_prompt(state)), *recent_messages(state)], writer)
+
+        for category in response.categories:
+            clear_ids(category)
+        
+        for item in response.uncategorized_items:
+            item.id = None
+
+        await cache_list(profile, duration, response.categories, response.uncategorized_items)
     
     return {
         "categories": response.categories,
         "uncategorized_items": response.uncategorized_items,
         "messages": [AIMessage(content=response.chat_response)]
-    }
\ No newline at end of file
+    }
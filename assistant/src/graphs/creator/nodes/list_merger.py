@@ -0,0 +1,49 @@
+from typing import List, Set
+
+from src.graphs.creator.nodes.list_generator import trip_duration, list_profile, cache_list, list_generator_node
+from src.models.state import MainState
+from src.models.item import Item
+
+def dedupe_items(items: List[Item], seen: Set[str]) -> List[Item]:
+    """Drops items whose name (case-insensitive) is already in seen, adding the kept names to it."""
+    unique_items = []
+    for item in items:
+        key = item.name.strip().lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        unique_items.append(item)
+    return unique_items
+
+async def list_merger_node(state: MainState):
+    """
+    Merges the categories generated in parallel into the final list.
+    Categories are ordered as planned and an item name is kept only the first time it appears
+    (planned uncategorized items first, then categories in order), so item names stay unique per trip.
+    A list missing a category that failed to generate is not cached, and if every category failed
+    the list is generated in one call instead.
+    """
+    if not state.generated_categories:
+        return {**await list_generator_node(state), "planned_categories": [], "generated_categories": []}
+
+    order = {name: index for index, name in enumerate(state.planned_categories)}
+    generated_categories = sorted(state.generated_categories, key=lambda c: order.get(c.name, len(order)))
+
+    seen = set()
+    uncategorized_items = dedupe_items(state.uncategorized_items, seen)
+    categories = [
+        category.model_copy(update={"items": dedupe_items(category.items, seen)})
+        for category in generated_categories
+    ]
+
+    trip = state.trip
+    duration = trip_duration(trip)
+    if {c.name for c in generated_categories} >= set(state.planned_categories):
+        await cache_list(list_profile(state, trip, duration), duration, categories, uncategorized_items)
+
+    return {
+        "categories": categories,
+        "uncategorized_items": uncategorized_items,
+        "planned_categories": [],
+        "generated_categories": []
+    }
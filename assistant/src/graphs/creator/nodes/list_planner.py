@@ -0,0 +1,58 @@
+from pydantic import BaseModel, Field
+from typing import List
+from langchain_core.messages import AIMessage
+from langgraph.config import get_stream_writer
+
+from src.utils.llm import get_structured_llm, build_system_message
+from src.utils.history import recent_messages, summary_prompt
+from src.graphs.creator.nodes.list_generator import trip_duration, describe_trip, list_profile, get_cached_list, get_template_list
+from src.models.state import MainState
+from src.models.item import Item
+
+class ListPlanResponse(BaseModel):
+    categories: List[str] = Field(description="The names of the categories of the packing list, most important first")
+    uncategorized_items: List[Item] = Field(description="A few essentials that do not belong to any category (e.g. passport)")
+    chat_response: str = Field(description="A warm, excited message explaining how the list is organized for this trip.")
+
+# Kept byte-for-byte identical across trips so the provider can cache it as a prompt prefix
+SYSTEM_PROMPT = """
+    You are the "PackPal" Master Organizer. 
+    Plan the structure of a highly personalized packing list for the trip described at the end of these instructions.
+    Each category will be filled with items separately, so only choose the category names here.
+    
+    GUIDELINES:
+    1. **Personalization**: Add activity specific categories when the description calls for them (e.g. "Hiking Gear" for a hiking trip).
+    2. **Categorization**: Use between 4 and 8 distinct, non-overlapping categories (e.g., "Clothing", "Electronics", "Toiletries", "Documents").
+    3. **Uncategorized Items**: Only list a few essentials that fit no category, with quantities based on the trip's duration in days.
+    4. **Tone**: Be enthusiastic in the 'chat_response'.
+    """
+
+async def list_planner_node(state: MainState):
+    writer = get_stream_writer()
+    trip = state.trip
+    duration = trip_duration(trip)
+    profile = list_profile(state, trip, duration)
+
+    # A cached or templated list needs no planning
+    cached = await get_cached_list(profile, trip, duration, writer)
+    if cached is None:
+        cached = await get_template_list(state, profile, trip, duration, writer)
+    if cached is not None:
+        return {
+            "planned_categories": [],
+            "categories": cached.categories,
+            "uncategorized_items": cached.uncategorized_items,
+            "messages": [AIMessage(content=cached.chat_response)]
+        }
+
+    response = await get_structured_llm("fast", ListPlanResponse).ainvoke([build_system_message(SYSTEM_PROMPT, describe_trip(trip, duration) + summary_prompt(state)), *recent_messages(state)])
+
+    for item in response.uncategorized_items:
+        item.id = None
+
+    return {
+        "planned_categories": list(dict.fromkeys(response.categories)),
+        "generated_categories": [],
+        "uncategorized_items": response.uncategorized_items,
+        "messages": [AIMessage(content=response.chat_response)]
+    }
@@ -1,9 +1,12 @@
 from src.models.state import MainState
+from src.utils.config import Config
 from langgraph.graph import END
 
 def route_after_chat(state: MainState):
     trip = state.trip
     required = [trip.name, trip.description, trip.start_date, trip.end_date]
     if all(field is not None for field in required):
+        if Config.LIST_GENERATOR_MODE == "fan_out":
+            return "list_planner"
         return "list_generator"
     return END
\ No newline at end of file
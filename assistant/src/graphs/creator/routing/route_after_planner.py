@@ -0,0 +1,22 @@
+from src.models.state import MainState
+from src.graphs.creator.nodes.list_generator import trip_duration, describe_trip
+from src.graphs.creator.nodes.category_generator import CategoryTask
+from src.utils.history import recent_messages, summary_prompt
+from langgraph.graph import END
+from langgraph.types import Send
+
+def route_after_planner(state: MainState):
+    if not state.planned_categories:
+        return END
+
+    trip_prompt = describe_trip(state.trip, trip_duration(state.trip)) + summary_prompt(state)
+    messages = recent_messages(state)[:-1]
+    return [
+        Send("category_generator", CategoryTask(
+            category_name=name,
+            planned_categories=state.planned_categories,
+            trip_prompt=trip_prompt,
+            messages=messages
+        ))
+        for name in state.planned_categories
+    ]
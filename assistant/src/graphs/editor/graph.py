@@ -1,22 +1,41 @@
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import StateGraph, END
 from src.graphs.editor.nodes.editor import editor_node
 from src.graphs.editor.nodes.fallback import fallback_node
+from src.graphs.editor.nodes.quick_edit import quick_edit_node
 from src.graphs.editor.routing.should_continue import should_continue
-from src.models.state import EditorState
+from src.graphs.editor.routing.route_after_quick_edit import route_after_quick_edit
+from src.graphs.shared.nodes.history import create_history_node
+from src.utils.config import Config
 
-workflow = StateGraph(EditorState)
-workflow.add_node("editor", editor_node)
-workflow.add_node("fallback", fallback_node)
-workflow.add_edge(START, "editor")
-workflow.add_conditional_edges(
-    "editor",
-    should_continue,
-    {
-        "retry": "editor",
-        "fallback": "fallback",
-        END: END
-    }
-)
-workflow.add_edge("fallback", END)
+def add_editor(workflow: StateGraph, end: str):
+    """
+    Adds the editor to a graph over MainState as plain nodes, so they read and write the graph's own channels
+    instead of a subgraph state that is copied in, validated and reduced back on every turn.
 
-editor_graph = workflow.compile()
\ No newline at end of file
+    Args:
+        workflow: The graph to add the editor to. The editor starts at its "quick_edit" node.
+        end: The node the editor continues to once the user has an answer.
+    """
+    workflow.add_node("quick_edit", quick_edit_node)
+    workflow.add_node("editor_history", create_history_node(Config.EDITOR_HISTORY_TURNS))
+    workflow.add_node("editor", editor_node)
+    workflow.add_node("fallback", fallback_node)
+    workflow.add_conditional_edges(
+        "quick_edit",
+        route_after_quick_edit,
+        {
+            "history": "editor_history",
+            END: end
+        }
+    )
+    workflow.add_edge("editor_history", "editor")
+    workflow.add_conditional_edges(
+        "editor",
+        should_continue,
+        {
+            "retry": "editor",
+            "fallback": "fallback",
+            END: end
+        }
+    )
+    workflow.add_edge("fallback", end)
\ No newline at end of file
@@ -1,9 +1,8 @@
 from src.models.state import EditorState
 from src.utils.llm import get_llm
+from src.utils.history import recent_messages, summary_prompt
 from langchain_core.messages import AIMessage, SystemMessage
 
-llm = get_llm()
-
 async def fallback_node(state: EditorState):
     last_error = state.messages[-1].content
     
@@ -12,9 +11,9 @@ async def fallback_node(state: EditorState):
     
     Acknowledge the difficulty, tell the user what you were TRYING to do,
     and ask them to clarify or provide the information in a different way.
-    """
+    {summary_prompt(state)}"""
     
-    response = await llm.ainvoke([SystemMessage(content=prompt), *state.messages]) 
+    response = await get_llm("fast").ainvoke([SystemMessage(content=prompt), *recent_messages(state)]) 
     
     return {
         "messages": [AIMessage(content=response.content)],
@@ -0,0 +1,29 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.utils.apply_edits import apply_edits
+from src.utils.edit_log import log_edits
+from src.utils.command_parser import parse_command
+from src.models.state import EditorState
+
+async def quick_edit_node(state: EditorState):
+    last_msg = state.messages[-1]
+    if not isinstance(last_msg, HumanMessage) or not isinstance(last_msg.content, str):
+        return {}
+
+    command = parse_command(last_msg.content, state.categories, state.uncategorized_items)
+    if command is None:
+        return {}
+
+    edits, reply = command
+    try:
+        new_trip, new_categories, new_uncategorized_items = apply_edits(state, edits)
+    except ValueError:
+        return {}
+
+    return {
+        "trip": new_trip,
+        "categories": new_categories,
+        "uncategorized_items": new_uncategorized_items,
+        "list_edits": log_edits(edits),
+        "messages": [AIMessage(content=reply)]
+    }
\ No newline at end of file
@@ -0,0 +1,8 @@
+from src.models.state import EditorState
+from langchain_core.messages import AIMessage
+from langgraph.graph import END
+
+def route_after_quick_edit(state: EditorState):
+    if isinstance(state.messages[-1], AIMessage):
+        return END
+    return "history"
\ No newline at end of file
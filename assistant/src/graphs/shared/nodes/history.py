@@ -0,0 +1,42 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.utils.llm import get_llm
+from src.utils.history import split_turns, unsummarized_messages, drop_resolved_errors
+
+SUMMARY_PROMPT = """
+You are summarizing the earlier part of a conversation between a traveler and PackPal, a packing assistant.
+Merge the existing summary with the new messages into one concise summary (at most 150 words).
+Keep decisions, preferences, constraints and open questions. Omit greetings, pleasantries and any details that were later changed.
+"""
+
+def create_history_node(max_turns: int):
+    """
+    Creates a node that keeps the conversation sent to the model bounded.
+    Once more than 2 * max_turns turns are unsummarized, all but the last max_turns are folded into the
+    rolling summary and the cursor is advanced past them. Folding in batches avoids a summary call on every turn.
+    The messages themselves stay in state so the client still receives the full chat.
+
+    Args:
+        max_turns: The number of most recent turns to keep verbatim after folding.
+    Returns:
+        An async node function for any state with messages, history_summary and history_cursor.
+    """
+    async def history_node(state):
+        turns = split_turns(unsummarized_messages(state.messages, state.history_cursor))
+        if len(turns) <= 2 * max_turns:
+            return {}
+
+        to_fold = drop_resolved_errors([m for turn in turns[:-max_turns] for m in turn])
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in to_fold)
+        # Tagged so the backend does not stream the summary to the client as if it were the reply
+        response = await get_llm("fast").with_config(tags=["nostream"]).ainvoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"EXISTING SUMMARY:\n{state.history_summary or 'None'}\n\nNEW MESSAGES:\n{transcript}")
+        ])
+
+        return {
+            "history_summary": response.content,
+            "history_cursor": turns[-max_turns - 1][-1].id
+        }
+
+    return history_node
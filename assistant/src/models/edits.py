@@ -1,85 +1,120 @@
 from datetime import date
-from typing import Literal, Optional, Union
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
-class AddCategory(BaseModel):
+def drop_titles(schema: Dict[str, Any]):
+    # The operation tag already names the edit, the titles pydantic derives from class and field names only add tokens
+    schema.pop("title", None)
+    for field_schema in schema.get("properties", {}).values():
+        field_schema.pop("title", None)
+
+class Edit(BaseModel):
+    model_config = ConfigDict(json_schema_extra=drop_titles)
+
+class AddCategory(Edit):
     operation: Literal["add_category"]
     category_name: str = Field(description="The name of the category to add")
 
-class RemoveCategory(BaseModel):
+class RemoveCategory(Edit):
     operation: Literal["remove_category"]
     category_name: str = Field(description="The name of the category to remove")
 
-class UpdateCategoryName(BaseModel):
+class UpdateCategoryName(Edit):
     operation: Literal["update_category_name"]
     category_name: str = Field(description="The name of the category to update")
     new_category_name: str = Field(description="The new name of the category")
 
-class AddItem(BaseModel):
+class AddItem(Edit):
     operation: Literal["add_item"]
     category_name: Optional[str] = Field(description="The name of the category to add the item to (None if uncategorized)")
     item_name: str = Field(description="The name of the item to add")
     quantity: int = Field(description="The quantity")
     notes: Optional[str] = Field(description="Notes about the item (None if no notes)")
 
-class RemoveItem(BaseModel):
+class RemoveItem(Edit):
     operation: Literal["remove_item"]
     category_name: Optional[str] = Field(description="The name of the category to remove the item from (None if uncategorized)")
     item_name: str = Field(description="The name of the item to remove")
 
-class UpdateItemName(BaseModel):
+class UpdateItemName(Edit):
     operation: Literal["update_item_name"]
     category_name: Optional[str] = Field(description="The name of the category to update the item in (None if uncategorized)")
     item_name: str = Field(description="The name of the item to update")
     new_item_name: str = Field(description="The new name of the item")
 
-class UpdateItemQuantity(BaseModel):
+class UpdateItemQuantity(Edit):
     operation: Literal["update_item_quantity"]
     category_name: Optional[str] = Field(description="The name of the category to update the item in (None if uncategorized)")
     item_name: str = Field(description="The name of the item to update")
     new_quantity: int = Field(description="The new quantity")
 
-class UpdateItemNotes(BaseModel):
+class UpdateItemNotes(Edit):
     operation: Literal["update_item_notes"]
     category_name: Optional[str] = Field(description="The name of the category to update the item in (None if uncategorized)")
     item_name: str = Field(description="The name of the item to update")
     new_notes: str = Field(description="The new notes")
 
-class MoveItem(BaseModel):
+class MoveItem(Edit):
     operation: Literal["move_item"]
     category_name: Optional[str] = Field(description="The name of the category to move the item from (None if uncategorized)")
     item_name: str = Field(description="The name of the item to move")
     new_category_name: Optional[str] = Field(description="The name of the category to move the item to (None if uncategorized)")
 
-class UpdateTripName(BaseModel):
+class UpdateTripName(Edit):
     operation: Literal["update_trip_name"]
     new_trip_name: str = Field(description="The new name of the trip")
 
-class UpdateTripDescription(BaseModel):
+class UpdateTripDescription(Edit):
     operation: Literal["update_trip_description"]
     new_trip_description: str = Field(description="The new description of the trip")
 
-class UpdateTripStartDate(BaseModel):
+class UpdateTripStartDate(Edit):
     operation: Literal["update_trip_start_date"]
     new_trip_start_date: date = Field(description="The new start date of the trip")
 
-class UpdateTripEndDate(BaseModel):
+class UpdateTripEndDate(Edit):
     operation: Literal["update_trip_end_date"]
     new_trip_end_date: date = Field(description="The new end date of the trip")
 
 
-edits_union = Union[
-    AddCategory, 
-    RemoveCategory, 
-    UpdateCategoryName, 
-        AddItem, 
-        RemoveItem, 
-        UpdateItemName, 
-        UpdateItemQuantity, 
-        UpdateItemNotes, 
-        MoveItem, 
-        UpdateTripName, 
-        UpdateTripDescription, 
-        UpdateTripStartDate, 
+def strict_union_schema(schema: Dict[str, Any]):
+    # Strict structured output only accepts anyOf; the operation const in every member still tells them apart
+    schema["anyOf"] = schema.pop("oneOf")
+    schema.pop("discriminator", None)
+
+# Discriminated on operation, so an edit is decoded by looking up its operation instead of trying every member
+edits_union = Annotated[
+    Union[
+        AddCategory,
+        RemoveCategory,
+        UpdateCategoryName,
+        AddItem,
+        RemoveItem,
+        UpdateItemName,
+        UpdateItemQuantity,
+        UpdateItemNotes,
+        MoveItem,
+        UpdateTripName,
+        UpdateTripDescription,
+        UpdateTripStartDate,
         UpdateTripEndDate
-    ]
\ No newline at end of file
+    ],
+    Field(discriminator="operation", json_schema_extra=strict_union_schema)
+]
+
+EDITS_ADAPTER = TypeAdapter(List[edits_union])
+
+def validate_edits(edits: Union[str, bytes, List[Dict[str, Any]]]) -> List[edits_union]:
+    """
+    Decodes a batch of edits in one validator call, from JSON or from already parsed data.
+
+    Args:
+        edits: The edits as a JSON array, or as a list of dicts.
+    Returns:
+        The edit models, in order.
+    Raises:
+        pydantic.ValidationError: An edit has an unknown operation or invalid fields.
+    """
+    if isinstance(edits, (str, bytes)):
+        return EDITS_ADAPTER.validate_json(edits)
+    return EDITS_ADAPTER.validate_python(edits)
\ No newline at end of file
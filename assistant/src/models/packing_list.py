@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Union
+
+from src.models.trip import Trip
+from src.models.category import Category
+from src.models.item import Item
+
+class PackingList(BaseModel):
+    """The trip with its categories and uncategorized items, as materialised from a snapshot and the edit log."""
+    trip: Trip = Trip()
+    categories: List[Category] = []
+    uncategorized_items: List[Item] = []
+
+def edit_log_reducer(curr_edits: List[Dict[str, Any]], action: Union[List[Dict[str, Any]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Appends edits to the log of edits made since the last snapshot.
+    Passing a list replaces the log (an empty list clears it when a new snapshot is taken).
+
+    Args:
+        curr_edits: The edits logged since the last snapshot, as serialised edits_union operations.
+        action: A dictionary specifying the edits to append, or the new log.
+                Example actions:
+                {'type': 'append', 'edits': [{'operation': 'add_item', 'category_name': 'Clothing', 'item_name': 'Socks', 'quantity': 2, 'notes': None}]}
+    Returns:
+        The new edit log.
+    """
+    if isinstance(action, list):
+        return action
+    return curr_edits + action["edits"]
\ No newline at end of file
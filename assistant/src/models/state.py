@@ -1,21 +1,37 @@
 from pydantic import BaseModel
-from typing import Annotated, List, Dict, Any
+from typing import Annotated, List, Dict, Any, Optional
 from langchain_core.messages import BaseMessage
+from langgraph.channels.untracked_value import UntrackedValue
 from langgraph.graph.message import add_messages
 
-from src.models.trip import Trip, trip_reducer
+from src.models.trip import Trip
 from src.models.category import Category, categories_reducer
-from src.models.item import Item, items_reducer
+from src.models.item import Item
+from src.models.packing_list import PackingList, edit_log_reducer
 
+# The trip and list are never checkpointed: what is checkpointed is list_snapshot, taken when the list changes
+# in a way edits cannot describe (or every Config.LIST_SNAPSHOT_EVERY edits), and list_edits, the edits since.
+# The load node rebuilds them at the start of a run unless the request sends them, the save node records them at the end.
 class MainState(BaseModel):
     messages: Annotated[List[BaseMessage], add_messages] = []
-    trip: Annotated[Trip, trip_reducer] = Trip()
-    categories: Annotated[List[Category], categories_reducer] = []
-    uncategorized_items: Annotated[List[Item], items_reducer] = []
+    trip: Annotated[Optional[Trip], UntrackedValue(Trip)] = None
+    categories: Annotated[Optional[List[Category]], UntrackedValue(list)] = None
+    uncategorized_items: Annotated[Optional[List[Item]], UntrackedValue(list)] = None
+    list_snapshot: Optional[PackingList] = None
+    list_edits: Annotated[List[Dict[str, Any]], edit_log_reducer] = []
+    history_summary: Optional[str] = None
+    history_cursor: Optional[str] = None
+    planned_categories: List[str] = []
+    generated_categories: Annotated[List[Category], categories_reducer] = []
 
+# What the editor nodes read. They run in the assistant graph over the same channels as MainState, except for
+# retry_count: it only exists in this schema, so it stays private to the editor, and it is never checkpointed,
+# so every run starts counting from 0.
 class EditorState(BaseModel):
     messages: Annotated[List[BaseMessage], add_messages] = []
-    trip: Annotated[Trip, trip_reducer] = Trip()
-    categories: Annotated[List[Category], categories_reducer] = []
-    uncategorized_items: Annotated[List[Item], items_reducer] = []
-    retry_count: int = 0
+    trip: Annotated[Optional[Trip], UntrackedValue(Trip)] = None
+    categories: Annotated[Optional[List[Category]], UntrackedValue(list)] = None
+    uncategorized_items: Annotated[Optional[List[Item]], UntrackedValue(list)] = None
+    history_summary: Optional[str] = None
+    history_cursor: Optional[str] = None
+    retry_count: Annotated[int, UntrackedValue(int)] = 0
\ No newline at end of file
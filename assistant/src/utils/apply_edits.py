@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Tuple, Union
 from src.models.trip import Trip, trip_reducer
 from src.models.category import Category, categories_reducer
 from src.models.item import Item, items_reducer
@@ -8,9 +8,10 @@ from src.models.edits import (
     UpdateTripName, UpdateTripDescription, UpdateTripStartDate, UpdateTripEndDate
 )
 from src.models.state import EditorState
+from src.models.packing_list import PackingList
 
 def apply_edits(
-    state: EditorState, edits: List[edits_union]
+    state: Union[EditorState, PackingList], edits: List[edits_union]
 ) -> Tuple[Trip, List[Category], List[Item]]:
     
     new_trip = state.trip.model_copy(deep=True)
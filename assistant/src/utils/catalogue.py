@@ -0,0 +1,99 @@
+import re
+import json
+from pathlib import Path
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.models.trip import Trip
+from src.models.category import Category
+from src.models.item import Item
+from src.models.packing_list import PackingList
+from src.utils.list_cache import rescale_quantity
+
+# Shipped with the package; bump its version whenever the templates change
+CATALOGUE_PATH = Path(__file__).parent.parent / "data" / "packing_templates.json"
+
+class TemplateItem(BaseModel):
+    name: str
+    quantity: int
+    notes: Optional[str] = None
+    # Only packed for trips of at least this many days
+    min_days: int = 0
+
+class TemplateCategory(BaseModel):
+    name: str
+    items: List[TemplateItem] = []
+
+class TemplateSection(BaseModel):
+    categories: List[TemplateCategory] = []
+    uncategorized_items: List[TemplateItem] = []
+
+class Template(TemplateSection):
+    archetype: str
+    keywords: List[str]
+
+class Catalogue(BaseModel):
+    version: str
+    # The trip length the template quantities are written for
+    base_days: int
+    common: TemplateSection
+    templates: List[Template]
+
+def load_catalogue(path: Path = CATALOGUE_PATH) -> Catalogue:
+    return Catalogue.model_validate(json.loads(path.read_text()))
+
+def match_templates(catalogue: Catalogue, trip: Trip) -> List[Template]:
+    """
+    Returns the templates whose keywords appear in the trip name or description, best match first.
+    Keywords match whole words, with or without a plural or -ing ending, like the list cache's activity keywords.
+    """
+    text = f"{trip.name or ''} {trip.description or ''}".lower()
+    scored = []
+    for template in catalogue.templates:
+        hits = sum(1 for keyword in template.keywords if re.search(rf"\b{re.escape(keyword)}(s|es|ing)?\b", text))
+        if hits:
+            scored.append((hits, template))
+    return [template for _, template in sorted(scored, key=lambda scored_template: -scored_template[0])]
+
+def build_items(items: List[TemplateItem], duration: int, base_days: int, seen: set) -> List[Item]:
+    """Scales the template items to the trip, skipping items for longer trips and names already packed."""
+    built = []
+    for item in items:
+        key = item.name.lower()
+        if duration < item.min_days or key in seen:
+            continue
+        seen.add(key)
+        built.append(Item(name=item.name, quantity=rescale_quantity(item.quantity, base_days, duration), notes=item.notes))
+    return built
+
+def draft_list(catalogue: Catalogue, trip: Trip, duration: int) -> Optional[PackingList]:
+    """
+    Builds a draft list for a trip from the templates it matches, without a model call.
+    The best matching template comes first and the others (e.g. hiking on a beach trip) are merged into it,
+    then the common essentials are added. Categories with the same name are merged and an item name
+    is only kept the first time it appears, so item names stay unique per trip.
+
+    Args:
+        catalogue: The packing catalogue.
+        trip: The trip, whose name and description select the templates.
+        duration: The trip length in days, which scales the quantities.
+    Returns:
+        The draft list, or None if no template matches the trip.
+    """
+    templates = match_templates(catalogue, trip)
+    if not templates:
+        return None
+
+    seen = set()
+    categories = {}
+    uncategorized_items = []
+    for section in [*templates, catalogue.common]:
+        for template_category in section.categories:
+            category = categories.setdefault(template_category.name, Category(name=template_category.name, items=[]))
+            category.items.extend(build_items(template_category.items, duration, catalogue.base_days, seen))
+        uncategorized_items.extend(build_items(section.uncategorized_items, duration, catalogue.base_days, seen))
+
+    return PackingList(trip=trip, categories=list(categories.values()), uncategorized_items=uncategorized_items)
+
+catalogue = load_catalogue()
\ No newline at end of file
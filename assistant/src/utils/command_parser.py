@@ -0,0 +1,131 @@
+import re
+from typing import List, Optional, Tuple
+
+from src.models.category import Category
+from src.models.item import Item
+from src.models.edits import edits_union, AddItem, RemoveItem, UpdateItemQuantity, MoveItem
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+NUMBER = r"\d+|" + "|".join(NUMBER_WORDS)
+UNITS = r"pairs?|pieces?|bottles?|packs?|sets?|boxes?"
+UNCATEGORIZED = {"uncategorized", "uncategorised", "no category", "misc", "miscellaneous"}
+# Separators of several items in one command ("socks and sandals", "socks, sandals"), which the editor handles
+LIST_PATTERN = re.compile(r"[,;&+/]|\b(?:and|or|plus|as well as)\b", re.IGNORECASE)
+
+ADD_PATTERN = re.compile(
+    rf"^add\s+(?:(?P<quantity>{NUMBER})\s+)?(?:(?:{UNITS})\s+of\s+)?(?P<item>.+?)"
+    rf"\s+(?:to|in|into|under)\s+(?:the\s+|my\s+)?(?P<category>.+?)(?:\s+category|\s+section)?$",
+    re.IGNORECASE
+)
+REMOVE_PATTERN = re.compile(
+    r"^(?:remove|delete|drop)\s+(?:the\s+|my\s+)?(?P<item>.+?)"
+    r"(?:\s+from\s+(?:the\s+|my\s+)?(?P<category>.+?)(?:\s+category|\s+section)?)?$",
+    re.IGNORECASE
+)
+QUANTITY_PATTERN = re.compile(
+    rf"^(?:change|set|update|make)\s+(?:the\s+|my\s+)?(?P<item>.+?)(?:\s+quantity|\s+count)?\s+to\s+(?P<quantity>{NUMBER})$",
+    re.IGNORECASE
+)
+MOVE_PATTERN = re.compile(
+    r"^(?:move|put)\s+(?:the\s+|my\s+)?(?P<item>.+?)\s+(?:to|into|in|under)\s+(?:the\s+|my\s+)?(?P<category>.+?)(?:\s+category|\s+section)?$",
+    re.IGNORECASE
+)
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def parse_quantity(text: Optional[str]) -> int:
+    if not text:
+        return 1
+    return int(text) if text.isdigit() else NUMBER_WORDS[text.lower()]
+
+def find_category(categories: List[Category], name: str) -> Optional[str]:
+    """Returns the exact name of the category matching name (case-insensitive), or None."""
+    matches = [c.name for c in categories if normalize(c.name) == normalize(name)]
+    return matches[0] if len(matches) == 1 else None
+
+def find_item(
+    categories: List[Category], uncategorized_items: List[Item], name: str, category_name: Optional[str] = None
+) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Finds the single item matching name (case-insensitive), optionally only in one category.
+    Returns (category name or None if uncategorized, exact item name), or None if there is no unique match.
+    """
+    matches = [(None, i.name) for i in uncategorized_items if normalize(i.name) == normalize(name)]
+    for c in categories:
+        matches += [(c.name, i.name) for i in c.items if normalize(i.name) == normalize(name)]
+    if category_name is not None:
+        matches = [m for m in matches if m[0] == category_name]
+    return matches[0] if len(matches) == 1 else None
+
+def parse_command(
+    text: str, categories: List[Category], uncategorized_items: List[Item]
+) -> Optional[Tuple[List[edits_union], str]]:
+    """
+    Parses a short edit command against the current list without calling the LLM.
+    Only commands that name existing categories and items unambiguously are handled; anything else returns None
+    so the editor can answer it.
+
+    Args:
+        text: The user's message.
+        categories: The current categories.
+        uncategorized_items: The current uncategorized items.
+    Returns:
+        The edits to apply and a reply describing them, or None if the command is not understood with confidence.
+    """
+    command = " ".join(text.split()).strip(" .!")
+    if command.lower().startswith("please "):
+        command = command[len("please "):]
+
+    match = ADD_PATTERN.match(command)
+    if match:
+        if LIST_PATTERN.search(match["item"]):
+            return None
+        category_name = find_category(categories, match["category"])
+        if category_name is None and normalize(match["category"]) not in UNCATEGORIZED:
+            return None
+        item_name = match["item"][:1].upper() + match["item"][1:]
+        if find_item(categories, uncategorized_items, item_name) is not None:
+            return None
+        quantity = parse_quantity(match["quantity"])
+        edit = AddItem(operation="add_item", category_name=category_name, item_name=item_name, quantity=quantity, notes=None)
+        return [edit], f"Added {quantity} × {item_name} to {category_name or 'your uncategorized items'}. ✅ What else should we adjust?"
+
+    match = QUANTITY_PATTERN.match(command)
+    if match:
+        found = find_item(categories, uncategorized_items, match["item"])
+        if found is None:
+            return None
+        category_name, item_name = found
+        quantity = parse_quantity(match["quantity"])
+        edit = UpdateItemQuantity(operation="update_item_quantity", category_name=category_name, item_name=item_name, new_quantity=quantity)
+        return [edit], f"Updated {item_name} to {quantity}. ✅ What else should we adjust?"
+
+    match = MOVE_PATTERN.match(command)
+    if match:
+        found = find_item(categories, uncategorized_items, match["item"])
+        new_category_name = find_category(categories, match["category"])
+        if found is None or (new_category_name is None and normalize(match["category"]) not in UNCATEGORIZED):
+            return None
+        category_name, item_name = found
+        edit = MoveItem(operation="move_item", category_name=category_name, item_name=item_name, new_category_name=new_category_name)
+        return [edit], f"Moved {item_name} to {new_category_name or 'your uncategorized items'}. ✅ What else should we adjust?"
+
+    match = REMOVE_PATTERN.match(command)
+    if match:
+        category_name = None
+        if match["category"]:
+            category_name = find_category(categories, match["category"])
+            if category_name is None:
+                return None
+        found = find_item(categories, uncategorized_items, match["item"], category_name)
+        if found is None:
+            return None
+        category_name, item_name = found
+        edit = RemoveItem(operation="remove_item", category_name=category_name, item_name=item_name)
+        return [edit], f"Removed {item_name} from your list. ✅ What else should we adjust?"
+
+    return None
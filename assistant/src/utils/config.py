@@ -8,6 +8,33 @@ class Config:
     MODEL_NAME = os.getenv('ASSISTANT_MODEL_NAME')
     MODEL_API_KEY = os.getenv('ASSISTANT_MODEL_API_KEY')
 
+    # Per-role models; both default to MODEL_NAME
+    FAST_MODEL_NAME = os.getenv('ASSISTANT_FAST_MODEL_NAME', MODEL_NAME)
+    STRONG_MODEL_NAME = os.getenv('ASSISTANT_STRONG_MODEL_NAME', MODEL_NAME)
+    MODEL_NAMES = {"fast": FAST_MODEL_NAME, "strong": STRONG_MODEL_NAME}
+
+    # Number of most recent turns each graph sends verbatim; older turns are folded into a summary
+    CREATOR_HISTORY_TURNS = int(os.getenv('ASSISTANT_CREATOR_HISTORY_TURNS', 6))
+    EDITOR_HISTORY_TURNS = int(os.getenv('ASSISTANT_EDITOR_HISTORY_TURNS', 10))
+
+    # Generated packing list cache; the Redis tier is only used when a URI is set
+    LIST_CACHE_MAX_SIZE = int(os.getenv('ASSISTANT_LIST_CACHE_MAX_SIZE', 512))
+    LIST_CACHE_TTL_SECONDS = int(os.getenv('ASSISTANT_LIST_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    LIST_CACHE_REDIS_URI = os.getenv('ASSISTANT_LIST_CACHE_REDIS_URI')
+
+    # "single" generates the whole list in one call, "fan_out" plans categories and generates them in parallel
+    LIST_GENERATOR_MODE = os.getenv('ASSISTANT_LIST_GENERATOR_MODE', 'single')
+    LIST_GENERATOR_MAX_CONCURRENCY = int(os.getenv('ASSISTANT_LIST_GENERATOR_MAX_CONCURRENCY', 4))
+
+    # Seed new lists from the packing catalogue shipped in src/data, personalised by a small model call, when a template matches
+    LIST_TEMPLATES = os.getenv('ASSISTANT_LIST_TEMPLATES', 'true').lower() == 'true'
+
+    # Edits logged in the checkpoint before the list is saved as a new snapshot
+    LIST_SNAPSHOT_EVERY = int(os.getenv('ASSISTANT_LIST_SNAPSHOT_EVERY', 16))
+
+    # Startup warm-up: also send a one-token request per model so the provider connection is open before /ok reports ready
+    WARMUP_REQUEST = os.getenv('ASSISTANT_WARMUP_REQUEST', 'false').lower() == 'true'
+
     required = [MODEL_PROVIDER, MODEL_NAME, MODEL_API_KEY]
 
     if not all(required):
@@ -0,0 +1,42 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from src.models.edits import edits_union, validate_edits
+from src.models.packing_list import PackingList
+from src.utils.apply_edits import apply_edits
+
+logger = logging.getLogger(__name__)
+
+def log_edits(edits: List[edits_union]) -> Dict[str, Any]:
+    """Returns the state update that appends the applied edits to the edit log."""
+    return {"type": "append", "edits": [edit.model_dump(mode="json") for edit in edits]}
+
+def materialize(snapshot: Optional[PackingList], edits: List[Dict[str, Any]]) -> PackingList:
+    """
+    Rebuilds the current trip and list by replaying the logged edits onto the last snapshot.
+
+    Args:
+        snapshot: The last snapshot, or None if none has been taken yet.
+        edits: The edits logged since the snapshot.
+    Returns:
+        The materialised packing list.
+    Raises:
+        ValueError: An edit does not apply to the snapshot.
+    """
+    snapshot = snapshot or PackingList()
+    if not edits:
+        return snapshot
+    trip, categories, uncategorized_items = apply_edits(snapshot, validate_edits(edits))
+    return PackingList(trip=trip, categories=categories, uncategorized_items=uncategorized_items)
+
+def materialize_or_snapshot(snapshot: Optional[PackingList], edits: List[Dict[str, Any]]) -> PackingList:
+    """
+    Like materialize, but falls back to the last snapshot when the logged edits do not apply to it,
+    so a thread whose log was checkpointed against a different list (before the load node snapshotted
+    lists sent with a request) can still be opened and chatted in.
+    """
+    try:
+        return materialize(snapshot, edits)
+    except ValueError:
+        logger.warning("Edit log does not apply to its snapshot, falling back to the snapshot", exc_info=True)
+        return snapshot or PackingList()
\ No newline at end of file
@@ -0,0 +1,45 @@
+from typing import List, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+
+def is_error_message(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) and "Error:" in message.content
+
+def split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Groups messages into turns, each starting at a HumanMessage.
+    Messages before the first HumanMessage (e.g. the greeting) form their own leading turn.
+    """
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+def unsummarized_messages(messages: List[BaseMessage], cursor: Optional[str]) -> List[BaseMessage]:
+    """Returns the messages after the last one folded into the summary (all of them if there is no cursor)."""
+    if cursor is None:
+        return messages
+    for index, message in enumerate(messages):
+        if message.id == cursor:
+            return messages[index + 1:]
+    return messages
+
+def drop_resolved_errors(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Removes editor retry errors that a later AI reply has already resolved.
+    Errors after the last AI reply belong to the retry in progress and are kept.
+    """
+    last_ai_index = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    return [m for i, m in enumerate(messages) if i > last_ai_index or not is_error_message(m)]
+
+def recent_messages(state) -> List[BaseMessage]:
+    """Returns the windowed conversation to send to the model: unsummarized turns without resolved errors."""
+    return drop_resolved_errors(unsummarized_messages(state.messages, state.history_cursor))
+
+def summary_prompt(state) -> str:
+    """Returns the rolling summary as a prompt section, or an empty string if nothing has been folded yet."""
+    if not state.history_summary:
+        return ""
+    return f"\nSUMMARY OF THE EARLIER CONVERSATION:\n{state.history_summary}\n"
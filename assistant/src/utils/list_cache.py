@@ -0,0 +1,163 @@
+import re
+import time
+import json
+import logging
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.utils.config import Config
+from src.utils.metrics import LIST_CACHE_ERRORS
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    Redis = None
+
+logger = logging.getLogger(__name__)
+
+# Words in trip names that say nothing about the destination
+NAME_STOPWORDS = {
+    "a", "an", "the", "to", "in", "at", "of", "and", "for", "my", "our", "trip", "trips", "travel",
+    "getaway", "vacation", "holiday", "adventure", "journey", "visit", "tour", "weekend", "escape",
+}
+
+# Keywords that change what belongs on the list, grouped under the activity they imply
+ACTIVITY_KEYWORDS = {
+    "beach": ["beach", "swim", "swimming", "snorkel", "surf", "island", "resort", "sea"],
+    "hiking": ["hike", "hiking", "trek", "trail", "mountain", "climb"],
+    "camping": ["camp", "tent"],
+    "ski": ["ski", "snowboard", "snow"],
+    "city": ["city", "sightseeing", "museum", "shopping", "tour"],
+    "business": ["business", "conference", "meeting", "work"],
+    "formal": ["formal", "wedding", "gala", "dinner party"],
+    "family": ["kid", "child", "baby", "toddler", "family"],
+    "cold": ["cold", "winter", "freezing", "arctic"],
+    "hot": ["hot", "summer", "tropical", "desert"],
+}
+
+# Words in the user's messages that make a list personal: what they call for is not in the profile,
+# and a cached list built from them would show it to every user whose trip has the same profile
+PERSONAL_KEYWORDS = [
+    "allergy", "allergic", "medication", "medicine", "prescription", "insulin", "diabetic", "diabetes", "asthma",
+    "inhaler", "pregnant", "pregnancy", "wheelchair", "disability", "disabled", "injury", "surgery",
+    "glasses", "contacts", "dietary", "vegan", "vegetarian", "gluten", "kosher", "halal", "pet", "dog", "cat",
+    "son", "daughter", "wife", "husband", "partner", "boyfriend", "girlfriend", "mom", "dad", "mother", "father",
+]
+
+# (upper bound in days, bucket name); trips in the same bucket share a cached list
+DURATION_BUCKETS = [(2, "weekend"), (5, "short"), (9, "week"), (16, "two-weeks")]
+
+def duration_bucket(duration: int) -> str:
+    for upper, name in DURATION_BUCKETS:
+        if duration <= upper:
+            return name
+    return "long"
+
+def mentions(text: str, keywords) -> bool:
+    return any(re.search(rf"\b{re.escape(keyword)}(s|es|ing)?\b", text) for keyword in keywords)
+
+def is_personal(texts) -> bool:
+    """Whether any of the texts (the user's messages, the trip description) mentions personal context."""
+    return any(mentions((text or "").lower(), PERSONAL_KEYWORDS) for text in texts)
+
+def trip_profile(name: Optional[str], description: Optional[str], duration: int) -> Optional[Tuple]:
+    """
+    Normalises a trip into the profile used as the list cache key.
+    Near-duplicate trips (e.g. two 4-5 day sightseeing trips to Paris) map to the same profile.
+
+    Args:
+        name: The trip name, which carries the destination.
+        description: The trip description, which carries the planned activities.
+        duration: The trip length in days.
+    Returns:
+        A (destination tokens, duration bucket, activities) tuple, or None if the name has no destination
+        (e.g. "My Trip"), since all such trips would share one list.
+    """
+    name_tokens = re.findall(r"[a-z]+", (name or "").lower())
+    destination = tuple(sorted({t for t in name_tokens if t not in NAME_STOPWORDS}))
+    if not destination:
+        return None
+
+    text = (description or "").lower()
+    activities = tuple(sorted(
+        activity for activity, keywords in ACTIVITY_KEYWORDS.items()
+        if mentions(text, keywords)
+    ))
+
+    return destination, duration_bucket(duration), activities
+
+class ListCache:
+    """
+    Two-tier cache of generated packing lists: a per-process LRU with TTL, backed by an optional shared Redis tier.
+    Entries are the categories and items of a generated list, without ids or notes, plus the duration it was generated for.
+    Nothing is cached or returned for a None profile. A failing Redis tier is logged and counted, and treated as a miss.
+    """
+    def __init__(self, max_size: int, ttl: int, redis_uri: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.redis = Redis.from_url(redis_uri) if redis_uri and Redis else None
+
+    @staticmethod
+    def key(profile: Tuple) -> str:
+        digest = hashlib.sha1(json.dumps(profile).encode()).hexdigest()
+        return f"packpal:list:v2:{digest}"
+
+    async def get(self, profile: Optional[Tuple]) -> Optional[dict]:
+        if profile is None:
+            return None
+        key = self.key(profile)
+        entry = self.local.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.monotonic():
+                self.local.move_to_end(key)
+                return json.loads(payload)
+            del self.local[key]
+
+        if self.redis is not None:
+            try:
+                payload = await self.redis.get(key)
+            except Exception:
+                logger.warning("Reading the shared list cache failed, treating it as a miss", exc_info=True)
+                LIST_CACHE_ERRORS.labels(operation="get").inc()
+                payload = None
+            if payload is not None:
+                self._set_local(key, payload)
+                return json.loads(payload)
+        return None
+
+    async def set(self, profile: Optional[Tuple], value: dict):
+        if profile is None:
+            return
+        key = self.key(profile)
+        payload = json.dumps(value)
+        self._set_local(key, payload)
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, payload, ex=self.ttl)
+            except Exception:
+                logger.warning("Writing the shared list cache failed, keeping the list in this process only", exc_info=True)
+                LIST_CACHE_ERRORS.labels(operation="set").inc()
+
+    def _set_local(self, key: str, payload: str):
+        self.local[key] = (time.monotonic() + self.ttl, payload)
+        self.local.move_to_end(key)
+        while len(self.local) > self.max_size:
+            self.local.popitem(last=False)
+
+def rescale_quantity(quantity: int, cached_duration: int, duration: int) -> int:
+    """
+    Rescales a cached quantity to a new trip length.
+    Only quantities above 1 are treated as per-day; single items (passport, charger) stay at 1.
+    """
+    if quantity <= 1 or cached_duration <= 0 or duration <= 0:
+        return quantity
+    return max(1, round(quantity * duration / cached_duration))
+
+list_cache = ListCache(
+    max_size=Config.LIST_CACHE_MAX_SIZE,
+    ttl=Config.LIST_CACHE_TTL_SECONDS,
+    redis_uri=Config.LIST_CACHE_REDIS_URI
+)
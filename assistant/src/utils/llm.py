@@ -1,17 +1,96 @@
 from langchain.chat_models import init_chat_model
+from langchain_core.messages import SystemMessage, AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
 import os
 from .config import Config
 
-def get_llm():
+# Anthropic only reuses a cached prompt prefix when it is explicitly marked
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# One chat model per model name, shared by every node and role that uses it
+models = {}
+# Structured-output runnables per (role, schema), so schemas are converted once per worker
+structured_models = {}
+
+def create_llm(model_name: str):
     model_provider = Config.MODEL_PROVIDER
     api_key = Config.MODEL_API_KEY
+    kwargs = {}
     if model_provider == "google_genai":
         os.environ["GOOGLE_API_KEY"] = api_key
     elif model_provider == "openai":
         os.environ["OPENAI_API_KEY"] = api_key
+        # Report token usage on streamed responses too, so per-node usage is recorded for every call
+        kwargs["stream_usage"] = True
     elif model_provider == "anthropic":
         os.environ["ANTHROPIC_API_KEY"] = api_key
+        # Caches everything up to the latest message, so the history is reused on the next turn too
+        kwargs["model_kwargs"] = {"cache_control": CACHE_CONTROL}
     else:
         raise ValueError(f"Unsupported model provider: {model_provider}")
-    model_name = Config.MODEL_NAME
-    return init_chat_model(model_provider=model_provider, model=model_name)
\ No newline at end of file
+    return init_chat_model(model_provider=model_provider, model=model_name, **kwargs)
+
+def get_llm(role: str = "strong"):
+    """
+    Returns the shared chat model for a role, creating it on first use.
+    Roles map to model names in Config.MODEL_NAMES: "fast" for short extraction and recovery turns,
+    "strong" for list generation and editing. Models are created with the provider's default settings,
+    so all of them reuse the provider integration's pooled HTTP client.
+
+    Args:
+        role: The model role ("fast" or "strong").
+    Returns:
+        The chat model configured for the role.
+    """
+    model_name = Config.MODEL_NAMES[role]
+    if model_name not in models:
+        models[model_name] = create_llm(model_name)
+    return models[model_name]
+
+def get_structured_llm(role: str, schema: type):
+    """Returns the shared chat model for a role with strict structured output for the given schema."""
+    key = (role, schema)
+    if key not in structured_models:
+        structured_models[key] = get_llm(role).with_structured_output(schema, strict=True)
+    return structured_models[key]
+
+def build_system_message(static_prompt: str, dynamic_prompt: str = "") -> SystemMessage:
+    """
+    Builds a system message whose leading block is identical on every call so providers can cache it.
+    OpenAI and Gemini cache matching prefixes automatically; Anthropic needs the block marked with cache_control.
+
+    Args:
+        static_prompt: Instructions and examples that never change between turns.
+        dynamic_prompt: Per-turn state (trip data, dates, errors), placed after the static block.
+    Returns:
+        A single SystemMessage with the static block first and the dynamic block last.
+    """
+    static_block = {"type": "text", "text": static_prompt}
+    if Config.MODEL_PROVIDER == "anthropic":
+        static_block["cache_control"] = CACHE_CONTROL
+
+    content = [static_block]
+    if dynamic_prompt:
+        content.append({"type": "text", "text": dynamic_prompt})
+    return SystemMessage(content=content)
+
+def parse_partial_output(chunk: AIMessageChunk) -> dict:
+    """
+    Parses the structured output accumulated so far from a streamed response.
+    Tool-calling providers stream the JSON as tool call arguments, JSON-schema providers stream it as content.
+
+    Args:
+        chunk: The sum of all AIMessageChunks received so far.
+    Returns:
+        The partially parsed output, with unfinished strings closed and unfinished values dropped.
+    """
+    if chunk.tool_call_chunks:
+        text = chunk.tool_call_chunks[0].get("args") or ""
+    elif isinstance(chunk.content, str):
+        text = chunk.content
+    else:
+        text = "".join(block.get("text", "") for block in chunk.content if isinstance(block, dict))
+    try:
+        return parse_partial_json(text) or {}
+    except ValueError:
+        return {}
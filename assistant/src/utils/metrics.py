@@ -0,0 +1,154 @@
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Histogram
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+NODE_DURATION = Histogram("packpal_node_duration_seconds", "Wall time of a graph node run", ["node"], buckets=LATENCY_BUCKETS)
+LLM_TTFT = Histogram("packpal_llm_ttft_seconds", "Time to first token of a model call", ["node", "model"], buckets=LATENCY_BUCKETS)
+LLM_DURATION = Histogram("packpal_llm_duration_seconds", "Total latency of a model call", ["node", "model"], buckets=LATENCY_BUCKETS)
+LLM_TOKENS = Counter("packpal_llm_tokens", "Tokens used by model calls", ["node", "model", "direction"])
+EDITOR_RETRIES = Counter("packpal_editor_retries", "Editor attempts that failed and were retried")
+FALLBACKS = Counter("packpal_fallbacks", "Turns answered by the editor fallback")
+LIST_CACHE_ERRORS = Counter("packpal_list_cache_errors", "Shared list cache calls that failed, by operation", ["operation"])
+
+def node_label(metadata: Dict[str, Any]) -> Optional[str]:
+    """Returns the path of the node a run belongs to (e.g. "creator/chat"), or None outside a node."""
+    namespace = metadata.get("langgraph_checkpoint_ns")
+    if not namespace:
+        return metadata.get("langgraph_node")
+    return "/".join(segment.split(":")[0] for segment in namespace.split("|"))
+
+class RunMetrics(BaseCallbackHandler):
+    """
+    Records per-node durations, model latency, time to first token, token usage, editor retries and
+    fallback use for every graph run it is attached to.
+    Each sample is exported to Prometheus and added to a summary
+    for the root run, which the report node reads before the run ends.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self.roots: Dict[UUID, UUID] = {}
+        self.summaries: Dict[UUID, Dict[str, Any]] = {}
+        self.nodes: Dict[UUID, tuple] = {}
+        self.calls: Dict[UUID, Dict[str, Any]] = {}
+
+    def track(self, run_id: UUID, parent_run_id: Optional[UUID]) -> UUID:
+        root = self.roots.get(parent_run_id, parent_run_id) if parent_run_id else run_id
+        self.roots[run_id] = root
+        if root == run_id:
+            self.summaries[run_id] = {
+                "started_at": time.perf_counter(),
+                "nodes": {},
+                "llm_calls": [],
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "retries": 0,
+                "fallback": False
+            }
+        return root
+
+    def summary(self, root: UUID) -> Optional[Dict[str, Any]]:
+        """Returns the summary of a root run so far, with its duration until now."""
+        summary = self.summaries.get(root)
+        if summary is None:
+            return None
+        result = {key: value for key, value in summary.items() if key != "started_at"}
+        result["nodes"] = dict(summary["nodes"])
+        result["llm_calls"] = list(summary["llm_calls"])
+        result["duration_ms"] = (time.perf_counter() - summary["started_at"]) * 1000
+        return result
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        root = self.track(run_id, parent_run_id)
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        if node is not None and not node.startswith("__") and kwargs.get("name") == node:
+            self.nodes[run_id] = (root, node_label(metadata), time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.finish_node(run_id, outputs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.finish_node(run_id, None)
+
+    def finish_node(self, run_id: UUID, outputs: Any):
+        root = self.roots.pop(run_id, None)
+        if run_id in self.nodes:
+            root, label, started_at = self.nodes.pop(run_id)
+            duration = time.perf_counter() - started_at
+            summary = self.summaries.get(root)
+            if summary is not None:
+                summary["nodes"][label] = summary["nodes"].get(label, 0) + duration * 1000
+                # The editor only sets retry_count when an attempt failed (the fallback resets it to 0)
+                if isinstance(outputs, dict) and outputs.get("retry_count"):
+                    summary["retries"] += 1
+                    EDITOR_RETRIES.inc()
+                if label.split("/")[-1] == "fallback":
+                    summary["fallback"] = True
+                    FALLBACKS.inc()
+            NODE_DURATION.labels(node=label).observe(duration)
+        if root == run_id:
+            self.summaries.pop(run_id, None)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        root = self.track(run_id, parent_run_id)
+        metadata = metadata or {}
+        self.calls[run_id] = {
+            "root": root,
+            "node": node_label(metadata) or "unknown",
+            "model": metadata.get("ls_model_name") or "unknown",
+            "started_at": time.perf_counter(),
+            "first_token_at": None
+        }
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        call = self.calls.get(run_id)
+        if call is not None and call["first_token_at"] is None:
+            call["first_token_at"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.roots.pop(run_id, None)
+        call = self.calls.pop(run_id, None)
+        if call is None:
+            return
+
+        ended_at = time.perf_counter()
+        # Calls that were not streamed only produce their first token with the full response
+        ttft = (call["first_token_at"] or ended_at) - call["started_at"]
+        latency = ended_at - call["started_at"]
+        usage = {}
+        generations = response.generations[0] if response.generations else []
+        if generations and getattr(generations[0], "message", None) is not None:
+            usage = generations[0].message.usage_metadata or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+
+        summary = self.summaries.get(call["root"])
+        if summary is not None:
+            summary["llm_calls"].append({
+                "node": call["node"],
+                "model": call["model"],
+                "ttft_ms": ttft * 1000,
+                "latency_ms": latency * 1000,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens
+            })
+            summary["input_tokens"] += input_tokens
+            summary["output_tokens"] += output_tokens
+
+        labels = {"node": call["node"], "model": call["model"]}
+        LLM_TTFT.labels(**labels).observe(ttft)
+        LLM_DURATION.labels(**labels).observe(latency)
+        LLM_TOKENS.labels(**labels, direction="input").inc(input_tokens)
+        LLM_TOKENS.labels(**labels, direction="output").inc(output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.roots.pop(run_id, None)
+        self.calls.pop(run_id, None)
+
+run_metrics = RunMetrics()
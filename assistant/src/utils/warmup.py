@@ -0,0 +1,89 @@
+import time
+import logging
+import importlib
+from typing import Any, Dict
+
+from prometheus_client import Gauge
+
+from src.utils.config import Config
+from src.utils.llm import get_llm, get_structured_llm
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DURATION = Gauge("packpal_warmup_seconds", "Time spent in each phase of the startup warm-up", ["phase"])
+READY = Gauge("packpal_ready", "Whether the startup warm-up has finished and the worker reports ready")
+
+# Importing the assistant graph compiles it together with the nested creator graph and the editor nodes
+GRAPH_MODULES = [
+    "src.graphs.assistant.graph",
+    "src.graphs.creator.graph",
+    "src.graphs.editor.graph",
+]
+
+# (role, module, schema) of every structured-output model the nodes use
+STRUCTURED_OUTPUTS = [
+    ("fast", "src.graphs.creator.nodes.chat", "ChatResponse"),
+    ("fast", "src.graphs.creator.nodes.list_planner", "ListPlanResponse"),
+    ("strong", "src.graphs.creator.nodes.list_generator", "ListGeneratorResponse"),
+    ("fast", "src.graphs.creator.nodes.list_generator", "ListPersonalizationResponse"),
+    ("strong", "src.graphs.creator.nodes.category_generator", "CategoryItemsResponse"),
+    ("strong", "src.graphs.editor.nodes.editor", "EditorResponse"),
+]
+
+# Filled in by warm_up; /ok reports ready only once "ready" is set
+state: Dict[str, Any] = {"ready": False, "phases": {}, "error": None}
+
+async def warm_up():
+    """
+    Does the one-off work of a worker before it reports ready, instead of in its first requests:
+    imports and compiles every graph, creates the chat models and structured-output runnables of every role,
+    connects to the list cache's Redis tier and, when ASSISTANT_WARMUP_REQUEST is set, sends a one-token request
+    per model so the provider connection (DNS, TLS) is open and pooled.
+    A failing phase is logged and skipped, since the worker still serves requests, only colder.
+    """
+    phases = [
+        ("graphs", import_graphs),
+        ("models", create_models),
+        ("list_cache", connect_list_cache),
+    ]
+    if Config.WARMUP_REQUEST:
+        phases.append(("provider", open_provider_connections))
+
+    started_at = time.perf_counter()
+    for phase, function in phases:
+        phase_started_at = time.perf_counter()
+        try:
+            await function()
+        except Exception as e:
+            logger.exception("Warm-up phase %s failed", phase)
+            state["error"] = f"{phase}: {e}"
+        duration = time.perf_counter() - phase_started_at
+        state["phases"][phase] = duration * 1000
+        WARMUP_DURATION.labels(phase=phase).set(duration)
+
+    WARMUP_DURATION.labels(phase="total").set(time.perf_counter() - started_at)
+    state["ready"] = True
+    READY.set(1)
+    logger.info("Warm-up finished: %s", ", ".join(f"{p}={ms:.0f}ms" for p, ms in state["phases"].items()))
+
+async def import_graphs():
+    for module in GRAPH_MODULES:
+        importlib.import_module(module)
+
+async def create_models():
+    for role in Config.MODEL_NAMES:
+        get_llm(role)
+    for role, module, schema in STRUCTURED_OUTPUTS:
+        get_structured_llm(role, getattr(importlib.import_module(module), schema))
+
+async def connect_list_cache():
+    from src.utils.list_cache import list_cache
+    if list_cache.redis is not None:
+        await list_cache.redis.ping()
+
+async def open_provider_connections():
+    # Roles that share a model name share its client, so one request per model opens every connection
+    limit = {"max_output_tokens": 1} if Config.MODEL_PROVIDER == "google_genai" else {"max_tokens": 1}
+    for model_name in set(Config.MODEL_NAMES.values()):
+        role = next(role for role, name in Config.MODEL_NAMES.items() if name == model_name)
+        await get_llm(role).bind(**limit).ainvoke("Reply with OK.")
@@ -0,0 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from langgraph_sdk import get_client
+from langgraph_sdk.errors import NotFoundError
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+from src.models.packing_list import PackingList
+from src.utils.edit_log import materialize_or_snapshot
+from src.utils.warmup import warm_up, state as warmup_state
+
+# Talks to the server this app is mounted in, without going through the network
+client = get_client()
+
+async def metrics(request):
+    """Exposes the assistant's Prometheus metrics (node durations, model latency, tokens, retries, fallbacks)."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+async def ok(request):
+    """Replaces the server's /ok health check so the worker only reports ready once the warm-up has finished."""
+    if not warmup_state["ready"]:
+        return JSONResponse({"ok": False, "warming_up": True}, status_code=503)
+    return JSONResponse({"ok": True, "warmup_ms": warmup_state["phases"], "warmup_error": warmup_state["error"]})
+
+async def conversation(request):
+    """
+    Returns the messages of a thread with its current trip and list, rebuilt from the checkpointed snapshot and edit log,
+    since the trip and list themselves are not part of the checkpointed state.
+    """
+    try:
+        state = await client.threads.get_state(request.path_params["thread_id"])
+    except NotFoundError:
+        return JSONResponse({"detail": "Thread not found"}, status_code=404)
+
+    values = state["values"] or {}
+    snapshot = values.get("list_snapshot")
+    current = materialize_or_snapshot(PackingList.model_validate(snapshot) if snapshot else None, values.get("list_edits", []))
+    return JSONResponse({
+        "messages": [
+            {"type": message["type"], "content": message["content"]}
+            for message in values.get("messages", []) if message["type"] in ["human", "ai"]
+        ],
+        **current.model_dump(mode="json")
+    })
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
+
+# Mounted next to the LangGraph API routes through the "http" section of langgraph.json; custom routes take precedence
+app = Starlette(
+    routes=[Route("/metrics", metrics), Route("/ok", ok), Route("/threads/{thread_id}/conversation", conversation)],
+    lifespan=lifespan
+)
\ No newline at end of file
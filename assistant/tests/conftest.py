@@ -0,0 +1,7 @@
+import os
+
+# Config refuses to load without a model; the tests never call one
+os.environ.setdefault("ASSISTANT_MODEL_PROVIDER", "test")
+os.environ.setdefault("ASSISTANT_MODEL_NAME", "test")
+os.environ.setdefault("ASSISTANT_MODEL_API_KEY", "test")
+os.environ["ASSISTANT_LIST_CACHE_REDIS_URI"] = ""
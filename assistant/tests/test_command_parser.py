@@ -0,0 +1,46 @@
+import pytest
+
+from src.models.category import Category
+from src.models.item import Item
+from src.utils.command_parser import parse_command
+
+CATEGORIES = [
+    Category(name="Clothing", items=[Item(name="Socks", quantity=7), Item(name="Salt and pepper", quantity=1)]),
+    Category(name="Toiletries", items=[Item(name="Toothbrush", quantity=1)]),
+]
+UNCATEGORIZED_ITEMS = [Item(name="Passport", quantity=1)]
+
+def parse(text: str):
+    return parse_command(text, CATEGORIES, UNCATEGORIZED_ITEMS)
+
+def test_add_one_item():
+    edits, reply = parse("add 2 pairs of sandals to Clothing")
+    assert [(e.operation, e.category_name, e.item_name, e.quantity) for e in edits] == [("add_item", "Clothing", "Sandals", 2)]
+    assert reply.startswith("Added 2 × Sandals to Clothing")
+
+@pytest.mark.parametrize("text", [
+    "add sandals and a hat to Clothing",
+    "add sandals, hat to Clothing",
+    "add sandals, a hat and a scarf to Clothing",
+    "add sandals & hat to Clothing",
+    "add sandals or flip flops to Clothing",
+    "add sandals plus a hat to Clothing",
+    "add sandals as well as a hat to Clothing",
+])
+def test_add_several_items_is_left_to_the_editor(text):
+    assert parse(text) is None
+
+def test_add_to_unknown_category_is_left_to_the_editor():
+    assert parse("add sunscreen to Beach gear") is None
+
+def test_remove_item_whose_name_has_a_conjunction():
+    edits, _ = parse("remove salt and pepper")
+    assert [(e.operation, e.category_name, e.item_name) for e in edits] == [("remove_item", "Clothing", "Salt and pepper")]
+
+def test_update_quantity():
+    edits, _ = parse("set socks to five")
+    assert [(e.operation, e.item_name, e.new_quantity) for e in edits] == [("update_item_quantity", "Socks", 5)]
+
+def test_move_item():
+    edits, _ = parse("move passport to Toiletries")
+    assert [(e.operation, e.category_name, e.new_category_name) for e in edits] == [("move_item", None, "Toiletries")]
@@ -0,0 +1,27 @@
+import asyncio
+import logging
+
+from src.utils.list_cache import ListCache
+from src.utils.metrics import LIST_CACHE_ERRORS
+
+class DownRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex):
+        raise ConnectionError("redis is down")
+
+def test_redis_failures_are_misses_that_are_logged_and_counted(caplog):
+    cache = ListCache(max_size=10, ttl=60)
+    cache.redis = DownRedis()
+    profile = ("lisbon", "short", [])
+    errors = {operation: LIST_CACHE_ERRORS.labels(operation=operation)._value.get() for operation in ("get", "set")}
+
+    with caplog.at_level(logging.WARNING, logger="src.utils.list_cache"):
+        assert asyncio.run(cache.get(profile)) is None
+        asyncio.run(cache.set(profile, {"duration": 3, "categories": [], "uncategorized_items": []}))
+
+    assert asyncio.run(cache.get(profile)) == {"duration": 3, "categories": [], "uncategorized_items": []}
+    assert [record.exc_info is not None for record in caplog.records] == [True, True]
+    assert LIST_CACHE_ERRORS.labels(operation="get")._value.get() == errors["get"] + 1
+    assert LIST_CACHE_ERRORS.labels(operation="set")._value.get() == errors["set"] + 1
@@ -0,0 +1,78 @@
+import asyncio
+
+from src.models.state import MainState
+from src.models.trip import Trip
+from src.models.category import Category
+from src.models.item import Item
+from src.graphs.creator.nodes import category_generator, list_merger
+from src.graphs.creator.nodes.category_generator import CategoryTask, CategoryItemsResponse
+
+TRIP = Trip(name="Trip to Lisbon", description="City break", start_date="2026-05-01", end_date="2026-05-05")
+
+class FakeLLM:
+    """Fills every category with one item, except the failing ones, which raise"""
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        prompt = messages[0].content[-1]["text"]
+        category = next(line.split(": ", 1)[1].strip() for line in prompt.splitlines() if "CATEGORY TO FILL" in line)
+        self.calls.append(category)
+        if category in self.failing:
+            raise ValueError("invalid structured output")
+        return CategoryItemsResponse(items=[Item(id=7, name=f"{category} item", quantity=1)])
+
+def generate(monkeypatch, names, failing=()):
+    llm = FakeLLM(failing)
+    streamed = []
+    monkeypatch.setattr(category_generator, "get_structured_llm", lambda *args: llm)
+    monkeypatch.setattr(category_generator, "get_stream_writer", lambda: streamed.append)
+
+    async def run():
+        return await asyncio.gather(*(
+            category_generator.category_generator_node(CategoryTask(category_name=name, planned_categories=names, trip_prompt="TRIP"))
+            for name in names
+        ))
+
+    return asyncio.run(run()), llm.calls, streamed
+
+def test_failing_category_is_left_out_after_a_retry(monkeypatch):
+    updates, calls, streamed = generate(monkeypatch, ["Clothing", "Electronics"], failing={"Electronics"})
+
+    assert calls.count("Electronics") == 2
+    assert updates[1] == {}
+    category = updates[0]["generated_categories"]["category"]
+    assert (category.name, [i.name for i in category.items], category.items[0].id) == ("Clothing", ["Clothing item"], None)
+    assert [s["category"]["name"] for s in streamed] == ["Clothing"]
+
+def test_merger_keeps_the_generated_categories_without_caching_a_partial_list(monkeypatch):
+    cached = []
+
+    async def cache_list(*args):
+        cached.append(args)
+
+    monkeypatch.setattr(list_merger, "cache_list", cache_list)
+    state = MainState(
+        trip=TRIP,
+        uncategorized_items=[],
+        planned_categories=["Clothing", "Electronics"],
+        generated_categories=[Category(name="Clothing", items=[Item(name="Socks", quantity=4)])]
+    )
+
+    update = asyncio.run(list_merger.list_merger_node(state))
+
+    assert [c.name for c in update["categories"]] == ["Clothing"]
+    assert cached == []
+
+def test_merger_generates_the_list_in_one_call_when_every_category_failed(monkeypatch):
+    async def list_generator_node(state):
+        return {"categories": [Category(name="Clothing")], "uncategorized_items": [], "messages": []}
+
+    monkeypatch.setattr(list_merger, "list_generator_node", list_generator_node)
+    state = MainState(trip=TRIP, uncategorized_items=[], planned_categories=["Clothing"], generated_categories=[])
+
+    update = asyncio.run(list_merger.list_merger_node(state))
+
+    assert [c.name for c in update["categories"]] == ["Clothing"]
+    assert update["planned_categories"] == [] and update["generated_categories"] == []
@@ -0,0 +1,62 @@
+import asyncio
+
+from langchain_core.messages import AIMessageChunk
+
+from src.graphs.creator.nodes import list_generator
+from src.graphs.creator.nodes.list_generator import ListGeneratorResponse
+from src.models.category import Category
+from src.models.item import Item
+
+RESPONSE = ListGeneratorResponse(
+    categories=[Category(id=3, name="Clothing", items=[Item(id=4, name="Socks", quantity=4)]), Category(name="Toiletries")],
+    uncategorized_items=[],
+    chat_response="Your list is ready!"
+)
+
+class FakeLLM:
+    """Streams the given events, then answers the single call with RESPONSE"""
+    def __init__(self, events):
+        self.events = events
+        self.invoked = 0
+
+    async def astream_events(self, messages, version):
+        for event in self.events:
+            yield event
+
+    async def ainvoke(self, messages):
+        self.invoked += 1
+        return RESPONSE.model_copy(deep=True)
+
+def stream(monkeypatch, events):
+    llm = FakeLLM(events)
+    written = []
+    monkeypatch.setattr(list_generator, "get_structured_llm", lambda *args: llm)
+    response = asyncio.run(list_generator.stream_list([], written.append))
+    return response, written, llm.invoked
+
+def start(run_id):
+    return {"event": "on_chain_start", "run_id": run_id, "data": {}}
+
+def chunk(text):
+    return {"event": "on_chat_model_stream", "run_id": "model", "data": {"chunk": AIMessageChunk(content=text)}}
+
+def test_streamed_output_is_used_without_a_second_call(monkeypatch):
+    end = {"event": "on_chain_end", "run_id": "root", "data": {"output": RESPONSE.model_copy(deep=True)}}
+    response, written, invoked = stream(monkeypatch, [start("root"), end])
+
+    assert invoked == 0
+    assert response.chat_response == "Your list is ready!"
+    assert [w["category"]["name"] for w in written] == ["Clothing", "Toiletries"]
+
+def test_stream_without_a_final_output_falls_back_to_a_single_call(monkeypatch):
+    streamed = '{"categories": [{"name": "Clothing", "items": []}, {"name": "Gear", "items": []}, {"name": "Toil'
+    response, written, invoked = stream(monkeypatch, [start("root"), chunk(streamed), {"event": "on_chain_end", "run_id": "parser", "data": {"output": {}}}])
+
+    assert invoked == 1
+    assert [c.name for c in response.categories] == ["Clothing", "Toiletries"]
+    assert written[:2] == [{"category": Category(name="Clothing").model_dump()}, {"category": Category(name="Gear").model_dump()}]
+    assert written[2:] == [
+        {"removed_category": "Gear"},
+        {"category": Category(name="Clothing", items=[Item(name="Socks", quantity=4)]).model_dump()},
+        {"category": Category(name="Toiletries").model_dump()}
+    ]
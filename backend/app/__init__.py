@@ -1,10 +1,14 @@
-from quart import Quart, abort, g, current_app, request
+import asyncio
+from quart import Quart, Response, abort, g, current_app, request
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from quart_schema import QuartSchema
 from quart_cors import cors
 from supabase import acreate_client, AsyncClientOptions
 
 from .config import Config
 from .utils.auth import CustomOpenAPIProvider
+from .utils.assistant_client import assistant_client
+from .utils.sessions import run_thread_sweeper
 
 def create_app():
     """Create and configure the Flask application"""
@@ -42,19 +46,39 @@ def create_app():
             abort(500, description="Failed to connect to database")
     
     # Register blueprints
-    from app.routes import trips, items, categories, assistant
+    from app.routes import trips, items, categories, assistant, sync
     app.register_blueprint(trips.bp)
     app.register_blueprint(items.bp)
     app.register_blueprint(categories.bp)
     app.register_blueprint(assistant.bp)
+    app.register_blueprint(sync.bp)
 
-    # Health check endpoint
+    # Stale assistant sessions are swept in the background rather than deleted on every start
+    @app.before_serving
+    async def start_thread_sweeper():
+        if Config.ASSISTANT_SESSION_SWEEP_INTERVAL_SECONDS > 0:
+            app.thread_sweeper = asyncio.create_task(run_thread_sweeper())
+
+    @app.after_serving
+    async def stop_thread_sweeper():
+        sweeper = getattr(app, "thread_sweeper", None)
+        if sweeper is not None:
+            sweeper.cancel()
+
+    # Health check endpoint; degraded (but still serving the non-assistant routes) while the circuit to the assistant is open
     @app.get("/health")
     async def health_check():
         try:
-            return {"status": "ok"}, 200
+            assistant = assistant_client.health()
+            status = "ok" if assistant["circuit"] == "closed" else "degraded"
+            return {"status": status, "assistant": assistant}, 200
         except Exception:
             return {"status": "unhealthy"}, 500
+
+    # Prometheus metrics endpoint
+    @app.get("/metrics")
+    async def metrics():
+        return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
     
     return app
 
@@ -14,6 +14,62 @@ class Config:
 
     # Assistant config
     ASSISTANT_API_URL = os.getenv('BACKEND_ASSISTANT_API_URL')
+    # Sent as x-api-key to a deployed assistant, read from the same variables as the SDK's get_client
+    ASSISTANT_API_KEY = os.getenv('LANGGRAPH_API_KEY') or os.getenv('LANGSMITH_API_KEY') or os.getenv('LANGCHAIN_API_KEY')
+
+    # Connection to the assistant server: pool limits, timeouts (control calls vs. the gap between run events
+    # and the overall wait for a run), retries of idempotent thread calls, and the circuit breaker
+    ASSISTANT_POOL_MAX_CONNECTIONS = int(os.getenv('BACKEND_ASSISTANT_POOL_MAX_CONNECTIONS', 64))
+    ASSISTANT_POOL_MAX_KEEPALIVE = int(os.getenv('BACKEND_ASSISTANT_POOL_MAX_KEEPALIVE', 32))
+    ASSISTANT_POOL_KEEPALIVE_SECONDS = float(os.getenv('BACKEND_ASSISTANT_POOL_KEEPALIVE_SECONDS', 30))
+    ASSISTANT_CONNECT_TIMEOUT_SECONDS = float(os.getenv('BACKEND_ASSISTANT_CONNECT_TIMEOUT_SECONDS', 2))
+    ASSISTANT_CONTROL_TIMEOUT_SECONDS = float(os.getenv('BACKEND_ASSISTANT_CONTROL_TIMEOUT_SECONDS', 5))
+    ASSISTANT_RUN_READ_TIMEOUT_SECONDS = float(os.getenv('BACKEND_ASSISTANT_RUN_READ_TIMEOUT_SECONDS', 60))
+    ASSISTANT_RUN_TIMEOUT_SECONDS = float(os.getenv('BACKEND_ASSISTANT_RUN_TIMEOUT_SECONDS', 120))
+    ASSISTANT_RETRY_ATTEMPTS = int(os.getenv('BACKEND_ASSISTANT_RETRY_ATTEMPTS', 3))
+    ASSISTANT_RETRY_BASE_BACKOFF_SECONDS = float(os.getenv('BACKEND_ASSISTANT_RETRY_BASE_BACKOFF_SECONDS', 0.2))
+    ASSISTANT_RETRY_MAX_BACKOFF_SECONDS = float(os.getenv('BACKEND_ASSISTANT_RETRY_MAX_BACKOFF_SECONDS', 2))
+    ASSISTANT_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('BACKEND_ASSISTANT_CIRCUIT_FAILURE_THRESHOLD', 5))
+    ASSISTANT_CIRCUIT_RESET_SECONDS = float(os.getenv('BACKEND_ASSISTANT_CIRCUIT_RESET_SECONDS', 15))
+
+    # Admission control for assistant runs (per worker): runs in flight, requests allowed to wait for one,
+    # how long they may wait, and what happens to a new message while the thread is busy
+    # (reject | enqueue | interrupt, as in LangGraph's multitask strategies)
+    ASSISTANT_MAX_ACTIVE_RUNS = int(os.getenv('BACKEND_ASSISTANT_MAX_ACTIVE_RUNS', 16))
+    ASSISTANT_MAX_QUEUED_RUNS = int(os.getenv('BACKEND_ASSISTANT_MAX_QUEUED_RUNS', 64))
+    ASSISTANT_QUEUE_TIMEOUT_SECONDS = float(os.getenv('BACKEND_ASSISTANT_QUEUE_TIMEOUT_SECONDS', 30))
+    ASSISTANT_MULTITASK_STRATEGY = os.getenv('BACKEND_ASSISTANT_MULTITASK_STRATEGY', 'reject')
+
+    # Assistant sessions (one thread per trip or new-trip draft): threads not updated for the TTL are deleted
+    # by a background sweep every interval (0 disables the sweep), a batch of threads at a time
+    ASSISTANT_SESSION_TTL_SECONDS = int(os.getenv('BACKEND_ASSISTANT_SESSION_TTL_SECONDS', 14 * 24 * 3600))
+    ASSISTANT_SESSION_SWEEP_INTERVAL_SECONDS = int(os.getenv('BACKEND_ASSISTANT_SESSION_SWEEP_INTERVAL_SECONDS', 3600))
+    ASSISTANT_SESSION_SWEEP_BATCH_SIZE = int(os.getenv('BACKEND_ASSISTANT_SESSION_SWEEP_BATCH_SIZE', 100))
+
+    # Optional Redis shared by all workers (stream replay buffer, idempotency keys); in-memory per worker when unset
+    REDIS_URI = os.getenv('BACKEND_REDIS_URI')
+
+    # Resumable chat streams: events kept per thread, how long they are kept, threads kept per worker (in memory,
+    # without Redis), and how long an abandoned run keeps going before it is cancelled, giving the client time to reconnect
+    STREAM_BUFFER_SIZE = int(os.getenv('BACKEND_STREAM_BUFFER_SIZE', 1024))
+    STREAM_BUFFER_MAX_THREADS = int(os.getenv('BACKEND_STREAM_BUFFER_MAX_THREADS', 10000))
+    STREAM_BUFFER_TTL_SECONDS = int(os.getenv('BACKEND_STREAM_BUFFER_TTL_SECONDS', 600))
+    STREAM_RESUME_GRACE_SECONDS = int(os.getenv('BACKEND_STREAM_RESUME_GRACE_SECONDS', 30))
+
+    # Idempotency-Key support on mutating routes: how long the first response is replayed, keys kept per worker
+    # (in memory, without Redis), how long a duplicate waits for the first request, and how long a worker may hold a key
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv('BACKEND_IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv('BACKEND_IDEMPOTENCY_MAX_KEYS', 10000))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('BACKEND_IDEMPOTENCY_WAIT_SECONDS', 10))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('BACKEND_IDEMPOTENCY_LOCK_SECONDS', 60))
+
+    # Single-flight coalescing: identical concurrent GETs of a user, and auth calls with the same token, share one call;
+    # users whose last write is remembered per worker, so their reads never join a flight from before it
+    COALESCE_READS = os.getenv('BACKEND_COALESCE_READS', 'true').lower() == 'true'
+    COALESCE_MAX_WRITERS = int(os.getenv('BACKEND_COALESCE_MAX_WRITERS', 10000))
+
+    # Offline sync: most client operations applied in one batch (one database transaction)
+    SYNC_MAX_OPERATIONS = int(os.getenv('BACKEND_SYNC_MAX_OPERATIONS', 500))
 
     required = [SUPABASE_URL, SUPABASE_KEY, SECRET_KEY, ASSISTANT_API_URL]
 
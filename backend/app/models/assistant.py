@@ -1,6 +1,6 @@
 from datetime import date
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel
 
@@ -22,32 +22,42 @@ class AssistantTrip(BaseModel):
     start_date: Optional[date] = None
     end_date: Optional[date] = None
 
+class ChatAssistantMessageRole(str, Enum):
+    HUMAN = "human"
+    AI = "ai"
+
+class ChatAssistantMessage(BaseModel):
+    type: ChatAssistantMessageRole
+    content: str
+
 class StartAssistantQuery(BaseModel):
     trip_id: Optional[int] = None
+    session_id: Optional[str] = None
+    restart: bool = False
 
 class StartAssistantResponse(BaseModel):
+    session_id: str
+    resumed: bool = False
     message: str
+    messages: List[ChatAssistantMessage] = []
     trip: AssistantTrip
     categories: List[AssistantCategory]
     uncategorized_items: List[AssistantItem]
 
 class ChatAssistantRequest(BaseModel):
+    session_id: str
     user_msg: str
-    trip: AssistantTrip
-    categories: List[AssistantCategory]
-    uncategorized_items: List[AssistantItem]
+    # Only sent when the user changed the trip or list since the assistant last sent it
+    trip: Optional[AssistantTrip] = None
+    categories: Optional[List[AssistantCategory]] = None
+    uncategorized_items: Optional[List[AssistantItem]] = None
 
 class ChatAssistantResponseMode(str, Enum):
     MESSAGE = "message"
     VALUES = "values"
-
-class ChatAssistantMessageRole(str, Enum):
-    HUMAN = "human"
-    AI = "ai"
-
-class ChatAssistantMessage(BaseModel):
-    type: ChatAssistantMessageRole
-    content: str
+    CATEGORY = "category"
+    REMOVED_CATEGORY = "removed_category"
+    ERROR = "error"
 
 class ChatAssistantValues(BaseModel):
     messages: List[ChatAssistantMessage]
@@ -55,10 +65,28 @@ class ChatAssistantValues(BaseModel):
     categories: List[AssistantCategory]
     uncategorized_items: List[AssistantItem]
 
+class AssistantLLMCallMetrics(BaseModel):
+    node: str
+    model: str
+    ttft_ms: float
+    latency_ms: float
+    input_tokens: int
+    output_tokens: int
+
+class AssistantRunMetrics(BaseModel):
+    duration_ms: float
+    nodes: Dict[str, float]
+    llm_calls: List[AssistantLLMCallMetrics]
+    input_tokens: int
+    output_tokens: int
+    retries: int
+    fallback: bool
+
 class ChatAssistantResponse(BaseModel):
     done: bool = False
     mode: ChatAssistantResponseMode
-    content: Union[str, ChatAssistantValues]
+    content: Union[str, ChatAssistantValues, AssistantCategory]
+    metrics: Optional[AssistantRunMetrics] = None
 
 class AcceptAssistantRequest(BaseModel):
     trip: AssistantTrip
@@ -5,6 +5,7 @@ class Category(BaseModel):
     id: int
     trip_id: int
     name: str
+    version: int = 1
 
 class CreateCategoryReqeust(BaseModel):
     trip_id: int
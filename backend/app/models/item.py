@@ -3,6 +3,9 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
+from .category import Category
+from .trip import Trip
+
 class ItemOrigin(str, Enum):
     LISTED = "listed"
     PURCHASED = "purchased"
@@ -19,6 +22,7 @@ class Item(BaseModel):
     purchased_quantity: Optional[int] = None
     category_id: Optional[int] = None
     origin: ItemOrigin
+    version: int = 1
 
 class CreateItemRequest(BaseModel):
     trip_id: int
@@ -46,4 +50,36 @@ class ItemResponse(BaseModel):
     item: Item
 
 class ItemsResponse(BaseModel):
-    items: List[Item]
\ No newline at end of file
+    items: List[Item]
+
+class ItemSuggestionsQuery(BaseModel):
+    trip_id: Optional[int] = None
+    min_days: Optional[int] = None
+    max_days: Optional[int] = None
+    limit: int = 20
+
+class ItemSuggestion(BaseModel):
+    name: str
+    category_name: Optional[str] = None
+    times_listed: int
+    times_packed: int
+    times_returned: int
+    usual_quantity: int
+
+class ItemSuggestionsResponse(BaseModel):
+    suggestions: List[ItemSuggestion]
+
+class ItemSearchQuery(BaseModel):
+    q: str
+    limit: int = 20
+    offset: int = 0
+
+class ItemSearchResult(BaseModel):
+    item: Item
+    trip: Trip
+    category: Optional[Category] = None
+    rank: float
+
+class ItemSearchResponse(BaseModel):
+    results: List[ItemSearchResult]
+    has_more: bool
\ No newline at end of file
@@ -0,0 +1,63 @@
+from enum import Enum
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Union
+
+from .category import Category
+from .item import Item
+from .trip import Trip
+
+class SyncTable(str, Enum):
+    TRIPS = "trips"
+    CATEGORIES = "categories"
+    ITEMS = "items"
+
+class SyncAction(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+class SyncOperation(BaseModel):
+    # Unique per client operation; a retried operation with the same op_id is only applied once
+    op_id: str
+    table: SyncTable
+    action: SyncAction
+    # The row id, or the op_id of a create earlier in this or a previous batch (for update and delete)
+    id: Optional[Union[int, str]] = None
+    # The version of the row the client last saw (for update and delete)
+    base_version: Optional[int] = None
+    # The columns to write; trip_id and category_id may also be the op_id of a create
+    values: Dict[str, Any] = {}
+
+class SyncRequest(BaseModel):
+    # The cursor returned by the previous sync, or none for everything
+    cursor: Optional[int] = None
+    operations: List[SyncOperation] = []
+
+class SyncStatus(str, Enum):
+    APPLIED = "applied"
+    CONFLICT = "conflict"
+    REJECTED = "rejected"
+
+class SyncResult(BaseModel):
+    op_id: str
+    status: SyncStatus
+    id: Optional[int] = None
+    version: Optional[int] = None
+    # On a conflict, the server's row (none if it was deleted)
+    row: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class SyncDeleted(BaseModel):
+    table: SyncTable
+    id: int
+
+class SyncChanges(BaseModel):
+    trips: List[Trip] = []
+    categories: List[Category] = []
+    items: List[Item] = []
+    deleted: List[SyncDeleted] = []
+
+class SyncResponse(BaseModel):
+    results: List[SyncResult]
+    changes: SyncChanges
+    cursor: int
\ No newline at end of file
@@ -21,6 +21,7 @@ class Trip(BaseModel):
     start_date: str
     end_date: str
     status: TripStatus
+    version: int = 1
 
 class CreateTripRequest(BaseModel):
     name: str
@@ -35,6 +36,12 @@ class UpdateTripRequest(BaseModel):
     end_date: Optional[str] = None
     status: Optional[TripStatus] = None
 
+class DuplicateTripRequest(BaseModel):
+    name: Optional[str] = None
+    start_date: Optional[str] = None
+    reset_quantities: bool = True
+    include_purchased: bool = False
+
 class TripResponse(BaseModel):
     trip: Trip
 
@@ -1,9 +1,17 @@
-from quart import Response, Blueprint, g, abort
+import asyncio
+from contextlib import aclosing
+
+import httpx
+from quart import Response, Blueprint, g, abort, request
 from quart_schema import validate_querystring, validate_request, validate_response
 
-from ..models.assistant import AssistantTrip, AssistantCategory, AssistantItem, StartAssistantQuery, StartAssistantResponse, ChatAssistantRequest, ChatAssistantResponse, ChatAssistantResponseMode, ChatAssistantValues, AcceptAssistantRequest, AcceptAssistantResponse
+from ..models.assistant import AssistantTrip, AssistantCategory, AssistantItem, StartAssistantQuery, StartAssistantResponse, ChatAssistantRequest, ChatAssistantResponse, ChatAssistantResponseMode, ChatAssistantValues, ChatAssistantMessage, ChatAssistantMessageRole, AcceptAssistantRequest, AcceptAssistantResponse
 from ..utils.auth import login_required
-from ..utils.assistant import assistant_trip_mapper, assistant_categories_mapper, assistant_uncategorized_items_mapper, start_assistant as start_assistant_service, call_assistant as call_assistant_service
+from ..utils.assistant import assistant_trip_mapper, assistant_categories_mapper, assistant_uncategorized_items_mapper, start_assistant as start_assistant_service, call_assistant as call_assistant_service, resume_assistant as resume_assistant_service, watch_abandoned_run
+from ..utils.stream_buffer import replay_buffer
+from ..utils.admission import admission, AdmissionRejected
+from ..utils.assistant_client import assistant_client, AssistantUnavailable
+from ..utils.sessions import THREAD_METADATA, trip_session_id, new_session_id, session_thread_id
 
 bp = Blueprint('assistant', __name__, url_prefix='/assistant')
 
@@ -12,9 +20,16 @@ bp = Blueprint('assistant', __name__, url_prefix='/assistant')
 @validate_querystring(StartAssistantQuery)
 @validate_response(StartAssistantResponse, status_code=200)
 async def start_assistant(query_args: StartAssistantQuery):
-    """Start the assistant for the current user"""
+    """Start the assistant for the current user, or reopen its session for the trip"""
     user = g.user
 
+    # An existing trip has one session; planning a new trip starts a new session unless the client resumes one
+    if query_args.trip_id:
+        session_id = trip_session_id(query_args.trip_id)
+    else:
+        session_id = query_args.session_id or new_session_id()
+    thread_id = session_thread_id(user.id, session_id)
+
     trip = AssistantTrip()
     categories = []
     uncategorized_items = []
@@ -55,22 +70,45 @@ async def start_assistant(query_args: StartAssistantQuery):
         uncategorized_items = assistant_uncategorized_items_mapper(uncategorized_items.data)
         
 
+    try:
+        assistant_client.ensure_available()
+        started_at = await admission.acquire(thread_id)
+    except (AssistantUnavailable, AdmissionRejected) as e:
+        return e.response()
+
     try:
         response = await start_assistant_service(
-            thread_id=user.id,
+            thread_id=thread_id,
             trip=trip,
             categories=categories,
-            uncategorized_items=uncategorized_items
+            uncategorized_items=uncategorized_items,
+            metadata={**THREAD_METADATA, "user_id": user.id, "session_id": session_id},
+            restart=query_args.restart
         )
-        
+
+        # A reopened trip shows the saved list, which may have changed since the conversation;
+        # the next message sends it to the assistant with the rest of the request
+        if response["resumed"] and query_args.trip_id:
+            response["trip"] = trip
+            response["categories"] = categories
+            response["uncategorized_items"] = uncategorized_items
+
+        messages = [ChatAssistantMessage.model_validate(message) for message in response["messages"]]
         return StartAssistantResponse(
-            message=str(response["greeting_message"]),
+            session_id=session_id,
+            resumed=response["resumed"],
+            message=next((m.content for m in reversed(messages) if m.type == ChatAssistantMessageRole.AI), ""),
+            messages=messages,
             trip=AssistantTrip.model_validate(response["trip"]),
             categories=[AssistantCategory.model_validate(category) for category in response["categories"]],
             uncategorized_items=[AssistantItem.model_validate(item) for item in response["uncategorized_items"]]
         )
+    except AssistantUnavailable as e:
+        return e.response()
     except Exception as e:
         abort(500, description=f"Internal Assistant Error: {e}")
+    finally:
+        admission.release(thread_id, started_at)
     
 
 @bp.route('/chat', methods=['POST'])
@@ -78,43 +116,137 @@ async def start_assistant(query_args: StartAssistantQuery):
 @validate_request(ChatAssistantRequest)
 async def chat_assistant(data: ChatAssistantRequest):
     user = g.user
+    thread_id = session_thread_id(user.id, data.session_id)
+
+    # A client that lost the stream reconnects with the id of the last event it received
+    resume_after = None
+    last_event_id = request.headers.get("Last-Event-ID")
+    if last_event_id:
+        resume_run_id, _, seq = last_event_id.rpartition(":")
+        if not seq.isdigit():
+            abort(409, description="The assistant stream can no longer be resumed")
+        resume_after = int(seq)
 
     async def generate_response():
-        async for mode, chunk in call_assistant_service(
-            thread_id=user.id,
-            user_msg=data.user_msg,
-            trip=data.trip,
-            categories=data.categories,
-            uncategorized_items=data.uncategorized_items
-        ):
-            res = None
-            if mode == "messages":
-                res = ChatAssistantResponse(
-                    mode=ChatAssistantResponseMode.MESSAGE,
-                    content=chunk
-                )   
-            elif mode == "values":
-                res = ChatAssistantResponse(
-                    mode=ChatAssistantResponseMode.VALUES,
-                    content=ChatAssistantValues(
-                        messages=chunk["messages"],
-                        trip=chunk["trip"],
-                        categories=chunk["categories"],
-                        uncategorized_items=chunk["uncategorized_items"]
-                    )
+        cursor = {}
+        run_id = None
+        generation = 0
+        metrics = None
+
+        async def send(res: ChatAssistantResponse):
+            payload = res.model_dump_json()
+            seq = await replay_buffer.append(thread_id, payload, cursor, done=res.done)
+            return f"id: {run_id}:{seq}\ndata: {payload}\n\n"
+
+        def error(message: str) -> str:
+            res = ChatAssistantResponse(done=True, mode=ChatAssistantResponseMode.ERROR, content=message)
+            return f"data: {res.model_dump_json()}\n\n"
+
+        # Resuming joins a run that already holds a slot, so only new runs go through admission control
+        started_at = None
+        if resume_after is None:
+            assistant_client.ensure_available()
+            started_at = await admission.acquire(thread_id)
+        else:
+            # The buffer may have expired, moved on to another run, or dropped events the client has not seen;
+            # the events are read first, so a matching run id afterwards means they are that run's
+            missed = await replay_buffer.events_after(thread_id, resume_after)
+            state = await replay_buffer.get(thread_id)
+            if state is None or state["run_id"] != resume_run_id or missed is None:
+                abort(409, description="The assistant stream can no longer be resumed")
+
+        try:
+            # Admitted: the route takes this first chunk itself before returning the response
+            yield ""
+
+            if resume_after is not None:
+                generation = await replay_buffer.attach(thread_id)
+                run_id = state["run_id"]
+                cursor = state["cursor"]
+                for seq, payload in missed:
+                    yield f"id: {run_id}:{seq}\ndata: {payload}\n\n"
+                if state["done"]:
+                    return
+                events = resume_assistant_service(thread_id, cursor)
+            else:
+                events = call_assistant_service(
+                    thread_id=thread_id,
+                    user_msg=data.user_msg,
+                    trip=data.trip,
+                    categories=data.categories,
+                    uncategorized_items=data.uncategorized_items,
+                    cursor=cursor
                 )
-            
-            if res:
-                yield f"data: {res.model_dump_json()}\n\n"
-
-        done_res = ChatAssistantResponse(
-            done=True,
-            mode=ChatAssistantResponseMode.MESSAGE,
-            content=""
-        )
-        yield f"data: {done_res.model_dump_json()}\n\n"
 
-    return Response(generate_response(), mimetype='text/event-stream')
+            async with aclosing(events):
+                async for mode, chunk in events:
+                    res = None
+                    if mode == "run":
+                        run_id = chunk
+                        await replay_buffer.start(thread_id, run_id)
+                        generation = await replay_buffer.attach(thread_id)
+                    elif mode == "messages":
+                        res = ChatAssistantResponse(
+                            mode=ChatAssistantResponseMode.MESSAGE,
+                            content=chunk
+                        )   
+                    elif mode == "category":
+                        res = ChatAssistantResponse(
+                            mode=ChatAssistantResponseMode.CATEGORY,
+                            content=chunk
+                        )
+                    elif mode == "removed_category":
+                        res = ChatAssistantResponse(
+                            mode=ChatAssistantResponseMode.REMOVED_CATEGORY,
+                            content=chunk
+                        )
+                    elif mode == "values":
+                        res = ChatAssistantResponse(
+                            mode=ChatAssistantResponseMode.VALUES,
+                            content=ChatAssistantValues(
+                                messages=chunk["messages"],
+                                trip=chunk["trip"],
+                                categories=chunk["categories"],
+                                uncategorized_items=chunk["uncategorized_items"]
+                            )
+                        )
+                    elif mode == "metrics":
+                        metrics = chunk
+                    
+                    if res:
+                        yield await send(res)
+
+            done_res = ChatAssistantResponse(
+                done=True,
+                mode=ChatAssistantResponseMode.MESSAGE,
+                content="",
+                metrics=metrics
+            )
+            yield await send(done_res)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 409:
+                raise
+            # The thread still has a run upstream, e.g. the one of a client that went away and is not cancelled yet
+            yield error("The assistant is still answering your previous message")
+        except AssistantUnavailable as e:
+            yield error(e.message)
+        except (asyncio.CancelledError, GeneratorExit):
+            # the client went away mid-turn; give it time to reconnect before the run is cancelled
+            if run_id:
+                watch_abandoned_run(thread_id, run_id, generation, cursor.get("streamed_tokens", 0))
+            raise
+        finally:
+            if started_at is not None:
+                admission.release(thread_id, started_at)
+
+    # The response is started here, up to its admission (or the checks of a resume), so a rejected request still gets its status code, and
+    # a slot once taken is always given back: a started generator runs its finally even if it is dropped unsent
+    response = generate_response()
+    try:
+        await anext(response)
+    except (AssistantUnavailable, AdmissionRejected) as e:
+        return e.response()
+    return Response(response, mimetype='text/event-stream')
 
 @bp.route('/accept', methods=['POST'])
 @login_required
@@ -4,11 +4,13 @@ from quart_schema import validate_request, validate_response
 from ..models.category import CategoryResponse, CreateCategoryReqeust, UpdateCategoryRequest
 from ..models.message_response import MessageResponse
 from ..utils.auth import login_required
+from ..utils.idempotency import idempotent
 
 bp = Blueprint('categories', __name__, url_prefix='/categories')
 
 @bp.route('', methods=['POST'])
 @login_required
+@idempotent
 @validate_request(CreateCategoryReqeust)
 @validate_response(CategoryResponse, status_code=201)
 async def create_category(data: CreateCategoryReqeust):
@@ -1,12 +1,79 @@
+from datetime import date
 from quart import Blueprint, g, abort
-from quart_schema import validate_request, validate_response
+from quart_schema import validate_request, validate_response, validate_querystring
 
-from ..models.item import CreateItemRequest, ItemOrigin, ItemResponse, PackedRequest, UpdateItemRequest, ReturningRequest
+from ..models.item import CreateItemRequest, ItemOrigin, ItemResponse, ItemSearchQuery, ItemSearchResponse, ItemSuggestionsQuery, ItemSuggestionsResponse, PackedRequest, UpdateItemRequest, ReturningRequest
 from ..models.message_response import MessageResponse
 from ..utils.auth import login_required
+from ..utils.idempotency import idempotent
 
 bp = Blueprint('items', __name__, url_prefix='/items')
 
+@bp.route('/suggestions', methods=['GET'])
+@login_required
+@validate_querystring(ItemSuggestionsQuery)
+@validate_response(ItemSuggestionsResponse, status_code=200)
+async def get_item_suggestions(query_args: ItemSuggestionsQuery):
+    """Get the items the current user packs most often on completed trips of a similar length
+
+    With a trip_id, the length defaults to between half and double that trip's length and the items
+    already on the trip are left out.
+    """
+    user = g.user
+    min_days = query_args.min_days
+    max_days = query_args.max_days
+
+    if query_args.trip_id:
+        # Check if trip exists
+        trip = await g.supabase\
+            .table('trips')\
+            .select('start_date', 'end_date') \
+            .eq('id', query_args.trip_id) \
+            .eq('user_id', user.id) \
+            .execute()
+
+        if not trip.data:
+            abort(404, "Trip not found")
+
+        days = (date.fromisoformat(trip.data[0]['end_date']) - date.fromisoformat(trip.data[0]['start_date'])).days
+        min_days = days // 2 if min_days is None else min_days
+        max_days = days * 2 if max_days is None else max_days
+
+    # Aggregated in the database from the user's incrementally refreshed item history
+    suggestions = await g.supabase.rpc('item_suggestions', {
+        'p_user_id': user.id,
+        'p_min_days': min_days,
+        'p_max_days': max_days,
+        'p_exclude_trip_id': query_args.trip_id,
+        'p_limit': max(1, min(query_args.limit, 100))
+    }).execute()
+
+    return ItemSuggestionsResponse(suggestions=suggestions.data)
+
+@bp.route('/search', methods=['GET'])
+@login_required
+@validate_querystring(ItemSearchQuery)
+@validate_response(ItemSearchResponse, status_code=200)
+async def search_items(query_args: ItemSearchQuery):
+    """Search the items of all the current user's trips by name and notes, best match first, with their trip and category"""
+    user = g.user
+
+    # A trigram index cannot narrow a shorter query down, so it would scan every item
+    query = query_args.q.strip()
+    if len(query) < 3:
+        abort(400, "Search query must be at least 3 characters")
+    limit = max(1, min(query_args.limit, 100))
+
+    # Ranked in the database over the trigram indexes; one extra row tells whether there is another page
+    results = await g.supabase.rpc('search_items', {
+        'p_user_id': user.id,
+        'p_query': query,
+        'p_limit': limit + 1,
+        'p_offset': max(0, query_args.offset)
+    }).execute()
+
+    return ItemSearchResponse(results=results.data[:limit], has_more=len(results.data) > limit)
+
 @bp.route('/<item_id>', methods=['GET'])
 @login_required
 @validate_response(ItemResponse, status_code=200)
@@ -60,6 +127,7 @@ async def delete_item(item_id: str):
     
 @bp.route('', methods=['POST'])
 @login_required
+@idempotent
 @validate_request(CreateItemRequest)
 @validate_response(ItemResponse, status_code=201)
 async def create_item(data: CreateItemRequest):
@@ -144,6 +212,7 @@ async def update_item(item_id: str, data: UpdateItemRequest):
   
 @bp.route('/<item_id>/mark-as-packed', methods=['PUT'])
 @login_required
+@idempotent
 @validate_request(PackedRequest)
 @validate_response(ItemResponse, status_code=200)
 async def mark_as_packed(item_id: str, data: PackedRequest):
@@ -197,6 +266,7 @@ async def mark_as_packed(item_id: str, data: PackedRequest):
 
 @bp.route('/<item_id>/mark-as-returning', methods=['PUT'])
 @login_required
+@idempotent
 @validate_request(ReturningRequest)
 @validate_response(ItemResponse, status_code=200)
 async def mark_as_returning(item_id: str, data: ReturningRequest):
@@ -252,6 +322,7 @@ async def mark_as_returning(item_id: str, data: ReturningRequest):
 
 @bp.route('/<item_id>/unmark-as-packed', methods=['PUT'])
 @login_required
+@idempotent
 @validate_request(PackedRequest)
 @validate_response(ItemResponse, status_code=200)
 async def unmark_as_packed(item_id: str, data: PackedRequest):
@@ -305,6 +376,7 @@ async def unmark_as_packed(item_id: str, data: PackedRequest):
 
 @bp.route('/<item_id>/unmark-as-returning', methods=['PUT'])
 @login_required
+@idempotent
 @validate_request(ReturningRequest)
 @validate_response(ItemResponse, status_code=200)
 async def unmark_as_returning(item_id: str, data: ReturningRequest):
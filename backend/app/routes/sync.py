@@ -0,0 +1,32 @@
+from quart import Blueprint, g, abort
+from quart_schema import validate_request, validate_response
+
+from ..config import Config
+from ..models.sync import SyncRequest, SyncResponse
+from ..utils.auth import login_required
+
+bp = Blueprint('sync', __name__, url_prefix='/sync')
+
+@bp.route('', methods=['POST'])
+@login_required
+@validate_request(SyncRequest)
+@validate_response(SyncResponse, status_code=200)
+async def sync(data: SyncRequest):
+    """Apply a batch of operations queued by an offline client and return what changed since its cursor
+
+    The operations are applied in order in one transaction. An update or delete whose base_version is not
+    the row's current version is a conflict and is not applied; its result carries the server's row.
+    """
+    user = g.user
+
+    if len(data.operations) > Config.SYNC_MAX_OPERATIONS:
+        abort(413, f"At most {Config.SYNC_MAX_OPERATIONS} operations can be synced at once")
+
+    # Apply the operations and collect the changes in one postgres function
+    res = await g.supabase.rpc('sync', {
+        'p_user_id': user.id,
+        'p_cursor': data.cursor,
+        'p_operations': [operation.model_dump(mode='json') for operation in data.operations]
+    }).execute()
+
+    return SyncResponse(**res.data)
\ No newline at end of file
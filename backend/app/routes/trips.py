@@ -1,12 +1,14 @@
 from datetime import date
 from quart import Blueprint, g, abort
 from quart_schema import validate_request, validate_response, validate_querystring
+from postgrest.exceptions import APIError
 
 from ..models.category import CategoriesResponse
 from ..models.item import ItemsResponse
 from ..models.message_response import MessageResponse
-from ..models.trip import CreateTripRequest, TripResponse, TripStatusQuery, TripsResponse, UpdateTripRequest
+from ..models.trip import CreateTripRequest, DuplicateTripRequest, TripResponse, TripStatusQuery, TripsResponse, UpdateTripRequest
 from ..utils.auth import login_required
+from ..utils.idempotency import idempotent
 
 bp = Blueprint('trips', __name__, url_prefix='/trips')
 
@@ -62,6 +64,7 @@ async def get_trip(trip_id: str):
 
 @bp.route('', methods=['POST'])
 @login_required
+@idempotent
 @validate_request(CreateTripRequest)
 @validate_response(TripResponse, status_code=201)
 async def create_trip(data: CreateTripRequest):
@@ -163,6 +166,42 @@ async def delete_trip(trip_id: str):
     
     return MessageResponse(message="Trip deleted successfully")
 
+@bp.route('/<trip_id>/duplicate', methods=['POST'])
+@login_required
+@idempotent
+@validate_request(DuplicateTripRequest)
+@validate_response(TripResponse, status_code=201)
+async def duplicate_trip(trip_id: str, data: DuplicateTripRequest):
+    """Duplicate a specific trip of the current user with its categories and items, as a new trip to pack"""
+    user = g.user
+
+    # Validate start date
+    if data.start_date:
+        try:
+            if date.fromisoformat(data.start_date) < date.today():
+                abort(400, "Start date cannot be in the past")
+        except ValueError as e:
+            abort(400, "Invalid date - " + str(e))
+
+    # Copy the trip in one postgres function, whatever its number of items
+    try:
+        trip = await g.supabase.rpc('duplicate_trip', {
+            'p_user_id': user.id,
+            'p_trip_id': trip_id,
+            'p_name': data.name,
+            'p_start_date': data.start_date,
+            'p_reset_quantities': data.reset_quantities,
+            'p_include_purchased': data.include_purchased
+        }).execute()
+    except APIError as e:
+        if e.code == 'P0002':
+            abort(404, "Trip not found")
+        if e.code == '23505':
+            abort(409, "A trip with this name already exists")
+        abort(500, description="Failed to duplicate trip - " + str(e.message))
+
+    return TripResponse(trip=trip.data)
+
 @bp.route('/<trip_id>/items', methods=['GET'])
 @login_required
 @validate_response(ItemsResponse, status_code=200)
@@ -0,0 +1,129 @@
+import math
+import time
+import asyncio
+from collections import deque, Counter as Tally
+
+from prometheus_client import Counter, Gauge
+
+from ..config import Config
+
+QUEUE_DEPTH = Gauge("packpal_assistant_queue_depth", "Assistant requests waiting for a run slot")
+ACTIVE_RUNS = Gauge("packpal_assistant_active_runs", "Assistant runs holding a run slot")
+REJECTED = Counter("packpal_assistant_rejected", "Assistant requests rejected by admission control", ["reason"])
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the HTTP status and Retry-After to answer with"""
+    def __init__(self, message: str, status_code: int, retry_after: int = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def response(self):
+        headers = {"Retry-After": str(self.retry_after)} if self.retry_after else {}
+        return {"message": self.message}, self.status_code, headers
+
+class AdmissionController:
+    """Admission control for assistant runs in this worker
+
+    At most max_active runs hold a slot at once; up to max_queued more wait in FIFO order for at most
+    queue_timeout seconds, and anything beyond that is rejected with 429 and a Retry-After estimated
+    from recent run durations. With the "reject" multitask strategy a thread may only have one run.
+    """
+    def __init__(self, max_active: int, max_queued: int, queue_timeout: float, multitask_strategy: str):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.multitask_strategy = multitask_strategy
+        self.active = 0
+        self.waiters = deque()
+        self.threads = Tally()
+        # Exponentially weighted average run duration, used to estimate Retry-After
+        self.average_run_seconds = 10.0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.average_run_seconds * (len(self.waiters) + 1) / self.max_active))
+
+    def reject(self, reason: str, message: str, status_code: int, retry_after: int = None):
+        REJECTED.labels(reason=reason).inc()
+        raise AdmissionRejected(message, status_code, retry_after)
+
+    async def acquire(self, thread_id: str) -> float:
+        """Wait for a run slot for the thread
+
+        Args:
+            thread_id: The thread the run belongs to
+
+        Returns:
+            The time the slot was granted, to pass back to release
+
+        Raises:
+            AdmissionRejected: The thread already has a run (reject strategy), or the queue is full or timed out
+        """
+        if self.multitask_strategy == "reject" and self.threads[thread_id]:
+            self.reject("thread_busy", "The assistant is still answering your previous message", 409)
+
+        # The thread counts as busy while it waits, so a second message cannot slip in behind it
+        self.threads[thread_id] += 1
+        try:
+            await self.wait_for_slot()
+        except BaseException:
+            self.forget_thread(thread_id)
+            raise
+
+        ACTIVE_RUNS.set(self.active)
+        return time.monotonic()
+
+    async def wait_for_slot(self):
+        if self.active < self.max_active and not self.waiters:
+            self.active += 1
+            return
+
+        if len(self.waiters) >= self.max_queued:
+            self.reject("queue_full", "The assistant is busy, please try again shortly", 429, self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        QUEUE_DEPTH.set(len(self.waiters))
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.reject("queue_timeout", "The assistant is busy, please try again shortly", 429, self.retry_after())
+        except BaseException:
+            # a slot handed over just as the request was cancelled must be passed on
+            if waiter.done() and not waiter.cancelled():
+                self.hand_over()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            QUEUE_DEPTH.set(len(self.waiters))
+
+    def forget_thread(self, thread_id: str):
+        self.threads[thread_id] -= 1
+        if not self.threads[thread_id]:
+            del self.threads[thread_id]
+
+    def release(self, thread_id: str, started_at: float):
+        """Give back a slot taken with acquire"""
+        self.forget_thread(thread_id)
+        self.average_run_seconds = 0.8 * self.average_run_seconds + 0.2 * (time.monotonic() - started_at)
+        self.hand_over()
+        ACTIVE_RUNS.set(self.active)
+
+    def hand_over(self):
+        """Pass a freed slot to the oldest waiter still waiting, or free it"""
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                QUEUE_DEPTH.set(len(self.waiters))
+                return
+        self.active -= 1
+
+admission = AdmissionController(
+    max_active=Config.ASSISTANT_MAX_ACTIVE_RUNS,
+    max_queued=Config.ASSISTANT_MAX_QUEUED_RUNS,
+    queue_timeout=Config.ASSISTANT_QUEUE_TIMEOUT_SECONDS,
+    multitask_strategy=Config.ASSISTANT_MULTITASK_STRATEGY
+)
@@ -1,41 +1,68 @@
-from typing import List
-from langgraph_sdk import get_client
+import asyncio
+from contextlib import aclosing
+from typing import List, Optional
 from partial_json_parser import loads, Allow
 
 from ..config import Config
-from ..models.assistant import AssistantTrip, AssistantCategory, AssistantItem
+from .metrics import ABANDONED_RUNS, WASTED_OUTPUT_TOKENS
+from .stream_buffer import replay_buffer
+from .assistant_client import assistant_client, AssistantUnavailable
+from ..models.assistant import AssistantTrip, AssistantCategory, AssistantItem, AssistantRunMetrics
 
-client = get_client(url=Config.ASSISTANT_API_URL)
+STREAM_MODES = ["events", "values", "custom"]
 
 async def start_assistant(
     thread_id: str,
     trip: AssistantTrip = AssistantTrip(),
     categories: List[AssistantCategory] = [],
     uncategorized_items: List[AssistantItem] = [],
+    metadata: Optional[dict] = None,
+    restart: bool = False,
 ):
-    """Start the assistant for the current user
+    """Start the assistant in a thread, or reopen the conversation already checkpointed in it
     
     Args:
         thread_id: The thread id
         trip: The trip to start the assistant for
         categories: The categories for the trip
         uncategorized_items: The uncategorized items for the trip
+        metadata: Metadata for the thread if it has to be created
+        restart: Discard the conversation in the thread and start a new one
     
     Returns:
         {
-            "greeting_message": str,
+            "resumed": bool,
+            "messages": List[ChatAssistantMessage],
             "trip": AssistantTrip,
             "categories": List[AssistantCategory],
             "uncategorized_items": List[AssistantItem]
         }
     """
-    # if thread exists, delete it so a new conversation starts
-    try:
-        await client.threads.get(thread_id)
-        await client.threads.delete(thread_id)
-    except Exception:
-        pass
-    await client.threads.create(thread_id=thread_id)
+    if restart:
+        try:
+            await assistant_client.delete_thread(thread_id)
+        except AssistantUnavailable:
+            raise
+        except Exception:
+            pass
+    else:
+        # reopening a session is a single state read
+        try:
+            values = await assistant_client.get_conversation(thread_id)
+        except AssistantUnavailable:
+            raise
+        except Exception:
+            values = {}
+        if values.get("messages"):
+            return {
+                "resumed": True,
+                "messages": values["messages"],
+                "trip": values.get("trip"),
+                "categories": values.get("categories"),
+                "uncategorized_items": values.get("uncategorized_items")
+            }
+
+    await assistant_client.create_thread(thread_id, metadata=metadata)
 
     initial_values = {
         "trip": trip.model_dump() if hasattr(trip, 'model_dump') else trip,
@@ -44,14 +71,16 @@ async def start_assistant(
         "messages": []
     }
 
-    result = await client.runs.wait(
+    result = await assistant_client.wait_run(
         thread_id,
         "assistant",
-        input=initial_values
+        input=initial_values,
+        multitask_strategy=Config.ASSISTANT_MULTITASK_STRATEGY
     )
     
     return {
-        "greeting_message": result.get("messages")[-1].get("content"),
+        "resumed": False,
+        "messages": [msg for msg in result.get("messages") if msg["type"] in ["human", "ai"]],
         "trip": result.get("trip"),
         "categories": result.get("categories"),
         "uncategorized_items": result.get("uncategorized_items")
@@ -60,23 +89,26 @@ async def start_assistant(
 async def call_assistant(
     thread_id: str,
     user_msg: str, 
-    trip: AssistantTrip = AssistantTrip(), 
-    categories: List[AssistantCategory] = [], 
-    uncategorized_items: List[AssistantItem] = [], 
+    trip: Optional[AssistantTrip] = None, 
+    categories: Optional[List[AssistantCategory]] = None, 
+    uncategorized_items: Optional[List[AssistantItem]] = None, 
+    cursor: Optional[dict] = None,
 ):
     """Call the assistant for the current user
     
     Args:
         thread_id: The thread id
         user_msg: The user message
-        trip: The current trip
-        categories: The current categories
-        uncategorized_items: The current uncategorized items
+        trip: The current trip, if it changed since the assistant last sent it
+        categories: The current categories, if they changed since the assistant last sent them
+        uncategorized_items: The current uncategorized items, if they changed since the assistant last sent them
+        cursor: Filled in with the run id and the position reached in the run's stream, so a
+            dropped stream can be resumed with resume_assistant
     
     Returns:
         (
-            mode: messages | values,
-            content: str | {
+            mode: run | messages | values | category | removed_category | metrics,
+            content: str | AssistantCategory | AssistantRunMetrics | {
                 "messages": List[ChatAssistantMessage],
                 "trip": AssistantTrip,
                 "categories": List[AssistantCategory],
@@ -87,46 +119,159 @@ async def call_assistant(
     if not user_msg:
         raise ValueError("User message is required.")
 
-    input_data = {
-        "messages": [{"role": "user", "content": user_msg}],
-        "trip": trip.model_dump() if hasattr(trip, 'model_dump') else trip,
-        "categories": [c.model_dump() if hasattr(c, 'model_dump') else c for c in categories],
-        "uncategorized_items": [i.model_dump() if hasattr(i, 'model_dump') else i for i in uncategorized_items]
-    }
+    # Whatever is left out, the assistant rebuilds from its own checkpoint, which keeps the checkpointed input small
+    input_data = {"messages": [{"role": "user", "content": user_msg}]}
+    if trip is not None:
+        input_data["trip"] = trip.model_dump() if hasattr(trip, 'model_dump') else trip
+    if categories is not None:
+        input_data["categories"] = [c.model_dump() if hasattr(c, 'model_dump') else c for c in categories]
+    if uncategorized_items is not None:
+        input_data["uncategorized_items"] = [i.model_dump() if hasattr(i, 'model_dump') else i for i in uncategorized_items]
 
-    json_buffer = ""
-    last_sent_text = ""
+    cursor = {} if cursor is None else cursor
+    cursor.update(run_id=None, upstream_id=None, model_run_id=None, json_buffer="", last_sent_text="", streamed_tokens=0)
 
-    async for event in client.runs.stream(
+    stream = assistant_client.stream_run(
         thread_id,
         "assistant",
         input=input_data,
-        stream_mode=["events", "values"],
-    ):
-        mode = event.event
-        data = event.data
-
-        if mode == "events" and data.get("event") == "on_chat_model_stream":
-            token = data.get("data", {}).get("chunk", {}).get("content", "")
-            json_buffer += token
-
-            try:
-                parsed = loads(json_buffer, Allow.STR | Allow.OBJ)
-                current_text = parsed.get("chat_response", "")
-                if len(current_text) > len(last_sent_text):
-                    new_chars = current_text[len(last_sent_text):]
-                    yield "messages", new_chars
-                    last_sent_text = current_text
-            except Exception:
-                pass
-
-        elif mode == "values":
-            yield "values", {
-                "messages": [msg for msg in data.get("messages") if msg["type"] in ["human", "ai"]],
-                "trip": data.get("trip"),
-                "categories": data.get("categories"),
-                "uncategorized_items": data.get("uncategorized_items")
-            }
+        stream_mode=STREAM_MODES,
+        stream_subgraphs=True,
+        # the server keeps the stream so it can be joined again; abandoned runs are cancelled by cancel_if_abandoned
+        stream_resumable=True,
+        on_disconnect="continue",
+        # the server enforces the strategy across all backend workers
+        multitask_strategy=Config.ASSISTANT_MULTITASK_STRATEGY,
+    )
+    async with aclosing(parse_run_stream(stream, cursor)) as events:
+        async for mode, content in events:
+            yield mode, content
+
+async def resume_assistant(thread_id: str, cursor: dict):
+    """Rejoin a run whose stream was dropped, continuing after the position saved in the cursor
+    
+    Args:
+        thread_id: The thread id
+        cursor: The cursor filled in by call_assistant when the stream was dropped
+    
+    Returns:
+        The same (mode, content) pairs as call_assistant, except for the run mode
+    """
+    stream = assistant_client.join_run_stream(
+        thread_id,
+        cursor["run_id"],
+        stream_mode=STREAM_MODES,
+        last_event_id=cursor["upstream_id"],
+    )
+    async with aclosing(parse_run_stream(stream, cursor)) as events:
+        async for mode, content in events:
+            yield mode, content
+
+async def parse_run_stream(stream, cursor: dict):
+    """Translate the LangGraph stream of a run into chat events, keeping the cursor up to date"""
+    try:
+        async for event in stream:
+            # subgraph events are namespaced as "<mode>|<node>:<task id>"
+            mode, _, namespace = event.event.partition("|")
+            data = event.data
+            if event.id:
+                cursor["upstream_id"] = event.id
+
+            if mode == "metadata":
+                cursor["run_id"] = data.get("run_id")
+                yield "run", cursor["run_id"]
+
+            elif mode == "events" and data.get("event") == "on_chat_model_stream":
+                # providers stream about one token per chunk
+                cursor["streamed_tokens"] += 1
+                # model calls that are not a reply, like the history summary, are tagged nostream
+                if "nostream" in (data.get("tags") or []):
+                    continue
+                # each model call streams its own JSON object
+                if data.get("run_id") != cursor.get("model_run_id"):
+                    cursor.update(model_run_id=data.get("run_id"), json_buffer="", last_sent_text="")
+                token = data.get("data", {}).get("chunk", {}).get("content", "")
+                cursor["json_buffer"] += token
+
+                try:
+                    parsed = loads(cursor["json_buffer"], Allow.STR | Allow.OBJ)
+                    current_text = parsed.get("chat_response", "")
+                    if len(current_text) > len(cursor["last_sent_text"]):
+                        new_chars = current_text[len(cursor["last_sent_text"]):]
+                        cursor["last_sent_text"] = current_text
+                        yield "messages", new_chars
+                except Exception:
+                    pass
+
+            elif mode == "custom" and "category" in data:
+                yield "category", AssistantCategory.model_validate(data["category"])
+
+            elif mode == "custom" and "removed_category" in data:
+                yield "removed_category", data["removed_category"]
+
+            elif mode == "custom" and "run_metrics" in data:
+                yield "metrics", AssistantRunMetrics.model_validate(data["run_metrics"])
+
+            elif mode == "values" and not namespace:
+                # The trip and list are not checkpointed: until the load node rebuilds them, a run that was
+                # not sent the list has none in its values, and there is nothing to show the client yet
+                if data.get("trip") is None or data.get("categories") is None or data.get("uncategorized_items") is None:
+                    continue
+                yield "values", {
+                    "messages": [msg for msg in data.get("messages") if msg["type"] in ["human", "ai"]],
+                    "trip": data.get("trip"),
+                    "categories": data.get("categories"),
+                    "uncategorized_items": data.get("uncategorized_items")
+                }
+    finally:
+        await stream.aclose()
+
+# Strong references to the pending abandonment checks, so they are not garbage collected mid-sleep
+abandonment_checks = set()
+
+def watch_abandoned_run(thread_id: str, run_id: str, generation: int, streamed_tokens: int):
+    """Schedule cancel_if_abandoned in the background, outliving the disconnected request"""
+    task = asyncio.create_task(cancel_if_abandoned(thread_id, run_id, generation, streamed_tokens))
+    abandonment_checks.add(task)
+    task.add_done_callback(abandonment_checks.discard)
+
+async def cancel_if_abandoned(thread_id: str, run_id: str, generation: int, streamed_tokens: int):
+    """Cancel a run whose client disconnected, unless a client reconnects to it within the grace period
+    
+    Args:
+        thread_id: The thread id
+        run_id: The run the client was streaming
+        generation: The attach generation of the dropped connection; a reconnect increases it
+        streamed_tokens: The output tokens streamed before the client disconnected
+    """
+    await asyncio.sleep(Config.STREAM_RESUME_GRACE_SECONDS)
+    state = await replay_buffer.get(thread_id)
+    if state is None or state["run_id"] != run_id or state["generation"] != generation:
+        return
+
+    try:
+        run = await assistant_client.get_run(thread_id, run_id)
+    except Exception:
+        return
+    if run["status"] not in ("pending", "running"):
+        return
+
+    # no one is listening: stop the run so the model stops generating for no one
+    ABANDONED_RUNS.inc()
+    WASTED_OUTPUT_TOKENS.inc(streamed_tokens)
+    await cancel_run(thread_id, run_id)
+
+async def cancel_run(thread_id: str, run_id: str):
+    """Cancel a run, shielded so the cancellation of the calling request cannot interrupt it
+    
+    Args:
+        thread_id: The thread id
+        run_id: The run to cancel
+    """
+    try:
+        await asyncio.shield(assistant_client.cancel_run(thread_id, run_id))
+    except Exception:
+        pass
 
 def assistant_trip_mapper(trip: dict) -> AssistantTrip:
     return AssistantTrip(
@@ -0,0 +1,229 @@
+import time
+import random
+import asyncio
+from contextlib import aclosing
+
+import httpx
+import langgraph_sdk
+from langgraph_sdk.client import LangGraphClient
+from prometheus_client import Counter, Gauge
+
+from ..config import Config
+
+CIRCUIT_STATE = Gauge("packpal_assistant_circuit_open", "Whether the circuit to the assistant server is open (1) or half open (0.5)")
+CALL_FAILURES = Counter("packpal_assistant_call_failures", "Failed calls to the assistant server", ["operation"])
+CALL_RETRIES = Counter("packpal_assistant_call_retries", "Retried calls to the assistant server", ["operation"])
+SHORT_CIRCUITED = Counter("packpal_assistant_short_circuited", "Calls to the assistant server refused while the circuit was open")
+
+class AssistantUnavailable(Exception):
+    """Raised instead of calling the assistant server while the circuit to it is open"""
+    def __init__(self, retry_after: int):
+        super().__init__("The assistant is temporarily unavailable")
+        self.message = "The assistant is temporarily unavailable, please try again shortly"
+        self.retry_after = retry_after
+
+    def response(self):
+        return {"message": self.message}, 503, {"Retry-After": str(self.retry_after)}
+
+def is_failure(error: BaseException) -> bool:
+    """Whether an error means the assistant server is unhealthy, as opposed to a rejected request (404, 409, ...)"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+class CircuitBreaker:
+    """Fails fast after repeated assistant server failures
+
+    After failure_threshold consecutive failures the circuit opens and every call is refused for
+    reset_timeout seconds. Then it is half open: one call is let through as a probe, and its outcome
+    closes the circuit again or reopens it for another reset_timeout.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        return max(1, round(self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def check(self):
+        """Raise AssistantUnavailable unless a call may go through now"""
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self.probing:
+            self.probing = True
+            CIRCUIT_STATE.set(0.5)
+            return
+        SHORT_CIRCUITED.inc()
+        raise AssistantUnavailable(self.retry_after())
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        CIRCUIT_STATE.set(0)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.probing = False
+            CIRCUIT_STATE.set(1)
+
+    def record_cancelled(self):
+        """A call was abandoned before it had an outcome; let the next call probe instead"""
+        self.probing = False
+
+class AssistantClient:
+    """Client of the LangGraph assistant server with timeouts, retries and a circuit breaker
+
+    All calls share one keep-alive connection pool. Control calls (threads, run lookups and
+    cancellation) use short timeouts, runs use a long read timeout for the model to produce events
+    plus an overall deadline for runs.wait. Idempotent thread calls are retried with jittered backoff.
+    """
+    def __init__(self, url: str):
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(
+            max_connections=Config.ASSISTANT_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.ASSISTANT_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=Config.ASSISTANT_POOL_KEEPALIVE_SECONDS
+        ))
+        control_timeout = httpx.Timeout(
+            Config.ASSISTANT_CONTROL_TIMEOUT_SECONDS,
+            connect=Config.ASSISTANT_CONNECT_TIMEOUT_SECONDS,
+            pool=Config.ASSISTANT_CONNECT_TIMEOUT_SECONDS
+        )
+        run_timeout = httpx.Timeout(
+            Config.ASSISTANT_CONTROL_TIMEOUT_SECONDS,
+            connect=Config.ASSISTANT_CONNECT_TIMEOUT_SECONDS,
+            read=Config.ASSISTANT_RUN_READ_TIMEOUT_SECONDS,
+            pool=Config.ASSISTANT_CONNECT_TIMEOUT_SECONDS
+        )
+        # The headers get_client would set, which a client built by hand does not get
+        headers = {"User-Agent": f"langgraph-sdk-py/{langgraph_sdk.__version__}"}
+        if Config.ASSISTANT_API_KEY:
+            headers["x-api-key"] = Config.ASSISTANT_API_KEY
+        # Two SDK clients over the same transport, so both draw from one connection pool
+        self.control = LangGraphClient(httpx.AsyncClient(base_url=url, transport=transport, timeout=control_timeout, headers=headers))
+        self.run = LangGraphClient(httpx.AsyncClient(base_url=url, transport=transport, timeout=run_timeout, headers=headers))
+        self.breaker = CircuitBreaker(Config.ASSISTANT_CIRCUIT_FAILURE_THRESHOLD, Config.ASSISTANT_CIRCUIT_RESET_SECONDS)
+
+    async def call(self, operation: str, function, *args, retry: bool = False, deadline: float = None, **kwargs):
+        """Call an SDK coroutine function through the circuit breaker
+
+        Args:
+            operation: The name of the operation, for metrics
+            function: The SDK function to call with args and kwargs
+            retry: Whether the call is idempotent and may be retried after a failure
+            deadline: Overall timeout in seconds of one attempt, on top of the httpx timeouts
+        """
+        attempts = Config.ASSISTANT_RETRY_ATTEMPTS if retry else 1
+        for attempt in range(attempts):
+            self.breaker.check()
+            try:
+                async with asyncio.timeout(deadline):
+                    result = await function(*args, **kwargs)
+            except Exception as e:
+                if not is_failure(e):
+                    self.breaker.record_success()
+                    raise
+                CALL_FAILURES.labels(operation=operation).inc()
+                self.breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise
+                CALL_RETRIES.labels(operation=operation).inc()
+                # full jitter, so retries from many requests do not arrive together
+                backoff = min(Config.ASSISTANT_RETRY_MAX_BACKOFF_SECONDS, Config.ASSISTANT_RETRY_BASE_BACKOFF_SECONDS * 2 ** attempt)
+                await asyncio.sleep(random.uniform(0, backoff))
+            except BaseException:
+                self.breaker.record_cancelled()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def stream(self, operation: str, function, *args, **kwargs):
+        """Iterate an SDK stream through the circuit breaker; the stream counts as healthy once its first event arrives"""
+        self.breaker.check()
+        connected = False
+        try:
+            async with aclosing(function(*args, **kwargs)) as parts:
+                async for part in parts:
+                    if not connected:
+                        connected = True
+                        self.breaker.record_success()
+                    yield part
+        except Exception as e:
+            if is_failure(e):
+                CALL_FAILURES.labels(operation=operation).inc()
+                self.breaker.record_failure()
+            elif not connected:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            if not connected:
+                self.breaker.record_cancelled()
+            raise
+
+    def ensure_available(self):
+        """Raise AssistantUnavailable while the circuit is open, before a request queues for a run"""
+        if self.breaker.state == CircuitBreaker.OPEN:
+            SHORT_CIRCUITED.inc()
+            raise AssistantUnavailable(self.breaker.retry_after())
+
+    async def get_thread(self, thread_id: str):
+        return await self.call("threads.get", self.control.threads.get, thread_id, retry=True)
+
+    async def create_thread(self, thread_id: str, metadata: dict = None):
+        # do_nothing makes the create idempotent, so a retry after a lost response cannot conflict
+        return await self.call(
+            "threads.create", self.control.threads.create,
+            thread_id=thread_id, metadata=metadata, if_exists="do_nothing", retry=True
+        )
+
+    async def delete_thread(self, thread_id: str):
+        return await self.call("threads.delete", self.control.threads.delete, thread_id, retry=True)
+
+    async def get_conversation(self, thread_id: str):
+        # served by the assistant's own routes: the messages with the list rebuilt from its checkpointed edit log
+        return await self.call("threads.conversation", self.control.http.get, f"/threads/{thread_id}/conversation", retry=True)
+
+    async def search_threads(self, **kwargs):
+        return await self.call("threads.search", self.control.threads.search, retry=True, **kwargs)
+
+    async def wait_run(self, thread_id: str, assistant_id: str, **kwargs):
+        return await self.call("runs.wait", self.run.runs.wait, thread_id, assistant_id, deadline=Config.ASSISTANT_RUN_TIMEOUT_SECONDS, **kwargs)
+
+    def stream_run(self, thread_id: str, assistant_id: str, **kwargs):
+        return self.stream("runs.stream", self.run.runs.stream, thread_id, assistant_id, **kwargs)
+
+    def join_run_stream(self, thread_id: str, run_id: str, **kwargs):
+        return self.stream("runs.join_stream", self.run.runs.join_stream, thread_id, run_id, **kwargs)
+
+    async def get_run(self, thread_id: str, run_id: str):
+        return await self.call("runs.get", self.control.runs.get, thread_id, run_id)
+
+    async def cancel_run(self, thread_id: str, run_id: str):
+        return await self.call("runs.cancel", self.control.runs.cancel, thread_id, run_id)
+
+    def health(self) -> dict:
+        """The circuit state, for the health check"""
+        return {"circuit": self.breaker.state, "consecutive_failures": self.breaker.failures}
+
+assistant_client = AssistantClient(Config.ASSISTANT_API_URL)
@@ -1,11 +1,18 @@
+import hashlib
 from quart import g, abort
 from quart.utils import run_sync
 from functools import wraps
 from quart import request
 from quart_schema import OpenAPIProvider
 
+from ..config import Config
+from .coalescing import coalesced, coalesced_read, write_generations
+
 
 def login_required(f):
+    # GET routes are coalesced unless they opt out with not_coalesced
+    coalesce_reads = Config.COALESCE_READS and not getattr(f, "_not_coalesced", False)
+
     @wraps(f)
     async def decorated(*args, **kwargs):
         auth_header = request.headers.get("Authorization")
@@ -15,7 +22,11 @@ def login_required(f):
         token = auth_header.split(" ")[1]
 
         try:
-            user_response = await g.supabase.auth.get_user(token)
+            # Concurrent requests with the same token (several tabs) share one auth call
+            if Config.COALESCE_READS:
+                user_response = await coalesced("auth", hashlib.sha256(token.encode()).hexdigest(), g.supabase.auth.get_user, token)
+            else:
+                user_response = await g.supabase.auth.get_user(token)
 
             if not user_response or not user_response.user:
                 abort(401, "Invalid or expired token")
@@ -25,7 +36,16 @@ def login_required(f):
         except Exception as e:
             abort(401, "Authentication failed")
 
-        return await f(*args, **kwargs)
+        if request.method == "GET":
+            if coalesce_reads:
+                return await coalesced_read(f, *args, **kwargs)
+            return await f(*args, **kwargs)
+
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            # Reads from now on must not join a flight that may have read from before this write
+            write_generations.bump(g.user.id)
     
     setattr(decorated, "_is_secure", True)
     
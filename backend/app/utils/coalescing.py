@@ -0,0 +1,96 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+from quart import current_app, g, request
+from prometheus_client import Counter
+
+from ..config import Config
+
+COALESCED_CALLS = Counter(
+    "packpal_coalesced_calls",
+    "Calls made through single flight, by whether they ran (executed) or joined an identical call in flight (shared)",
+    ["call", "outcome"]
+)
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers with the same key
+
+    The call runs as its own task, so a caller that goes away (a client disconnecting) does not cancel it
+    for the others. Nothing is kept once it finishes: a later caller with the same key runs it again.
+    """
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key: Hashable, function: Callable[..., Awaitable], *args, **kwargs) -> Tuple[Any, bool]:
+        """Await function(*args, **kwargs), or the identical call already in flight
+
+        Returns:
+            The result, and whether it was shared from a call in flight
+        """
+        task = self.calls.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.create_task(function(*args, **kwargs))
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # Retrieve the exception, so it is not reported as unhandled when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+single_flight = SingleFlight()
+
+class WriteGenerations:
+    """Per-user generation that changes with every write of the user, part of the key of coalesced reads
+
+    A read that starts after a write of its user has finished gets a new key, so it never joins a flight that
+    started before the write and may not see it. Only the max_users most recent writers are remembered: the
+    others share a floor above every generation they were ever given, so a forgotten user cannot go back to one.
+    """
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self.counter = 0
+        self.floor = 0
+        self.users = OrderedDict()
+
+    def get(self, user_id: str) -> int:
+        return self.users.get(user_id, self.floor)
+
+    def bump(self, user_id: str):
+        self.counter += 1
+        self.users[user_id] = self.counter
+        self.users.move_to_end(user_id)
+        while len(self.users) > self.max_users:
+            _, generation = self.users.popitem(last=False)
+            self.floor = max(self.floor, generation)
+
+write_generations = WriteGenerations(Config.COALESCE_MAX_WRITERS)
+
+def not_coalesced(f):
+    """Opt a GET route out of read coalescing, e.g. one with side effects or a streamed response; goes below login_required"""
+    f._not_coalesced = True
+    return f
+
+async def coalesced(call: str, key: Hashable, function: Callable[..., Awaitable], *args, **kwargs):
+    result, shared = await single_flight.do((call, key), function, *args, **kwargs)
+    COALESCED_CALLS.labels(call=call, outcome="shared" if shared else "executed").inc()
+    return result
+
+async def coalesced_read(f, *args, **kwargs):
+    """Run a read route once for all identical concurrent requests of the user (same path and query string)
+
+    Each request gets its own copy of the one response, since a response cannot be sent twice, and only joins
+    reads that started after the user's last write.
+    """
+    async def respond():
+        response = await current_app.make_response(await f(*args, **kwargs))
+        return await response.get_data(), response.status_code, list(response.headers.items())
+
+    key = (g.user.id, write_generations.get(g.user.id), request.method, request.full_path)
+    body, status, headers = await coalesced(request.endpoint, key, respond)
+    return current_app.response_class(body, status=status, headers=headers)
\ No newline at end of file
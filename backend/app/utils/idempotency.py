@@ -0,0 +1,242 @@
+import json
+import time
+import asyncio
+import hashlib
+from itertools import islice
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional
+
+from quart import abort, current_app, g, request
+from prometheus_client import Counter
+
+from ..config import Config
+
+IDEMPOTENT_REQUESTS = Counter(
+    "packpal_idempotent_requests",
+    "Requests with an Idempotency-Key, by outcome (executed, replayed, waited, conflict, in_progress)",
+    ["outcome"]
+)
+
+PENDING = "pending"
+DONE = "done"
+
+# Times reserve retries a key that expired between claiming and reading it
+RESERVE_ATTEMPTS = 3
+
+class MemoryIdempotencyStore:
+    """Bounded store of the first response per idempotency key, kept in this worker's memory
+
+    A key is reserved as pending while its first request runs, so duplicates can wait on it, and holds
+    that request's response for ttl seconds once it is done. Beyond max_keys the least recently used done
+    keys are dropped; pending keys never are, since their requests are still running.
+    """
+    def __init__(self, max_keys: int, ttl: int):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.keys = OrderedDict()
+
+    def _get(self, key: str) -> Optional[dict]:
+        record = self.keys.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] < time.monotonic():
+            del self.keys[key]
+            return None
+        self.keys.move_to_end(key)
+        return record
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Reserve the key for a request, or return the record of the request that already holds it"""
+        record = self._get(key)
+        if record is not None:
+            return {"state": record["state"], "fingerprint": record["fingerprint"], "response": record["response"]}
+        self.keys[key] = {
+            "state": PENDING,
+            "fingerprint": fingerprint,
+            "response": None,
+            "done": asyncio.Event(),
+            "expires_at": time.monotonic() + self.ttl
+        }
+        self._evict()
+        return None
+
+    def _evict(self):
+        excess = len(self.keys) - self.max_keys
+        if excess <= 0:
+            return
+        # Oldest first; the scan stops as soon as enough done keys are found
+        evictable = list(islice((key for key, record in self.keys.items() if record["state"] == DONE), excess))
+        for key in evictable:
+            del self.keys[key]
+
+    def _reserved(self, key: str, fingerprint: str) -> Optional[dict]:
+        """The record of the key if it is still the pending reservation made with this fingerprint"""
+        record = self.keys.get(key)
+        if record is None or record["state"] != PENDING or record["fingerprint"] != fingerprint:
+            return None
+        return record
+
+    async def complete(self, key: str, fingerprint: str, response: dict):
+        record = self._reserved(key, fingerprint)
+        if record is None:
+            return
+        record["state"] = DONE
+        record["response"] = response
+        record["expires_at"] = time.monotonic() + self.ttl
+        record["done"].set()
+        self.keys.move_to_end(key)
+
+    async def release(self, key: str, fingerprint: str):
+        """Forget a key whose request failed, so a retry runs it again"""
+        record = self._reserved(key, fingerprint)
+        if record is not None:
+            del self.keys[key]
+            record["done"].set()
+
+    async def wait(self, key: str, timeout: float) -> Optional[dict]:
+        """Wait for the request holding the key; returns its record once done, or None if it did not finish in time"""
+        record = self._get(key)
+        if record is None:
+            return None
+        if record["state"] == PENDING:
+            try:
+                await asyncio.wait_for(record["done"].wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return record if record["state"] == DONE else None
+
+# Completes or releases a key only while it still holds the caller's pending reservation: once the reservation
+# expires, the key may have been reserved again by another request, and its record is not the caller's to change
+COMPLETE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+class RedisIdempotencyStore:
+    """Redis-backed idempotency store, shared by all backend workers so a retry can land on any of them
+
+    The pending reservation expires after lock_ttl seconds, so a key held by a worker that died is freed.
+    """
+    def __init__(self, redis_uri: str, ttl: int, lock_ttl: int):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(redis_uri, decode_responses=True)
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.complete_script = self.redis.register_script(COMPLETE_SCRIPT)
+        self.release_script = self.redis.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def key(key: str) -> str:
+        return f"packpal:idempotency:{key}"
+
+    @staticmethod
+    def pending(fingerprint: str) -> str:
+        return json.dumps({"state": PENDING, "fingerprint": fingerprint, "response": None})
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[dict]:
+        for _ in range(RESERVE_ATTEMPTS):
+            if await self.redis.set(self.key(key), self.pending(fingerprint), nx=True, ex=self.lock_ttl):
+                return None
+            record = await self.redis.get(self.key(key))
+            if record is not None:
+                return json.loads(record)
+            # Expired between the two calls; try again
+        # The key keeps expiring under us; report it as in progress so the client retries later
+        return json.loads(self.pending(fingerprint))
+
+    async def complete(self, key: str, fingerprint: str, response: dict):
+        done = json.dumps({"state": DONE, "fingerprint": fingerprint, "response": response})
+        await self.complete_script(keys=[self.key(key)], args=[self.pending(fingerprint), done, self.ttl])
+
+    async def release(self, key: str, fingerprint: str):
+        await self.release_script(keys=[self.key(key)], args=[self.pending(fingerprint)])
+
+    async def wait(self, key: str, timeout: float) -> Optional[dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            record = await self.redis.get(self.key(key))
+            if record is None:
+                return None
+            record = json.loads(record)
+            if record["state"] == DONE:
+                return record
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.05)
+
+if Config.REDIS_URI:
+    idempotency_store = RedisIdempotencyStore(Config.REDIS_URI, Config.IDEMPOTENCY_TTL_SECONDS, Config.IDEMPOTENCY_LOCK_SECONDS)
+else:
+    idempotency_store = MemoryIdempotencyStore(Config.IDEMPOTENCY_MAX_KEYS, Config.IDEMPOTENCY_TTL_SECONDS)
+
+def replay(response: dict):
+    headers = dict(response["headers"])
+    headers["Idempotent-Replayed"] = "true"
+    return current_app.response_class(response["body"], status=response["status"], headers=headers)
+
+def idempotent(f):
+    """Replay the first response of a request with the same Idempotency-Key header instead of running it again
+
+    Keys are scoped to the user, so it goes below login_required. A duplicate that arrives while the first
+    request is still running waits for its response. Requests that fail with an error are not kept, so
+    their retry runs again, and requests without the header are not affected.
+    """
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return await f(*args, **kwargs)
+        if len(key) > 255:
+            abort(400, "Idempotency-Key must be at most 255 characters")
+
+        key = f"{g.user.id}:{key}"
+        body = await request.get_data()
+        fingerprint = hashlib.sha256(f"{request.method} {request.path}\n".encode() + body).hexdigest()
+
+        record = await idempotency_store.reserve(key, fingerprint)
+        outcome = "replayed"
+        if record is not None and record["state"] == PENDING and record["fingerprint"] == fingerprint:
+            # Wait for the first request; if it failed (and released the key) this one runs in its place
+            outcome = "waited"
+            record = await idempotency_store.wait(key, Config.IDEMPOTENCY_WAIT_SECONDS) \
+                or await idempotency_store.reserve(key, fingerprint)
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                IDEMPOTENT_REQUESTS.labels(outcome="conflict").inc()
+                abort(422, "Idempotency-Key was already used for a different request")
+            if record["state"] == PENDING:
+                IDEMPOTENT_REQUESTS.labels(outcome="in_progress").inc()
+                return {"message": "A request with this Idempotency-Key is still in progress"}, 409, {"Retry-After": "1"}
+            IDEMPOTENT_REQUESTS.labels(outcome=outcome).inc()
+            return replay(record["response"])
+
+        try:
+            response = await current_app.make_response(await f(*args, **kwargs))
+        except BaseException:
+            await idempotency_store.release(key, fingerprint)
+            raise
+
+        if response.status_code >= 500:
+            await idempotency_store.release(key, fingerprint)
+            return response
+        IDEMPOTENT_REQUESTS.labels(outcome="executed").inc()
+        await idempotency_store.complete(key, fingerprint, {
+            "body": (await response.get_data()).decode(),
+            "status": response.status_code,
+            "headers": {name: value for name, value in response.headers.items() if name.lower() == "content-type"}
+        })
+        return response
+
+    return decorated
\ No newline at end of file
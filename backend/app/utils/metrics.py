@@ -0,0 +1,14 @@
+from prometheus_client import Counter
+
+ABANDONED_RUNS = Counter(
+    "packpal_assistant_abandoned_runs",
+    "Assistant runs cancelled because the client disconnected mid-turn and did not reconnect"
+)
+WASTED_OUTPUT_TOKENS = Counter(
+    "packpal_assistant_wasted_output_tokens",
+    "Model output tokens streamed for turns the client disconnected from"
+)
+SWEPT_THREADS = Counter(
+    "packpal_assistant_swept_threads",
+    "Assistant threads deleted by the session sweeper after their TTL"
+)
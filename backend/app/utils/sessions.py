@@ -0,0 +1,80 @@
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from ..config import Config
+from .metrics import SWEPT_THREADS
+from .assistant_client import assistant_client
+
+logger = logging.getLogger(__name__)
+
+# Fixed namespace so a (user, session) pair always maps to the same assistant thread
+SESSION_NAMESPACE = uuid.UUID("6f0f3d2e-5a41-4c8e-9d7b-2b1f3c9a7e10")
+
+# Metadata on every assistant thread created by the backend, so the sweeper only touches its own threads
+THREAD_METADATA = {"app": "packpal"}
+
+def trip_session_id(trip_id: int) -> str:
+    """The session of the assistant for an existing trip, shared by every start for that trip"""
+    return f"trip-{trip_id}"
+
+def new_session_id() -> str:
+    """A fresh session, for planning a new trip"""
+    return uuid.uuid4().hex
+
+def session_thread_id(user_id: str, session_id: str) -> str:
+    """The assistant thread of a user's session
+
+    Args:
+        user_id: The user id
+        session_id: The session id, from trip_session_id or new_session_id
+
+    Returns:
+        The thread id, derived from both so a user can only reach their own threads
+    """
+    return str(uuid.uuid5(SESSION_NAMESPACE, f"{user_id}:{session_id}"))
+
+async def sweep_stale_threads() -> int:
+    """Delete the assistant threads not updated for longer than the session TTL
+
+    Returns:
+        The number of threads deleted
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.ASSISTANT_SESSION_TTL_SECONDS)
+    deleted = 0
+    while True:
+        # oldest first, so the sweep can stop at the first thread still in use
+        threads = await assistant_client.search_threads(
+            metadata=THREAD_METADATA,
+            sort_by="updated_at",
+            sort_order="asc",
+            limit=Config.ASSISTANT_SESSION_SWEEP_BATCH_SIZE
+        )
+        stale = [
+            thread for thread in threads
+            if datetime.fromisoformat(thread["updated_at"]) < cutoff and thread["status"] != "busy"
+        ]
+        swept = 0
+        for thread in stale:
+            try:
+                await assistant_client.delete_thread(thread["thread_id"])
+                swept += 1
+            except Exception:
+                # another worker swept it first
+                pass
+        SWEPT_THREADS.inc(swept)
+        deleted += swept
+        if not swept or len(stale) < Config.ASSISTANT_SESSION_SWEEP_BATCH_SIZE:
+            return deleted
+
+async def run_thread_sweeper():
+    """Sweep stale assistant threads forever, every ASSISTANT_SESSION_SWEEP_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(Config.ASSISTANT_SESSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            deleted = await sweep_stale_threads()
+            if deleted:
+                logger.info("Swept %d stale assistant threads", deleted)
+        except Exception:
+            logger.exception("Assistant thread sweep failed")
@@ -0,0 +1,163 @@
+import json
+import time
+from collections import deque, OrderedDict
+from typing import List, Optional, Tuple
+
+from ..config import Config
+
+class MemoryReplayBuffer:
+    """Bounded per-thread buffer of the SSE events of the latest assistant run, kept in this worker's memory
+
+    Each thread keeps its latest run id, the upstream cursor needed to rejoin that run, the last
+    max_events events, whether the run is done, and an attach generation that grows on every (re)connect.
+    Threads are kept in the order they were last written to, which is also the order they expire in, so
+    every write drops the expired threads at the front, and the least recently written beyond max_threads.
+    """
+    def __init__(self, max_events: int, ttl: int, max_threads: int):
+        self.max_events = max_events
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.threads = OrderedDict()
+
+    def _get(self, thread_id: str) -> Optional[dict]:
+        record = self.threads.get(thread_id)
+        if record is not None and record["expires_at"] < time.monotonic():
+            del self.threads[thread_id]
+            return None
+        return record
+
+    def _touch(self, thread_id: str, record: dict):
+        now = time.monotonic()
+        record["expires_at"] = now + self.ttl
+        self.threads.move_to_end(thread_id)
+        while self.threads:
+            oldest = next(iter(self.threads.values()))
+            if oldest["expires_at"] >= now and len(self.threads) <= self.max_threads:
+                break
+            self.threads.popitem(last=False)
+
+    async def start(self, thread_id: str, run_id: str):
+        previous = self._get(thread_id)
+        self.threads[thread_id] = {
+            "run_id": run_id,
+            "cursor": {},
+            "events": deque(maxlen=self.max_events),
+            "next_seq": 1,
+            "done": False,
+            "generation": previous["generation"] if previous else 0,
+        }
+        self._touch(thread_id, self.threads[thread_id])
+
+    async def append(self, thread_id: str, payload: str, cursor: dict, done: bool = False) -> int:
+        record = self._get(thread_id)
+        if record is None:
+            return 0
+        seq = record["next_seq"]
+        record["next_seq"] += 1
+        record["events"].append((seq, payload))
+        record["cursor"] = dict(cursor)
+        record["done"] = done
+        self._touch(thread_id, record)
+        return seq
+
+    async def attach(self, thread_id: str) -> int:
+        record = self._get(thread_id)
+        if record is None:
+            return 0
+        record["generation"] += 1
+        return record["generation"]
+
+    async def get(self, thread_id: str) -> Optional[dict]:
+        record = self._get(thread_id)
+        if record is None:
+            return None
+        return {key: record[key] for key in ("run_id", "cursor", "done", "generation")}
+
+    async def events_after(self, thread_id: str, seq: int) -> Optional[List[Tuple[int, str]]]:
+        record = self._get(thread_id)
+        if record is None:
+            return None
+        return kept_events_after(list(record["events"]), seq)
+
+def kept_events_after(events: List[Tuple[int, str]], seq: int) -> Optional[List[Tuple[int, str]]]:
+    """The events after seq, or None if some of them were already dropped from the bounded buffer"""
+    if events and seq + 1 < events[0][0]:
+        return None
+    return [(s, payload) for s, payload in events if s > seq]
+
+# Appends only to a buffer that still exists: if the meta hash expired mid-run, incrementing next_seq on its
+# own would recreate it without a run id
+APPEND_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local seq = redis.call('HINCRBY', KEYS[1], 'next_seq', 1)
+redis.call('RPUSH', KEYS[2], cjson.encode({seq, ARGV[1]}))
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[4]), -1)
+redis.call('HSET', KEYS[1], 'cursor', ARGV[2], 'done', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+return seq
+"""
+
+class RedisReplayBuffer:
+    """Redis-backed replay buffer, shared by all backend workers so a reconnect can land on any of them"""
+    def __init__(self, redis_uri: str, max_events: int, ttl: int):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(redis_uri, decode_responses=True)
+        self.max_events = max_events
+        self.ttl = ttl
+        self.append_script = self.redis.register_script(APPEND_SCRIPT)
+
+    @staticmethod
+    def keys(thread_id: str) -> Tuple[str, str]:
+        return f"packpal:stream:{thread_id}:meta", f"packpal:stream:{thread_id}:events"
+
+    async def start(self, thread_id: str, run_id: str):
+        meta_key, events_key = self.keys(thread_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(events_key)
+            pipe.hset(meta_key, mapping={"run_id": run_id, "cursor": "{}", "next_seq": 0, "done": 0})
+            pipe.hsetnx(meta_key, "generation", 0)
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+
+    async def append(self, thread_id: str, payload: str, cursor: dict, done: bool = False) -> int:
+        return int(await self.append_script(
+            keys=list(self.keys(thread_id)),
+            args=[payload, json.dumps(cursor), int(done), self.max_events, self.ttl]
+        ))
+
+    async def attach(self, thread_id: str) -> int:
+        meta_key, _ = self.keys(thread_id)
+        if not await self.redis.exists(meta_key):
+            return 0
+        return await self.redis.hincrby(meta_key, "generation", 1)
+
+    async def get(self, thread_id: str) -> Optional[dict]:
+        meta_key, _ = self.keys(thread_id)
+        meta = await self.redis.hgetall(meta_key)
+        if "run_id" not in meta:
+            return None
+        return {
+            "run_id": meta["run_id"],
+            "cursor": json.loads(meta["cursor"]),
+            "done": meta["done"] == "1",
+            "generation": int(meta["generation"])
+        }
+
+    async def events_after(self, thread_id: str, seq: int) -> Optional[List[Tuple[int, str]]]:
+        meta_key, events_key = self.keys(thread_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.exists(meta_key)
+            pipe.lrange(events_key, 0, -1)
+            exists, events = await pipe.execute()
+        if not exists:
+            return None
+        return kept_events_after([tuple(json.loads(event)) for event in events], seq)
+
+if Config.REDIS_URI:
+    replay_buffer = RedisReplayBuffer(Config.REDIS_URI, Config.STREAM_BUFFER_SIZE, Config.STREAM_BUFFER_TTL_SECONDS)
+else:
+    replay_buffer = MemoryReplayBuffer(Config.STREAM_BUFFER_SIZE, Config.STREAM_BUFFER_TTL_SECONDS, Config.STREAM_BUFFER_MAX_THREADS)
@@ -0,0 +1,8 @@
+import os
+
+# Config refuses to load without these; the tests never reach Supabase or the assistant server
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test")
+os.environ.setdefault("BACKEND_SECRET_KEY", "test")
+os.environ.setdefault("BACKEND_ASSISTANT_API_URL", "http://assistant.test")
+os.environ["BACKEND_REDIS_URI"] = ""
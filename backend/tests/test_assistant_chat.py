@@ -0,0 +1,183 @@
+import gc
+import sys
+import json
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app import create_app
+from app.utils.admission import admission
+from app.utils.assistant_client import assistant_client
+from app.utils.stream_buffer import replay_buffer
+
+TRIP = {"id": 1, "name": "Beach week", "description": None, "start_date": "2026-07-01", "end_date": "2026-07-08"}
+CATEGORIES = [{"id": 2, "name": "Clothing", "items": [{"id": 3, "name": "Socks", "quantity": 7, "notes": None}]}]
+HUMAN = {"type": "human", "content": "add sunscreen"}
+AI = {"type": "ai", "content": "Added sunscreen."}
+
+def event(mode: str, data: dict, id: str = None):
+    return SimpleNamespace(event=mode, data=data, id=id)
+
+def values(messages, trip=None, categories=None, uncategorized_items=None):
+    return event("values", {"messages": messages, "trip": trip, "categories": categories, "uncategorized_items": uncategorized_items})
+
+@pytest.fixture
+def app(monkeypatch):
+    async def get_user(token):
+        return SimpleNamespace(user=SimpleNamespace(id="user-1"))
+
+    async def acreate_client(*args, **kwargs):
+        return SimpleNamespace(auth=SimpleNamespace(get_user=get_user))
+
+    monkeypatch.setattr(sys.modules["app"], "acreate_client", acreate_client)
+    return create_app()
+
+def stream_turn(app, monkeypatch, events):
+    async def stream_run(thread_id, assistant_id, **kwargs):
+        for e in events:
+            if isinstance(e, Exception):
+                raise e
+            yield e
+
+    monkeypatch.setattr(assistant_client, "stream_run", stream_run)
+
+    return post_turn(app)[1]
+
+def post_turn(app, last_event_id: str = None):
+    """Post a chat turn; returns the status code and the data of the events streamed back"""
+    async def post():
+        client = app.test_client()
+        headers = {"Authorization": "Bearer token"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        response = await client.post(
+            "/assistant/chat",
+            json={"session_id": "trip-1", "user_msg": "add sunscreen"},
+            headers=headers
+        )
+        return response.status_code, (await response.get_data()).decode()
+
+    status, body = asyncio.run(post())
+    return status, [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+def test_turn_without_the_list_skips_values_until_it_is_loaded(app, monkeypatch):
+    # The client did not send the list, so the first values of the run come before the load node rebuilt it
+    responses = stream_turn(app, monkeypatch, [
+        event("metadata", {"run_id": "run-1"}, id="1"),
+        values([HUMAN]),
+        values([HUMAN], TRIP, CATEGORIES, []),
+        values([HUMAN, AI], TRIP, CATEGORIES, []),
+    ])
+
+    assert responses[-1]["done"] is True
+    sent_values = [r["content"] for r in responses if r["mode"] == "values"]
+    assert len(sent_values) == 2
+    assert all(v["trip"]["name"] == "Beach week" for v in sent_values)
+    assert sent_values[-1]["messages"][-1] == AI
+
+def test_turn_that_never_loads_the_list_still_finishes(app, monkeypatch):
+    responses = stream_turn(app, monkeypatch, [
+        event("metadata", {"run_id": "run-2"}, id="1"),
+        values([HUMAN]),
+    ])
+
+    assert [r["mode"] for r in responses] == ["message"]
+    assert responses[0]["done"] is True
+
+def test_turn_rejected_upstream_sends_an_error_event(app, monkeypatch):
+    # The previous run of a client that went away is still running on the server
+    request = httpx.Request("POST", "http://assistant/threads/t/runs/stream")
+    busy = httpx.HTTPStatusError("Conflict", request=request, response=httpx.Response(409, request=request))
+    responses = stream_turn(app, monkeypatch, [busy])
+
+    assert responses == [{
+        "done": True,
+        "mode": "error",
+        "content": "The assistant is still answering your previous message",
+        "metrics": None
+    }]
+    assert admission.active == 0 and not admission.threads
+
+def test_response_dropped_before_streaming_gives_back_its_slot(app, monkeypatch):
+    async def stream_run(thread_id, assistant_id, **kwargs):
+        yield event("metadata", {"run_id": "run-3"}, id="1")
+
+    monkeypatch.setattr(assistant_client, "stream_run", stream_run)
+
+    async def dispatch():
+        async with app.test_request_context(
+            "/assistant/chat",
+            method="POST",
+            json={"session_id": "trip-1", "user_msg": "add sunscreen"},
+            headers={"Authorization": "Bearer token"}
+        ):
+            response = await app.full_dispatch_request()
+            assert admission.active == 1
+        # The client went away before the body was sent
+        del response
+        gc.collect()
+        await asyncio.sleep(0)
+
+    asyncio.run(dispatch())
+    assert admission.active == 0 and not admission.threads
+
+def token(text: str, run_id: str, tags=()):
+    return event("events", {"event": "on_chat_model_stream", "run_id": run_id, "tags": list(tags), "data": {"chunk": {"content": text}}})
+
+def test_summary_tokens_are_not_streamed_as_the_reply(app, monkeypatch):
+    responses = stream_turn(app, monkeypatch, [
+        event("metadata", {"run_id": "run-4"}, id="1"),
+        token("The traveler is going to the beach.", "summary", tags=["nostream"]),
+        token('{"chat_response": "Added', "reply"),
+        token(' sunscreen."}', "reply"),
+    ])
+
+    streamed = "".join(r["content"] for r in responses if r["mode"] == "message")
+    assert streamed == "Added sunscreen."
+
+def test_categories_taken_back_by_the_generator_are_removed_on_the_stream(app, monkeypatch):
+    responses = stream_turn(app, monkeypatch, [
+        event("metadata", {"run_id": "run-5"}, id="1"),
+        event("custom|list_generator:1", {"category": {"name": "Swimwear", "items": []}}),
+        event("custom|list_generator:1", {"removed_category": "Swimwear"}),
+    ])
+
+    assert [(r["mode"], r["content"]) for r in responses[:-1]] == [
+        ("category", {"id": None, "name": "Swimwear", "items": []}),
+        ("removed_category", "Swimwear"),
+    ]
+
+
+def token_turn(app, monkeypatch, run_id: str):
+    return stream_turn(app, monkeypatch, [
+        event("metadata", {"run_id": run_id}, id="1"),
+        token('{"chat_response": "Added', "reply"),
+        token(' sun', "reply"),
+        token('screen."}', "reply"),
+    ])
+
+def test_resume_replays_the_events_the_client_missed(app, monkeypatch):
+    token_turn(app, monkeypatch, "run-6")
+
+    status, responses = post_turn(app, last_event_id="run-6:2")
+
+    assert status == 200
+    assert [r["content"] for r in responses] == ["screen.", ""]
+    assert responses[-1]["done"] is True
+
+def test_resume_past_the_oldest_kept_event_is_refused(app, monkeypatch):
+    monkeypatch.setattr(replay_buffer, "max_events", 2)
+    token_turn(app, monkeypatch, "run-7")
+
+    # Events 1 and 2 were dropped from the buffer, so a client that only saw event 1 cannot be caught up
+    status, _ = post_turn(app, last_event_id="run-7:1")
+    assert status == 409
+
+def test_resume_after_the_buffer_expired_is_refused(app, monkeypatch):
+    token_turn(app, monkeypatch, "run-8")
+    replay_buffer.threads.clear()
+
+    status, _ = post_turn(app, last_event_id="run-8:2")
+    assert status == 409
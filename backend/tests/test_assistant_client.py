@@ -0,0 +1,18 @@
+from app.config import Config
+from app.utils.assistant_client import AssistantClient
+
+def test_both_sdk_clients_send_the_api_key(monkeypatch):
+    monkeypatch.setattr(Config, "ASSISTANT_API_KEY", "lsv2-key")
+    client = AssistantClient("http://assistant")
+
+    for sdk_client in (client.control, client.run):
+        headers = sdk_client.http.client.headers
+        assert headers["x-api-key"] == "lsv2-key"
+        assert headers["user-agent"].startswith("langgraph-sdk-py/")
+
+def test_no_api_key_header_without_a_key(monkeypatch):
+    monkeypatch.setattr(Config, "ASSISTANT_API_KEY", None)
+    client = AssistantClient("http://assistant")
+
+    assert "x-api-key" not in client.control.http.client.headers
+    assert "x-api-key" not in client.run.http.client.headers
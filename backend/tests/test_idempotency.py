@@ -0,0 +1,35 @@
+import asyncio
+
+from app.utils.idempotency import MemoryIdempotencyStore, PENDING, DONE
+
+RESPONSE = {"body": "{}", "status": 201, "headers": {}}
+
+def expired_and_reserved_again():
+    """A store whose first reservation of the key expired and was taken by a second request"""
+    store = MemoryIdempotencyStore(max_keys=10, ttl=60)
+
+    async def run():
+        assert await store.reserve("1:key", "first") is None
+        store.keys["1:key"]["expires_at"] = 0
+        assert await store.reserve("1:key", "second") is None
+
+    asyncio.run(run())
+    return store
+
+def test_complete_leaves_a_reservation_made_by_another_request():
+    store = expired_and_reserved_again()
+
+    asyncio.run(store.complete("1:key", "first", RESPONSE))
+
+    record = store.keys["1:key"]
+    assert (record["state"], record["fingerprint"], record["response"]) == (PENDING, "second", None)
+
+def test_release_leaves_a_reservation_made_by_another_request():
+    store = expired_and_reserved_again()
+
+    asyncio.run(store.release("1:key", "first"))
+    assert store.keys["1:key"]["fingerprint"] == "second"
+
+    asyncio.run(store.complete("1:key", "second", RESPONSE))
+    record = store.keys["1:key"]
+    assert (record["state"], record["response"]) == (DONE, RESPONSE)
@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect } from "react"
+import { useState, useEffect, useRef } from "react"
 import { AcceptAssistantRequest, AssistantCategory, AssistantItem, AssistantMessage, AssistantTrip, ChatAssistantMode, ChatAssistantRequest, ChatAssistantValues, StartAssistantRequest } from "@/types/assistant"
 import { assistantService } from "@/services/assistantService"
 import { useTripId } from "@/hooks/useTripId"
@@ -14,7 +14,30 @@ import { Button } from "@/components/ui/button"
 import { toast } from "sonner"
 
 
+// The session of the new trip being planned, so reloading the page reopens the same conversation
+const DRAFT_SESSION_KEY = "assistantDraftSessionId"
+
+// The trip and list as the assistant expects them: no empty rows, and no ids of rows not saved yet
+const toAssistantList = (trip: AssistantTrip, categories: AssistantCategory[], uncategorizedItems: AssistantItem[]) => {
+    const toItem = (item: AssistantItem) => ({
+        id: item.id && item.id > 0 ? item.id : undefined,
+        name: item.name,
+        quantity: item.quantity,
+        notes: item.notes
+    })
+    return {
+        trip: trip,
+        categories: categories.filter((category) => category.name).map((category) => ({
+            id: category.id && category.id > 0 ? category.id : undefined,
+            name: category.name,
+            items: category.items.filter((item) => item.name).map(toItem)
+        })),
+        uncategorized_items: uncategorizedItems.filter((item) => item.name).map(toItem)
+    }
+}
+
 export default function AssistantPage() {
+    const [sessionId, setSessionId] = useState<string | null>(null)
     const [messages, setMessages] = useState<AssistantMessage[]>([])
     const [trip, setTrip] = useState<AssistantTrip>({})
     const [categories, setCategories] = useState<AssistantCategory[]>([]);
@@ -22,6 +45,8 @@ export default function AssistantPage() {
     const [uncategorizedItems, setUncategorizedItems] = useState<AssistantItem[]>([]);
     const [isThinking, setIsThinking] = useState(false)
     const [isAcceptLoading, setIsAcceptLoading] = useState(false)
+    // The list as the assistant last sent it, so a chat only sends the list when the user changed it
+    const assistantList = useRef<string | null>(null)
     const router = useRouter()
 
     let tripId: number | null = null
@@ -50,12 +75,20 @@ export default function AssistantPage() {
         let request = {} as StartAssistantRequest
         if (tripId) {
             request.tripId = tripId
+        } else {
+            request.sessionId = sessionStorage.getItem(DRAFT_SESSION_KEY) ?? undefined
         }
         const response = await assistantService.start(request)
+        if (!tripId) {
+            sessionStorage.setItem(DRAFT_SESSION_KEY, response.session_id)
+        }
+        setSessionId(response.session_id)
         setTrip(response.trip)
         setCategories(response.categories)
         setUncategorizedItems(response.uncategorized_items)
-        setMessages([{ type: "ai", content: response.message }])
+        // a reopened trip shows the saved list, which the conversation may not have seen yet
+        assistantList.current = response.resumed && tripId ? null : JSON.stringify(toAssistantList(response.trip, response.categories, response.uncategorized_items))
+        setMessages(response.messages.length > 0 ? response.messages : [{ type: "ai", content: response.message }])
         setIsThinking(false)
     }
 
@@ -65,25 +98,11 @@ export default function AssistantPage() {
 
     const handleChat = async (userMsg: string) => {
         setMessages((prevMessages) => [...prevMessages, { type: "human", content: userMsg }])
+        const list = toAssistantList(trip, categories, uncategorizedItems)
         const request = {
+            session_id: sessionId,
             user_msg: userMsg,
-            trip: trip,
-            categories: categories.filter((category) => category.name).map((category) => ({
-                id: category.id && category.id > 0 ? category.id : undefined,
-                name: category.name,
-                items: category.items.filter((item) => item.name).map((item) => ({
-                    id: item.id && item.id > 0 ? item.id : undefined,
-                    name: item.name,
-                    quantity: item.quantity,
-                    notes: item.notes
-                }))
-            })),
-            uncategorized_items: uncategorizedItems.filter((item) => item.name).map((item) => ({
-                id: item.id && item.id > 0 ? item.id : undefined,
-                name: item.name,
-                quantity: item.quantity,
-                notes: item.notes
-            }))
+            ...(JSON.stringify(list) !== assistantList.current ? list : {})
         } as ChatAssistantRequest
         setIsThinking(true)
         try {
@@ -98,8 +117,25 @@ export default function AssistantPage() {
                         newMessages[newMessages.length - 1] = lastMessage
                         return newMessages
                     })
+                } else if (update.mode === ChatAssistantMode.CATEGORY) {
+                    const category = update.content as AssistantCategory
+                    setCategories((prevCategories) => [
+                        ...prevCategories.filter((prevCategory) => prevCategory.name !== category.name),
+                        {
+                            ...category,
+                            id: -Date.now() - Math.random(),
+                            items: category.items.map((item) => ({
+                                ...item,
+                                id: -Date.now() - Math.random()
+                            }))
+                        }
+                    ])
+                } else if (update.mode === ChatAssistantMode.REMOVED_CATEGORY) {
+                    const name = update.content as string
+                    setCategories((prevCategories) => prevCategories.filter((prevCategory) => prevCategory.name !== name))
                 } else if (update.mode === ChatAssistantMode.VALUES) {
                     const values = update.content as ChatAssistantValues
+                    assistantList.current = JSON.stringify(toAssistantList(values.trip, values.categories, values.uncategorized_items))
                     setTrip(values.trip)
                     setCategories(values.categories.map((category) => ({
                         ...category,
@@ -116,6 +152,8 @@ export default function AssistantPage() {
                     if (values.messages && values.messages.length > 0 && values.messages[values.messages.length - 1].type === "ai") {
                         setMessages(values.messages)
                     }
+                } else if (update.mode === ChatAssistantMode.ERROR) {
+                    toast.error(update.content as string)
                 }
             }
         } catch (error) {
@@ -148,6 +186,10 @@ export default function AssistantPage() {
         } as AcceptAssistantRequest
         try {
             const response = await assistantService.accept(request)
+            if (!tripId) {
+                // the draft is now a trip, so the next new trip starts a new conversation
+                sessionStorage.removeItem(DRAFT_SESSION_KEY)
+            }
             setIsAcceptLoading(false)
             router.push(`/trip?tripId=${response.trip_id}`)
         } catch (error) {
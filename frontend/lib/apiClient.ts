@@ -36,5 +36,5 @@ export const apiClient = {
   post: (url: string, body: any) => apiRequest(url, { method: 'POST', body: JSON.stringify(body) }),
   put: (url: string, body: any) => apiRequest(url, { method: 'PUT', body: JSON.stringify(body) }),
   delete: (url: string) => apiRequest(url, { method: 'DELETE' }),
-  stream: (url: string, body: any) => apiRequest(url, { method: 'POST', body: JSON.stringify(body) }, true),
+  stream: (url: string, body: any, headers?: HeadersInit) => apiRequest(url, { method: 'POST', body: JSON.stringify(body), headers }, true),
 };
\ No newline at end of file
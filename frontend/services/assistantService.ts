@@ -1,49 +1,76 @@
 import { apiClient } from "@/lib/apiClient"
 import { AcceptAssistantRequest, AcceptAssistantResponse, ChatAssistantRequest, ChatAssistantResponse, StartAssistantRequest, StartAssistantResponse } from "@/types/assistant"
 
+const MAX_STREAM_RECONNECTS = 3
+
 export const assistantService = {
-    start: async ({ tripId }: StartAssistantRequest) => {
-        let url = "/assistant/start"
+    start: async ({ tripId, sessionId, restart }: StartAssistantRequest) => {
+        const params = new URLSearchParams()
         if (tripId) {
-            url += `?trip_id=${tripId}`
+            params.set("trip_id", String(tripId))
+        } else if (sessionId) {
+            params.set("session_id", sessionId)
+        }
+        if (restart) {
+            params.set("restart", "true")
         }
-        const response = await apiClient.post(url, {})
+        const query = params.toString()
+        const response = await apiClient.post(`/assistant/start${query ? `?${query}` : ""}`, {})
         return response as StartAssistantResponse
     },
 
     async * chat(chatAssistantRequest: ChatAssistantRequest) {
-        const response = await apiClient.stream("/assistant/chat", chatAssistantRequest);
+        // If the connection drops mid-reply, reconnect with the last event id so the backend replays
+        // the missed events and rejoins the same run instead of starting a new one
+        let lastEventId: string | undefined;
+        let done = false;
+
+        for (let attempt = 0; !done; attempt++) {
+            const headers: HeadersInit = lastEventId ? { "Last-Event-ID": lastEventId } : {};
+            const response = await apiClient.stream("/assistant/chat", chatAssistantRequest, headers);
 
-        const reader = response.body?.getReader();
-        const decoder = new TextDecoder();
+            const reader = response.body?.getReader();
+            const decoder = new TextDecoder();
 
-        if (!reader) throw new Error("Stream reader not available");
+            if (!reader) throw new Error("Stream reader not available");
 
-        try {
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
+            let buffer = "";
+            try {
+                while (true) {
+                    const { done: streamDone, value } = await reader.read();
+                    if (streamDone) break;
 
-                const chunk = decoder.decode(value, { stream: true });
+                    buffer += decoder.decode(value, { stream: true });
 
-                const lines = chunk.split('\n');
+                    // Keep the last, possibly incomplete, line for the next chunk
+                    const lines = buffer.split('\n');
+                    buffer = lines.pop() ?? "";
 
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        const jsonStr = line.replace('data: ', '').trim();
-                        if (!jsonStr) continue;
+                    for (const line of lines) {
+                        if (line.startsWith('id: ')) {
+                            lastEventId = line.replace('id: ', '').trim();
+                        } else if (line.startsWith('data: ')) {
+                            const jsonStr = line.replace('data: ', '').trim();
+                            if (!jsonStr) continue;
 
-                        try {
-                            const parsed: ChatAssistantResponse = JSON.parse(jsonStr);
-                            yield parsed;
-                        } catch (e) {
-                            console.error("Error parsing SSE JSON chunk", e);
+                            try {
+                                const parsed: ChatAssistantResponse = JSON.parse(jsonStr);
+                                done = done || parsed.done;
+                                yield parsed;
+                            } catch (e) {
+                                console.error("Error parsing SSE JSON chunk", e);
+                            }
                         }
                     }
                 }
+                // The server closed the stream before the done event, so reconnect as after a network error
+                if (!done) throw new Error("Stream ended before the reply was complete");
+            } catch (e) {
+                if (done || !lastEventId || attempt >= MAX_STREAM_RECONNECTS) throw e;
+                await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)));
+            } finally {
+                reader.releaseLock();
             }
-        } finally {
-            reader.releaseLock();
         }
     },
 
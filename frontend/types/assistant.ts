@@ -26,25 +26,35 @@ export interface AssistantMessage {
 
 export interface StartAssistantRequest {
     tripId?: number
+    sessionId?: string
+    restart?: boolean
 }
 
 export interface StartAssistantResponse {
+    session_id: string
+    resumed: boolean
     message: string
+    messages: AssistantMessage[]
     trip: AssistantTrip
     categories: AssistantCategory[]
     uncategorized_items: AssistantItem[]
 }
 
 export interface ChatAssistantRequest {
+    session_id: string
     user_msg: string
-    trip: AssistantTrip
-    categories: AssistantCategory[]
-    uncategorized_items: AssistantItem[]
+    // only sent when the user changed the trip or list since the assistant last sent it
+    trip?: AssistantTrip
+    categories?: AssistantCategory[]
+    uncategorized_items?: AssistantItem[]
 }
 
 export enum ChatAssistantMode {
     MESSAGE = "message",
-    VALUES = "values"
+    VALUES = "values",
+    CATEGORY = "category",
+    REMOVED_CATEGORY = "removed_category",
+    ERROR = "error"
 }
 
 export interface ChatAssistantValues {
@@ -54,10 +64,30 @@ export interface ChatAssistantValues {
     messages: AssistantMessage[]
 }
 
+export interface AssistantLLMCallMetrics {
+    node: string
+    model: string
+    ttft_ms: number
+    latency_ms: number
+    input_tokens: number
+    output_tokens: number
+}
+
+export interface AssistantRunMetrics {
+    duration_ms: number
+    nodes: Record<string, number>
+    llm_calls: AssistantLLMCallMetrics[]
+    input_tokens: number
+    output_tokens: number
+    retries: number
+    fallback: boolean
+}
+
 export interface ChatAssistantResponse {
     done: boolean
     mode: ChatAssistantMode
-    content: string | ChatAssistantValues
+    content: string | ChatAssistantValues | AssistantCategory
+    metrics?: AssistantRunMetrics
 }
 
 export interface AcceptAssistantRequest {
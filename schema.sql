@@ -31,6 +31,13 @@ CREATE EXTENSION IF NOT EXISTS "pg_stat_statements" WITH SCHEMA "extensions";
 
 
 
+CREATE EXTENSION IF NOT EXISTS "pg_trgm" WITH SCHEMA "extensions";
+
+
+
+
+
+
 CREATE EXTENSION IF NOT EXISTS "pgcrypto" WITH SCHEMA "extensions";
 
 
@@ -263,6 +270,512 @@ $$;
 
 ALTER FUNCTION "public"."accept_assistant_results"("p_user_id" "uuid", "p_trip" "jsonb", "p_categories" "jsonb", "p_uncategorized_items" "jsonb") OWNER TO "postgres";
 
+
+CREATE OR REPLACE FUNCTION "public"."bump_sync_version"() RETURNS "trigger"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_user_id UUID;
+BEGIN
+  -- Every write gives the row a new version, for conflict checks, and a new change_seq, for sync cursors,
+  -- whether it comes through sync, the REST routes or another function
+  IF TG_TABLE_NAME = 'trips' THEN
+    v_user_id := NEW.user_id;
+  ELSE
+    SELECT user_id INTO v_user_id FROM trips WHERE id = NEW.trip_id;
+  END IF;
+  -- Writes of a user hold the user's sync lock shared until they commit, and sync holds it exclusively,
+  -- so no change_seq of the user is taken while a sync runs nor left uncommitted when it computes its cursor
+  IF v_user_id IS NOT NULL THEN
+    PERFORM pg_advisory_xact_lock_shared(hashtext('sync:' || v_user_id::text));
+  END IF;
+
+  IF TG_OP = 'UPDATE' THEN
+    NEW.version := OLD.version + 1;
+  ELSE
+    NEW.version := 1;
+  END IF;
+  NEW.change_seq := nextval('sync_change_seq');
+
+  RETURN NEW;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."bump_sync_version"() OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."duplicate_trip"("p_user_id" "uuid", "p_trip_id" bigint, "p_name" "text" DEFAULT NULL::"text", "p_start_date" "date" DEFAULT NULL::"date", "p_reset_quantities" boolean DEFAULT true, "p_include_purchased" boolean DEFAULT false) RETURNS "jsonb"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_source trips%ROWTYPE;
+  v_trip trips%ROWTYPE;
+  v_name TEXT;
+  v_start_date DATE;
+  v_copy INT := 1;
+BEGIN
+  IF p_user_id IS DISTINCT FROM auth.uid() THEN
+    RAISE EXCEPTION 'Cannot duplicate a trip of another user';
+  END IF;
+
+  SELECT * INTO v_source FROM trips WHERE id = p_trip_id AND user_id = p_user_id;
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Trip not found' USING ERRCODE = 'no_data_found';
+  END IF;
+
+  -- Trip names are unique per user, so without a given name count up to the first free "(copy N)"
+  v_name := COALESCE(p_name, v_source.name || ' (copy)');
+  WHILE p_name IS NULL AND EXISTS (SELECT 1 FROM trips WHERE user_id = p_user_id AND name = v_name) LOOP
+    v_copy := v_copy + 1;
+    v_name := v_source.name || ' (copy ' || v_copy || ')';
+  END LOOP;
+
+  -- 1. Trip, shifted to the new start date with the same length
+  v_start_date := COALESCE(p_start_date, v_source.start_date);
+  INSERT INTO trips (user_id, name, description, start_date, end_date, status)
+  VALUES (
+    p_user_id,
+    v_name,
+    v_source.description,
+    v_start_date,
+    v_start_date + (v_source.end_date - v_source.start_date),
+    'packing'
+  )
+  RETURNING * INTO v_trip;
+
+  -- 2. Categories and items in one statement: category names are unique per trip,
+  -- so the inserted categories map the old category ids to the new ones by name
+  WITH new_categories AS (
+    INSERT INTO categories (trip_id, name)
+    SELECT v_trip.id, c.name FROM categories c WHERE c.trip_id = p_trip_id
+    RETURNING id, name
+  )
+  INSERT INTO items (trip_id, category_id, name, notes, origin, list_quantity, packed_quantity, returning_quantity, purchased_quantity)
+  SELECT
+    v_trip.id,
+    nc.id,
+    i.name,
+    i.notes,
+    CASE WHEN p_reset_quantities THEN 'listed'::"public"."item_origin" ELSE i.origin END,
+    -- Reset, the whole quantity goes back on the list, wherever it had moved to on the trip
+    CASE WHEN p_reset_quantities
+      THEN NULLIF(COALESCE(i.list_quantity, 0) + COALESCE(i.packed_quantity, 0) + COALESCE(i.returning_quantity, 0) + COALESCE(i.purchased_quantity, 0), 0)
+      ELSE i.list_quantity
+    END,
+    CASE WHEN p_reset_quantities THEN NULL ELSE i.packed_quantity END,
+    CASE WHEN p_reset_quantities THEN NULL ELSE i.returning_quantity END,
+    CASE WHEN p_reset_quantities THEN NULL ELSE i.purchased_quantity END
+  FROM items i
+  LEFT JOIN categories oc ON oc.id = i.category_id
+  LEFT JOIN new_categories nc ON nc.name = oc.name
+  WHERE i.trip_id = p_trip_id
+    AND (p_include_purchased OR i.origin <> 'purchased');
+
+  RETURN to_jsonb(v_trip);
+END;
+$$;
+
+
+ALTER FUNCTION "public"."duplicate_trip"("p_user_id" "uuid", "p_trip_id" bigint, "p_name" "text", "p_start_date" "date", "p_reset_quantities" boolean, "p_include_purchased" boolean) OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."item_suggestions"("p_user_id" "uuid", "p_min_days" integer DEFAULT NULL::integer, "p_max_days" integer DEFAULT NULL::integer, "p_exclude_trip_id" bigint DEFAULT NULL::bigint, "p_limit" integer DEFAULT 20) RETURNS TABLE("name" "text", "category_name" "text", "times_listed" bigint, "times_packed" bigint, "times_returned" bigint, "usual_quantity" integer)
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+BEGIN
+  IF p_user_id IS DISTINCT FROM auth.uid() THEN
+    RAISE EXCEPTION 'Cannot read the packing history of another user';
+  END IF;
+
+  PERFORM refresh_item_history(p_user_id);
+
+  -- Items the user packed on completed trips of a similar length, most often packed (and brought back) first
+  RETURN QUERY
+  SELECT
+    (array_agg(h.name ORDER BY h.last_trip_end DESC))[1],
+    (array_agg(h.category_name ORDER BY h.last_trip_end DESC) FILTER (WHERE h.category_name IS NOT NULL))[1],
+    sum(h.times_listed)::bigint,
+    sum(h.times_packed)::bigint,
+    sum(h.times_returned)::bigint,
+    GREATEST(1, round(sum(h.total_packed)::numeric / sum(h.times_packed)))::integer
+  FROM item_history h
+  WHERE h.user_id = p_user_id
+    AND (p_min_days IS NULL OR h.trip_days >= p_min_days)
+    AND (p_max_days IS NULL OR h.trip_days <= p_max_days)
+    -- Only the user's own trip can be excluded; the item names of anyone else's trip must not be probed
+    AND (p_exclude_trip_id IS NULL OR h.item_key NOT IN (
+      SELECT lower(btrim(i.name)) FROM items i
+      WHERE i.trip_id = p_exclude_trip_id AND i.trip_id IN (SELECT id FROM trips WHERE user_id = p_user_id)
+    ))
+  GROUP BY h.item_key
+  HAVING sum(h.times_packed) > 0
+  ORDER BY 4 DESC, 5 DESC, 3 DESC, 1
+  LIMIT p_limit;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."item_suggestions"("p_user_id" "uuid", "p_min_days" integer, "p_max_days" integer, "p_exclude_trip_id" bigint, "p_limit" integer) OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."mark_item_history_stale"() RETURNS "trigger"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_trip_ids BIGINT[] := ARRAY[]::BIGINT[];
+BEGIN
+  -- Items and categories of a completed trip feed item_history, so changing one makes its owner's rows stale
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    v_trip_ids := array_append(v_trip_ids, OLD.trip_id);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    v_trip_ids := array_append(v_trip_ids, NEW.trip_id);
+  END IF;
+
+  INSERT INTO item_history_stale (user_id)
+  SELECT user_id FROM trips
+  WHERE id = ANY(v_trip_ids) AND status = 'completed'
+  ON CONFLICT DO NOTHING;
+
+  RETURN NULL;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."mark_item_history_stale"() OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."mark_item_history_stale_for_trip"() RETURNS "trigger"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+BEGIN
+  -- A trip entering, changing in or leaving the completed status makes its owner's rows stale
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'completed' THEN
+    INSERT INTO item_history_stale (user_id) VALUES (OLD.user_id) ON CONFLICT DO NOTHING;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'completed' THEN
+    INSERT INTO item_history_stale (user_id) VALUES (NEW.user_id) ON CONFLICT DO NOTHING;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."mark_item_history_stale_for_trip"() OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."record_sync_tombstone"() RETURNS "trigger"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_user_id UUID;
+BEGIN
+  IF TG_TABLE_NAME = 'trips' THEN
+    v_user_id := OLD.user_id;
+  ELSE
+    SELECT user_id INTO v_user_id FROM trips WHERE id = OLD.trip_id;
+  END IF;
+
+  -- Categories and items deleted together with their trip find no trip here; the trip's tombstone covers them
+  IF v_user_id IS NOT NULL THEN
+    PERFORM pg_advisory_xact_lock_shared(hashtext('sync:' || v_user_id::text));
+    INSERT INTO sync_tombstones (user_id, table_name, row_id, change_seq)
+    VALUES (v_user_id, TG_TABLE_NAME, OLD.id, nextval('sync_change_seq'))
+    ON CONFLICT (table_name, row_id) DO UPDATE SET change_seq = EXCLUDED.change_seq, deleted_at = now();
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."record_sync_tombstone"() OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."resolve_sync_reference"("p_user_id" "uuid", "p_reference" "jsonb") RETURNS bigint
+    LANGUAGE "sql"
+    AS $$
+  -- A row id, or the op_id (a string) of an applied create whose row is meant
+  SELECT CASE
+    WHEN jsonb_typeof(p_reference) = 'string' THEN (
+      SELECT (result->>'id')::bigint FROM sync_operations WHERE user_id = p_user_id AND op_id = p_reference #>> '{}'
+    )
+    ELSE (p_reference #>> '{}')::bigint
+  END;
+$$;
+
+
+ALTER FUNCTION "public"."resolve_sync_reference"("p_user_id" "uuid", "p_reference" "jsonb") OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."refresh_item_history"("p_user_id" "uuid") RETURNS "void"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+BEGIN
+  -- Only users whose completed trips changed since their last refresh are recomputed
+  DELETE FROM item_history_stale WHERE user_id = p_user_id;
+  IF NOT FOUND THEN
+    RETURN;
+  END IF;
+
+  DELETE FROM item_history WHERE user_id = p_user_id;
+
+  INSERT INTO item_history (user_id, item_key, trip_days, name, category_name, times_listed, times_packed, times_returned, total_packed, last_trip_end)
+  SELECT
+    t.user_id,
+    lower(btrim(i.name)),
+    t.end_date - t.start_date,
+    (array_agg(i.name ORDER BY t.end_date DESC))[1],
+    (array_agg(c.name ORDER BY t.end_date DESC) FILTER (WHERE c.name IS NOT NULL))[1],
+    count(*),
+    count(*) FILTER (WHERE q.on_trip > 0),
+    count(*) FILTER (WHERE COALESCE(i.returning_quantity, 0) > 0),
+    COALESCE(sum(q.on_trip), 0),
+    max(t.end_date)
+  FROM trips t
+  JOIN items i ON i.trip_id = t.id
+  LEFT JOIN categories c ON c.id = i.category_id
+  -- Marking an item as returning moves its quantity out of packed_quantity, so what went on the trip is the sum
+  CROSS JOIN LATERAL (
+    SELECT COALESCE(i.packed_quantity, 0) + COALESCE(i.purchased_quantity, 0) + COALESCE(i.returning_quantity, 0) AS on_trip
+  ) q
+  WHERE t.user_id = p_user_id
+    AND t.status = 'completed'
+  GROUP BY t.user_id, lower(btrim(i.name)), t.end_date - t.start_date;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."refresh_item_history"("p_user_id" "uuid") OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."search_items"("p_user_id" "uuid", "p_query" "text", "p_limit" integer DEFAULT 20, "p_offset" integer DEFAULT 0) RETURNS TABLE("item" "jsonb", "trip" "jsonb", "category" "jsonb", "rank" real)
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_query TEXT := lower(btrim(p_query));
+  v_pattern TEXT;
+BEGIN
+  IF p_user_id IS DISTINCT FROM auth.uid() THEN
+    RAISE EXCEPTION 'Cannot search the items of another user';
+  END IF;
+
+  -- Shorter queries have no trigram to look up in the indexes and would scan every item
+  IF length(v_query) < 3 THEN
+    RAISE EXCEPTION 'Search query must be at least 3 characters' USING ERRCODE = 'invalid_parameter_value';
+  END IF;
+
+  -- Substring match, with the query's LIKE wildcards taken literally
+  v_pattern := '%' || replace(replace(replace(v_query, '\', '\\'), '%', '\%'), '_', '\_') || '%';
+
+  -- Both conditions can use the trigram indexes on name and notes; the trip join keeps it to the user's trips.
+  -- A substring of the name ranks first, then the closest word match in the name, then matches in the notes.
+  RETURN QUERY
+  SELECT
+    to_jsonb(i),
+    to_jsonb(t),
+    CASE WHEN c.id IS NULL THEN NULL ELSE to_jsonb(c) END,
+    GREATEST(
+      word_similarity(v_query, i.name) + CASE WHEN i.name ILIKE v_pattern THEN 1 ELSE 0 END,
+      (word_similarity(v_query, COALESCE(i.notes, '')) + CASE WHEN i.notes ILIKE v_pattern THEN 1 ELSE 0 END) / 2
+    )::real
+  FROM items i
+  JOIN trips t ON t.id = i.trip_id
+  LEFT JOIN categories c ON c.id = i.category_id
+  WHERE t.user_id = p_user_id
+    AND (
+      i.name ILIKE v_pattern OR v_query <% i.name
+      OR i.notes ILIKE v_pattern OR v_query <% i.notes
+    )
+  ORDER BY 4 DESC, t.start_date DESC, i.id
+  LIMIT p_limit
+  OFFSET p_offset;
+END;
+$$;
+
+
+ALTER FUNCTION "public"."search_items"("p_user_id" "uuid", "p_query" "text", "p_limit" integer, "p_offset" integer) OWNER TO "postgres";
+
+
+CREATE OR REPLACE FUNCTION "public"."sync"("p_user_id" "uuid", "p_cursor" bigint, "p_operations" "jsonb") RETURNS "jsonb"
+    LANGUAGE "plpgsql" SECURITY DEFINER
+    AS $$
+DECLARE
+  v_op JSONB;
+  v_op_id TEXT;
+  v_table TEXT;
+  v_action TEXT;
+  v_values JSONB;
+  v_columns TEXT[];
+  v_set TEXT;
+  v_id BIGINT;
+  v_trip_id BIGINT;
+  v_category_id BIGINT;
+  v_row JSONB;
+  v_result JSONB;
+  v_results JSONB := '[]'::JSONB;
+  v_cursor BIGINT := COALESCE(p_cursor, -1);
+  v_changes JSONB;
+BEGIN
+  IF p_user_id IS DISTINCT FROM auth.uid() THEN
+    RAISE EXCEPTION 'Cannot sync the trips of another user';
+  END IF;
+
+  -- One sync of a user at a time, so two devices of the same user cannot interleave their batches.
+  -- Writes of the user take the same lock shared (bump_sync_version, record_sync_tombstone), so this also waits
+  -- for the user's writes in flight to commit and holds back new ones until the sync commits.
+  PERFORM pg_advisory_xact_lock(hashtext('sync:' || p_user_id::text));
+
+  -- Applied op ids are kept long enough for any client to retry a batch whose response it lost
+  DELETE FROM sync_operations WHERE user_id = p_user_id AND applied_at < now() - interval '30 days';
+
+  -- 1. Apply the operations in order, each in its own subtransaction so one failure does not undo the batch
+  FOR v_op IN SELECT * FROM jsonb_array_elements(COALESCE(p_operations, '[]'::JSONB))
+  LOOP
+    v_op_id := v_op->>'op_id';
+    v_table := v_op->>'table';
+    v_action := v_op->>'action';
+
+    -- An op applied before (a batch retried after a lost response) returns its first result
+    SELECT result INTO v_result FROM sync_operations WHERE user_id = p_user_id AND op_id = v_op_id;
+    IF FOUND THEN
+      v_results := v_results || jsonb_build_array(v_result);
+      CONTINUE;
+    END IF;
+
+    BEGIN
+      -- The columns a client may write; ids, owners and versions are the server's
+      v_columns := CASE v_table
+        WHEN 'trips' THEN ARRAY['name', 'description', 'start_date', 'end_date', 'status']
+        WHEN 'categories' THEN ARRAY['name']
+        WHEN 'items' THEN ARRAY['name', 'notes', 'category_id', 'origin', 'list_quantity', 'packed_quantity', 'returning_quantity', 'purchased_quantity']
+      END;
+      IF v_columns IS NULL OR v_action NOT IN ('create', 'update', 'delete') THEN
+        RAISE EXCEPTION 'Unknown operation % on %', v_action, v_table USING ERRCODE = 'invalid_parameter_value';
+      END IF;
+
+      v_values := COALESCE(v_op->'values', '{}'::JSONB);
+      -- A category created earlier in the batch is referenced by its op_id
+      IF jsonb_typeof(v_values->'category_id') = 'string' THEN
+        v_category_id := resolve_sync_reference(p_user_id, v_values->'category_id');
+        IF v_category_id IS NULL THEN
+          RAISE EXCEPTION 'Category not found' USING ERRCODE = 'no_data_found';
+        END IF;
+        v_values := v_values || jsonb_build_object('category_id', v_category_id);
+      END IF;
+
+      IF v_action = 'create' THEN
+        IF v_table = 'trips' THEN
+          v_values := v_values || jsonb_build_object('user_id', p_user_id);
+          v_columns := v_columns || ARRAY['user_id'];
+        ELSE
+          v_trip_id := resolve_sync_reference(p_user_id, v_values->'trip_id');
+          IF NOT EXISTS (SELECT 1 FROM trips WHERE id = v_trip_id AND user_id = p_user_id) THEN
+            RAISE EXCEPTION 'Trip not found' USING ERRCODE = 'no_data_found';
+          END IF;
+          v_values := v_values || jsonb_build_object('trip_id', v_trip_id);
+          v_columns := v_columns || ARRAY['trip_id'];
+          IF v_table = 'items' AND NOT v_values ? 'origin' THEN
+            v_values := v_values || jsonb_build_object('origin', 'listed');
+          END IF;
+        END IF;
+
+        SELECT string_agg(quote_ident(k), ', ') INTO v_set FROM jsonb_object_keys(v_values) k WHERE k = ANY(v_columns);
+        EXECUTE format(
+          'INSERT INTO %1$I AS r (%2$s) SELECT %2$s FROM jsonb_populate_record(NULL::%1$I, $1) RETURNING to_jsonb(r)',
+          v_table, v_set
+        ) INTO v_row USING v_values;
+      ELSE
+        v_id := resolve_sync_reference(p_user_id, v_op->'id');
+        EXECUTE format(
+          'SELECT to_jsonb(r) FROM %I r WHERE r.id = $1 AND %s FOR UPDATE',
+          v_table,
+          CASE WHEN v_table = 'trips' THEN 'r.user_id = $2' ELSE 'r.trip_id IN (SELECT id FROM trips WHERE user_id = $2)' END
+        ) INTO v_row USING v_id, p_user_id;
+
+        -- The row changed (or was deleted) on the server since the client read it: the client keeps the server's row
+        IF v_row IS NULL OR (v_row->>'version')::BIGINT IS DISTINCT FROM (v_op->>'base_version')::BIGINT THEN
+          v_results := v_results || jsonb_build_array(jsonb_build_object(
+            'op_id', v_op_id, 'status', 'conflict', 'id', v_id, 'row', v_row
+          ));
+          CONTINUE;
+        END IF;
+
+        IF v_action = 'delete' THEN
+          EXECUTE format('DELETE FROM %I WHERE id = $1', v_table) USING v_id;
+          v_row := NULL;
+        ELSE
+          SELECT string_agg(quote_ident(k), ', ') INTO v_set FROM jsonb_object_keys(v_values) k WHERE k = ANY(v_columns);
+          IF v_set IS NULL THEN
+            RAISE EXCEPTION 'Nothing to update' USING ERRCODE = 'invalid_parameter_value';
+          END IF;
+          EXECUTE format(
+            'UPDATE %1$I r SET (%2$s) = (SELECT %2$s FROM jsonb_populate_record(NULL::%1$I, $1)) WHERE r.id = $2 RETURNING to_jsonb(r)',
+            v_table, v_set
+          ) INTO v_row USING v_values, v_id;
+        END IF;
+      END IF;
+
+      -- An item's category must belong to the item's own trip
+      IF v_table = 'items' AND v_row IS NOT NULL AND (v_row->>'category_id') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM categories WHERE id = (v_row->>'category_id')::BIGINT AND trip_id = (v_row->>'trip_id')::BIGINT
+      ) THEN
+        RAISE EXCEPTION 'Category not found' USING ERRCODE = 'no_data_found';
+      END IF;
+
+      v_result := jsonb_build_object(
+        'op_id', v_op_id, 'status', 'applied', 'id', COALESCE((v_row->>'id')::BIGINT, v_id), 'version', (v_row->>'version')::BIGINT
+      );
+      INSERT INTO sync_operations (user_id, op_id, result) VALUES (p_user_id, v_op_id, v_result);
+    EXCEPTION WHEN OTHERS THEN
+      v_result := jsonb_build_object('op_id', v_op_id, 'status', 'rejected', 'error', SQLERRM);
+    END;
+
+    v_results := v_results || jsonb_build_array(v_result);
+  END LOOP;
+
+  -- 2. Everything of the user's that changed since the cursor, the operations just applied included.
+  -- With the lock held every change_seq of the user is committed, so later writes all land above the new cursor.
+  SELECT jsonb_build_object(
+    'trips', COALESCE((
+      SELECT jsonb_agg(to_jsonb(t) ORDER BY t.change_seq) FROM trips t
+      WHERE t.user_id = p_user_id AND t.change_seq > v_cursor
+    ), '[]'::JSONB),
+    'categories', COALESCE((
+      SELECT jsonb_agg(to_jsonb(c) ORDER BY c.change_seq) FROM categories c
+      JOIN trips t ON t.id = c.trip_id
+      WHERE t.user_id = p_user_id AND c.change_seq > v_cursor
+    ), '[]'::JSONB),
+    'items', COALESCE((
+      SELECT jsonb_agg(to_jsonb(i) ORDER BY i.change_seq) FROM items i
+      JOIN trips t ON t.id = i.trip_id
+      WHERE t.user_id = p_user_id AND i.change_seq > v_cursor
+    ), '[]'::JSONB),
+    'deleted', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('table', d.table_name, 'id', d.row_id) ORDER BY d.change_seq) FROM sync_tombstones d
+      WHERE d.user_id = p_user_id AND d.change_seq > v_cursor
+    ), '[]'::JSONB)
+  ) INTO v_changes;
+
+  SELECT GREATEST(COALESCE(p_cursor, 0), max(s)) INTO v_cursor FROM (
+    SELECT max(t.change_seq) FROM trips t WHERE t.user_id = p_user_id
+    UNION ALL
+    SELECT max(c.change_seq) FROM categories c JOIN trips t ON t.id = c.trip_id WHERE t.user_id = p_user_id
+    UNION ALL
+    SELECT max(i.change_seq) FROM items i JOIN trips t ON t.id = i.trip_id WHERE t.user_id = p_user_id
+    UNION ALL
+    SELECT max(d.change_seq) FROM sync_tombstones d WHERE d.user_id = p_user_id
+  ) m(s);
+
+  RETURN jsonb_build_object('results', v_results, 'changes', v_changes, 'cursor', v_cursor);
+END;
+$$;
+
+
+ALTER FUNCTION "public"."sync"("p_user_id" "uuid", "p_cursor" bigint, "p_operations" "jsonb") OWNER TO "postgres";
+
 SET default_tablespace = '';
 
 SET default_table_access_method = "heap";
@@ -272,7 +785,9 @@ CREATE TABLE IF NOT EXISTS "public"."categories" (
     "id" bigint NOT NULL,
     "created_at" timestamp with time zone DEFAULT "now"() NOT NULL,
     "name" "text" NOT NULL,
-    "trip_id" bigint NOT NULL
+    "trip_id" bigint NOT NULL,
+    "version" bigint DEFAULT 1 NOT NULL,
+    "change_seq" bigint DEFAULT 0 NOT NULL
 );
 
 
@@ -301,13 +816,46 @@ CREATE TABLE IF NOT EXISTS "public"."items" (
     "returning_quantity" bigint,
     "purchased_quantity" bigint,
     "category_id" bigint,
-    "origin" "public"."item_origin" NOT NULL
+    "origin" "public"."item_origin" NOT NULL,
+    "version" bigint DEFAULT 1 NOT NULL,
+    "change_seq" bigint DEFAULT 0 NOT NULL
 );
 
 
 ALTER TABLE "public"."items" OWNER TO "postgres";
 
 
+
+CREATE TABLE IF NOT EXISTS "public"."item_history" (
+    "user_id" "uuid" NOT NULL,
+    "item_key" "text" NOT NULL,
+    "trip_days" integer NOT NULL,
+    "name" "text" NOT NULL,
+    "category_name" "text",
+    "times_listed" bigint NOT NULL,
+    "times_packed" bigint NOT NULL,
+    "times_returned" bigint NOT NULL,
+    "total_packed" bigint NOT NULL,
+    "last_trip_end" "date" NOT NULL
+);
+
+
+ALTER TABLE "public"."item_history" OWNER TO "postgres";
+
+
+COMMENT ON TABLE "public"."item_history" IS 'Per user, item name and trip length: how often the item was listed, taken (packed or purchased) and brought back on completed trips. Recomputed per user by refresh_item_history once item_history_stale marks the user.';
+
+
+
+CREATE TABLE IF NOT EXISTS "public"."item_history_stale" (
+    "user_id" "uuid" NOT NULL,
+    "marked_at" timestamp with time zone DEFAULT "now"() NOT NULL
+);
+
+
+ALTER TABLE "public"."item_history_stale" OWNER TO "postgres";
+
+
 ALTER TABLE "public"."items" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENTITY (
     SEQUENCE NAME "public"."items_id_seq"
     START WITH 1
@@ -319,6 +867,52 @@ ALTER TABLE "public"."items" ALTER COLUMN "id" ADD GENERATED BY DEFAULT AS IDENT
 
 
 
+CREATE SEQUENCE IF NOT EXISTS "public"."sync_change_seq"
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+ALTER SEQUENCE "public"."sync_change_seq" OWNER TO "postgres";
+
+
+COMMENT ON SEQUENCE "public"."sync_change_seq" IS 'Orders every write to trips, categories and items (their change_seq) and every deletion (sync_tombstones), so a sync cursor is one number.';
+
+
+
+CREATE TABLE IF NOT EXISTS "public"."sync_operations" (
+    "user_id" "uuid" NOT NULL,
+    "op_id" "text" NOT NULL,
+    "result" "jsonb" NOT NULL,
+    "applied_at" timestamp with time zone DEFAULT "now"() NOT NULL
+);
+
+
+ALTER TABLE "public"."sync_operations" OWNER TO "postgres";
+
+
+COMMENT ON TABLE "public"."sync_operations" IS 'Client operations applied by sync, by client op id, so a retried batch is not applied twice and later operations can reference rows created by earlier ones. Kept for 30 days.';
+
+
+
+CREATE TABLE IF NOT EXISTS "public"."sync_tombstones" (
+    "user_id" "uuid" NOT NULL,
+    "table_name" "text" NOT NULL,
+    "row_id" bigint NOT NULL,
+    "change_seq" bigint NOT NULL,
+    "deleted_at" timestamp with time zone DEFAULT "now"() NOT NULL
+);
+
+
+ALTER TABLE "public"."sync_tombstones" OWNER TO "postgres";
+
+
+COMMENT ON TABLE "public"."sync_tombstones" IS 'Deleted trips, categories and items, so sync can tell clients about deletions since their cursor.';
+
+
+
 CREATE TABLE IF NOT EXISTS "public"."trips" (
     "id" bigint NOT NULL,
     "created_at" timestamp with time zone DEFAULT "now"() NOT NULL,
@@ -327,7 +921,9 @@ CREATE TABLE IF NOT EXISTS "public"."trips" (
     "start_date" "date" NOT NULL,
     "end_date" "date" NOT NULL,
     "user_id" "uuid" NOT NULL,
-    "status" "public"."trip_status" DEFAULT 'packing'::"public"."trip_status" NOT NULL
+    "status" "public"."trip_status" DEFAULT 'packing'::"public"."trip_status" NOT NULL,
+    "version" bigint DEFAULT 1 NOT NULL,
+    "change_seq" bigint DEFAULT 0 NOT NULL
 );
 
 
@@ -350,11 +946,31 @@ ALTER TABLE ONLY "public"."categories"
 
 
 
+ALTER TABLE ONLY "public"."item_history"
+    ADD CONSTRAINT "item_history_pkey" PRIMARY KEY ("user_id", "item_key", "trip_days");
+
+
+
+ALTER TABLE ONLY "public"."item_history_stale"
+    ADD CONSTRAINT "item_history_stale_pkey" PRIMARY KEY ("user_id");
+
+
+
 ALTER TABLE ONLY "public"."items"
     ADD CONSTRAINT "items_pkey" PRIMARY KEY ("id");
 
 
 
+ALTER TABLE ONLY "public"."sync_operations"
+    ADD CONSTRAINT "sync_operations_pkey" PRIMARY KEY ("user_id", "op_id");
+
+
+
+ALTER TABLE ONLY "public"."sync_tombstones"
+    ADD CONSTRAINT "sync_tombstones_pkey" PRIMARY KEY ("table_name", "row_id");
+
+
+
 ALTER TABLE ONLY "public"."trips"
     ADD CONSTRAINT "trips_pkey" PRIMARY KEY ("id");
 
@@ -375,19 +991,89 @@ ALTER TABLE ONLY "public"."trips"
 
 
 
+CREATE INDEX "categories_trip_id_change_seq_idx" ON "public"."categories" USING "btree" ("trip_id", "change_seq");
+
+
+
+CREATE INDEX "items_name_trgm_idx" ON "public"."items" USING "gin" ("name" "extensions"."gin_trgm_ops");
+
+
+
+CREATE INDEX "items_notes_trgm_idx" ON "public"."items" USING "gin" ("notes" "extensions"."gin_trgm_ops");
+
+
+
 CREATE INDEX "items_trip_id_idx" ON "public"."items" USING "btree" ("trip_id");
 
 
 
+CREATE INDEX "items_trip_id_change_seq_idx" ON "public"."items" USING "btree" ("trip_id", "change_seq");
+
+
+
+CREATE INDEX "sync_tombstones_user_id_change_seq_idx" ON "public"."sync_tombstones" USING "btree" ("user_id", "change_seq");
+
+
+
+CREATE INDEX "trips_user_id_change_seq_idx" ON "public"."trips" USING "btree" ("user_id", "change_seq");
+
+
+
 CREATE INDEX "trips_user_id_index" ON "public"."trips" USING "btree" ("user_id");
 
 
 
+CREATE OR REPLACE TRIGGER "categories_bump_sync_version" BEFORE INSERT OR UPDATE ON "public"."categories" FOR EACH ROW EXECUTE FUNCTION "public"."bump_sync_version"();
+
+
+
+CREATE OR REPLACE TRIGGER "categories_mark_item_history_stale" AFTER INSERT OR DELETE OR UPDATE ON "public"."categories" FOR EACH ROW EXECUTE FUNCTION "public"."mark_item_history_stale"();
+
+
+
+CREATE OR REPLACE TRIGGER "categories_record_sync_tombstone" AFTER DELETE ON "public"."categories" FOR EACH ROW EXECUTE FUNCTION "public"."record_sync_tombstone"();
+
+
+
+CREATE OR REPLACE TRIGGER "items_bump_sync_version" BEFORE INSERT OR UPDATE ON "public"."items" FOR EACH ROW EXECUTE FUNCTION "public"."bump_sync_version"();
+
+
+
+CREATE OR REPLACE TRIGGER "items_mark_item_history_stale" AFTER INSERT OR DELETE OR UPDATE ON "public"."items" FOR EACH ROW EXECUTE FUNCTION "public"."mark_item_history_stale"();
+
+
+
+CREATE OR REPLACE TRIGGER "items_record_sync_tombstone" AFTER DELETE ON "public"."items" FOR EACH ROW EXECUTE FUNCTION "public"."record_sync_tombstone"();
+
+
+
+CREATE OR REPLACE TRIGGER "trips_bump_sync_version" BEFORE INSERT OR UPDATE ON "public"."trips" FOR EACH ROW EXECUTE FUNCTION "public"."bump_sync_version"();
+
+
+
+CREATE OR REPLACE TRIGGER "trips_mark_item_history_stale" AFTER INSERT OR DELETE OR UPDATE OF "status", "start_date", "end_date", "user_id" ON "public"."trips" FOR EACH ROW EXECUTE FUNCTION "public"."mark_item_history_stale_for_trip"();
+
+
+
+CREATE OR REPLACE TRIGGER "trips_record_sync_tombstone" AFTER DELETE ON "public"."trips" FOR EACH ROW EXECUTE FUNCTION "public"."record_sync_tombstone"();
+
+
+
 ALTER TABLE ONLY "public"."categories"
     ADD CONSTRAINT "category_trip_id_fkey" FOREIGN KEY ("trip_id") REFERENCES "public"."trips"("id") ON UPDATE CASCADE ON DELETE CASCADE;
 
 
 
+ALTER TABLE ONLY "public"."item_history"
+    ADD CONSTRAINT "item_history_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "auth"."users"("id") ON UPDATE CASCADE ON DELETE CASCADE;
+
+
+
+ALTER TABLE ONLY "public"."item_history_stale"
+    ADD CONSTRAINT "item_history_stale_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "auth"."users"("id") ON UPDATE CASCADE ON DELETE CASCADE;
+
+
+
 ALTER TABLE ONLY "public"."items"
     ADD CONSTRAINT "items_category_id_fkey" FOREIGN KEY ("category_id") REFERENCES "public"."categories"("id") ON UPDATE CASCADE ON DELETE CASCADE;
 
@@ -398,6 +1084,16 @@ ALTER TABLE ONLY "public"."items"
 
 
 
+ALTER TABLE ONLY "public"."sync_operations"
+    ADD CONSTRAINT "sync_operations_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "auth"."users"("id") ON UPDATE CASCADE ON DELETE CASCADE;
+
+
+
+ALTER TABLE ONLY "public"."sync_tombstones"
+    ADD CONSTRAINT "sync_tombstones_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "auth"."users"("id") ON UPDATE CASCADE ON DELETE CASCADE;
+
+
+
 ALTER TABLE ONLY "public"."trips"
     ADD CONSTRAINT "trips_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "auth"."users"("id") ON UPDATE CASCADE ON DELETE CASCADE;
 
@@ -471,12 +1167,29 @@ CREATE POLICY "Users can view their own trips" ON "public"."trips" FOR SELECT TO
 
 
 
+CREATE POLICY "Users can view their own item history" ON "public"."item_history" FOR SELECT TO "authenticated" USING (("user_id" = ( SELECT "auth"."uid"() AS "uid")));
+
+
+
 ALTER TABLE "public"."categories" ENABLE ROW LEVEL SECURITY;
 
 
+
+ALTER TABLE "public"."item_history" ENABLE ROW LEVEL SECURITY;
+
+
+ALTER TABLE "public"."item_history_stale" ENABLE ROW LEVEL SECURITY;
+
+
 ALTER TABLE "public"."items" ENABLE ROW LEVEL SECURITY;
 
 
+ALTER TABLE "public"."sync_operations" ENABLE ROW LEVEL SECURITY;
+
+
+ALTER TABLE "public"."sync_tombstones" ENABLE ROW LEVEL SECURITY;
+
+
 ALTER TABLE "public"."trips" ENABLE ROW LEVEL SECURITY;
 
 
@@ -648,6 +1361,56 @@ GRANT ALL ON FUNCTION "public"."accept_assistant_results"("p_user_id" "uuid", "p
 
 
 
+GRANT ALL ON FUNCTION "public"."bump_sync_version"() TO "anon";
+GRANT ALL ON FUNCTION "public"."bump_sync_version"() TO "authenticated";
+GRANT ALL ON FUNCTION "public"."bump_sync_version"() TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."duplicate_trip"("p_user_id" "uuid", "p_trip_id" bigint, "p_name" "text", "p_start_date" "date", "p_reset_quantities" boolean, "p_include_purchased" boolean) TO "anon";
+GRANT ALL ON FUNCTION "public"."duplicate_trip"("p_user_id" "uuid", "p_trip_id" bigint, "p_name" "text", "p_start_date" "date", "p_reset_quantities" boolean, "p_include_purchased" boolean) TO "authenticated";
+GRANT ALL ON FUNCTION "public"."duplicate_trip"("p_user_id" "uuid", "p_trip_id" bigint, "p_name" "text", "p_start_date" "date", "p_reset_quantities" boolean, "p_include_purchased" boolean) TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."item_suggestions"("p_user_id" "uuid", "p_min_days" integer, "p_max_days" integer, "p_exclude_trip_id" bigint, "p_limit" integer) TO "anon";
+GRANT ALL ON FUNCTION "public"."item_suggestions"("p_user_id" "uuid", "p_min_days" integer, "p_max_days" integer, "p_exclude_trip_id" bigint, "p_limit" integer) TO "authenticated";
+GRANT ALL ON FUNCTION "public"."item_suggestions"("p_user_id" "uuid", "p_min_days" integer, "p_max_days" integer, "p_exclude_trip_id" bigint, "p_limit" integer) TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."mark_item_history_stale"() TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."mark_item_history_stale_for_trip"() TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."record_sync_tombstone"() TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."resolve_sync_reference"("p_user_id" "uuid", "p_reference" "jsonb") TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."refresh_item_history"("p_user_id" "uuid") TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."search_items"("p_user_id" "uuid", "p_query" "text", "p_limit" integer, "p_offset" integer) TO "anon";
+GRANT ALL ON FUNCTION "public"."search_items"("p_user_id" "uuid", "p_query" "text", "p_limit" integer, "p_offset" integer) TO "authenticated";
+GRANT ALL ON FUNCTION "public"."search_items"("p_user_id" "uuid", "p_query" "text", "p_limit" integer, "p_offset" integer) TO "service_role";
+
+
+
+GRANT ALL ON FUNCTION "public"."sync"("p_user_id" "uuid", "p_cursor" bigint, "p_operations" "jsonb") TO "anon";
+GRANT ALL ON FUNCTION "public"."sync"("p_user_id" "uuid", "p_cursor" bigint, "p_operations" "jsonb") TO "authenticated";
+GRANT ALL ON FUNCTION "public"."sync"("p_user_id" "uuid", "p_cursor" bigint, "p_operations" "jsonb") TO "service_role";
+
+
+
 
 
 
@@ -675,6 +1438,15 @@ GRANT ALL ON SEQUENCE "public"."category_id_seq" TO "service_role";
 
 
 
+GRANT SELECT ON TABLE "public"."item_history" TO "authenticated";
+GRANT ALL ON TABLE "public"."item_history" TO "service_role";
+
+
+
+GRANT ALL ON TABLE "public"."item_history_stale" TO "service_role";
+
+
+
 GRANT ALL ON TABLE "public"."items" TO "anon";
 GRANT ALL ON TABLE "public"."items" TO "authenticated";
 GRANT ALL ON TABLE "public"."items" TO "service_role";
@@ -687,6 +1459,20 @@ GRANT ALL ON SEQUENCE "public"."items_id_seq" TO "service_role";
 
 
 
+GRANT ALL ON SEQUENCE "public"."sync_change_seq" TO "anon";
+GRANT ALL ON SEQUENCE "public"."sync_change_seq" TO "authenticated";
+GRANT ALL ON SEQUENCE "public"."sync_change_seq" TO "service_role";
+
+
+
+GRANT ALL ON TABLE "public"."sync_operations" TO "service_role";
+
+
+
+GRANT ALL ON TABLE "public"."sync_tombstones" TO "service_role";
+
+
+
 GRANT ALL ON TABLE "public"."trips" TO "anon";
 GRANT ALL ON TABLE "public"."trips" TO "authenticated";
 GRANT ALL ON TABLE "public"."trips" TO "service_role";
@@ -735,6 +1521,16 @@ ALTER DEFAULT PRIVILEGES FOR ROLE "postgres" IN SCHEMA "public" GRANT ALL ON TAB
 
 
 
+-- Users who already had completed trips get their item history computed on their first suggestions read
+INSERT INTO "public"."item_history_stale" ("user_id")
+SELECT DISTINCT "user_id" FROM "public"."trips" WHERE "status" = 'completed'
+ON CONFLICT DO NOTHING;
+
+
+
+
+
+
 
 
 